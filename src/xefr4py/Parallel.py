@@ -0,0 +1,313 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, ExitStack
+from enum import Enum
+from multiprocessing import shared_memory
+from typing import Any, Iterator
+
+import function
+import numpy as np
+from joblib import parallel_config
+
+from xefr4py.metrics import evaluate_metrics_codes, evaluate_metrics_batch, get_metric_capabilities, \
+    MetricCapabilities
+
+# data attached by each worker process of the pool
+_worker_data: dict[str, Any] = dict()
+
+# joblib threads of each worker process (used by the tree ensembles), the processes already use the cores
+WORKER_THREADS: int = 1
+
+# joblib threads of the metrics (used by the tree ensembles) when the subsets are evaluated without a process pool,
+# every core
+SERIAL_THREADS: int = -1
+
+
+class ParallelAxis(Enum):
+    """
+    Enum to define how the work is split between the processes
+    """
+    SUBSETS = "subsets"
+    FEATURES = "features"
+
+
+def get_n_jobs(n_jobs: int) -> int:
+    """
+    Get the number of processes to use, following the scikit-learn convention
+
+    :param n_jobs: number of processes, None or 1 (no pool), -1 (all cores), -2 (all cores but one), ...
+    :return: number of processes to use
+    """
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def get_subsets_seeds(iterations: int) -> np.array:
+    """
+    Get one seed per subset from the global numpy random generator, so every subset has its own random stream no
+    matter which process evaluates it
+
+    :param iterations: number of subsets
+    :return: array with one seed per subset
+    """
+    return np.random.randint(0, 2 ** 32 - 1, iterations, dtype=np.int64)
+
+
+def get_weighted_rows(rows: list[int]) -> tuple[np.array, np.array]:
+    """
+    Get the weighted representation of a subset sampled with replacement, the non-zero entries of the multiplicity
+    of each row of the dataset
+
+    :param rows: subset row indexes
+    :return: the distinct row indexes and the multiplicity of each one
+    """
+    return np.unique(rows, return_counts=True)
+
+
+def get_rows_weights(random_rows: list[list[int]], n_rows: int) -> np.array:
+    """
+    Get the weights matrix of several subsets sampled with replacement, the multiplicity of each row of the dataset
+    in each subset
+
+    :param random_rows: subsets row indexes
+    :param n_rows: number of rows of the dataset
+    :return: number of subsets x n_rows multiplicity of each row
+    """
+    keys: np.array = np.concatenate([np.asarray(rows, dtype=np.int64) + i * n_rows
+                                     for i, rows in enumerate(random_rows)] + [np.zeros(0, dtype=np.int64)])
+    return np.bincount(keys, minlength=len(random_rows) * n_rows).reshape(len(random_rows), n_rows)
+
+
+def evaluate_subset(functions: list[function], class_data: np.array, data: np.array, features_names: np.array,
+                    rows: list[int], seed: int) -> np.array:
+    """
+    Apply the metrics to a subset of rows of the dataset with the random generator seeded for that subset. The subset
+    is represented by its distinct rows weighted by their multiplicity, so the repeated rows are never copied
+
+    :param functions: statistical functions to use as relevancy metrics of each feature
+    :param class_data: class codes
+    :param data: features codes matrix
+    :param features_names: features names
+    :param rows: subset row indexes
+    :param seed: subset seed
+    :return: number of metrics x M weights of the features in the subset
+    """
+    distinct_rows, multiplicity = get_weighted_rows(rows)
+    state: dict = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        return evaluate_metrics_codes(class_data[distinct_rows], data[distinct_rows, :], functions, multiplicity,
+                                      features_names)
+    finally:
+        np.random.set_state(state)
+
+
+def evaluate_batch(functions: list[function], class_data: np.array, data: np.array, random_rows: list[list[int]],
+                   seeds: np.array, n_jobs: int = 1) -> np.array:
+    """
+    Apply the metrics to several subsets of rows of the dataset at once, each metric is called once for all the
+    subsets with their weights matrix
+
+    :param functions: statistical functions to use as relevancy metrics of each feature, all with a batch function
+    :param class_data: class codes
+    :param data: features codes matrix
+    :param random_rows: subsets row indexes
+    :param seeds: seed of each subset
+    :param n_jobs: number of threads of the metrics that use them, default value 1
+    :return: number of subsets x number of metrics x M weights of the features in each subset
+    """
+    return evaluate_metrics_batch(class_data, data, functions, get_rows_weights(random_rows, len(class_data)), seeds,
+                                  n_jobs)
+
+
+def get_metrics_partitions(functions: list[function]) -> list[tuple[list[function], bool, bool]]:
+    """
+    Split the metrics by execution path, the metrics of a partition are evaluated together on each batch of subsets
+
+    :param functions: statistical functions to use as relevancy metrics of each feature
+    :return: metrics, evaluated on the distinct columns and evaluated in batch, of each partition
+    """
+    partitions: dict[tuple[bool, bool], list[function]] = dict()
+    for f in functions:
+        capabilities: MetricCapabilities = get_metric_capabilities(f)
+        partitions.setdefault((capabilities.feature_independent, capabilities.batch_function is not None),
+                              list()).append(f)
+    return [(partition, independent, batch) for (independent, batch), partition in partitions.items()]
+
+
+def evaluate_fused_batch(partitions: list[tuple[list[function], bool, bool]], dataset: dict[str, np.array],
+                         random_rows: list[list[int]], seeds: np.array, n_jobs: int = 1) -> tuple[np.array, np.array]:
+    """
+    Apply every metric to a batch of subsets, the subsets are taken once for all the metrics. The metrics that
+    evaluate each feature independently use the distinct columns and their weights are copied to the identical
+    features
+
+    :param partitions: metrics, evaluated on the distinct columns and evaluated in batch, of each partition
+    :param dataset: class, data, features_names, distinct (distinct columns of data), distinct_names and
+                    features_groups (distinct column of each feature, None if every column is distinct)
+    :param random_rows: subsets row indexes
+    :param seeds: seed of each subset
+    :param n_jobs: number of threads of the metrics that use them, default value 1
+    :return: number of subsets x number of metrics x M weights, in the partitions order, and the seconds spent on
+             each partition
+    """
+    rows_weights: np.array = None
+    weights: list[np.array] = list()
+    times: np.array = np.zeros(len(partitions))
+    for i, (functions, independent, batch) in enumerate(partitions):
+        timer: float = time.perf_counter()
+        data: np.array = dataset['distinct'] if independent else dataset['data']
+        if batch:
+            if rows_weights is None:
+                rows_weights = get_rows_weights(random_rows, len(dataset['class']))
+            result: np.array = evaluate_metrics_batch(dataset['class'], data, functions, rows_weights, seeds, n_jobs)
+        else:
+            names: np.array = dataset['distinct_names'] if independent else dataset['features_names']
+            result: np.array = np.array([evaluate_subset(functions, dataset['class'], data, names, rows, seed)
+                                         for rows, seed in zip(random_rows, seeds)])
+            result = result.reshape(len(random_rows), len(functions), data.shape[1])
+        if independent and dataset['features_groups'] is not None:
+            result = result[:, :, dataset['features_groups']]
+        weights.append(result)
+        times[i] = time.perf_counter() - timer
+    return np.concatenate(weights, axis=1), times
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach to an existing shared memory block without tracking it, the block is owned by the parent process
+
+    :param name: shared memory block name
+    :return: the shared memory block
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # python < 3.13 always tracks the block, the workers share the resource tracker of the parent process, which
+        # already tracks it, so the block is still unlinked once by its owner
+        return shared_memory.SharedMemory(name=name)
+
+
+def _init_worker(arrays: dict[str, tuple[str, tuple[int, ...], np.dtype, str]], values: dict[str, Any]) -> None:
+    """
+    Initialize a worker process with the arrays in shared memory
+
+    :param arrays: shared memory block name, shape, type and memory order of each array
+    :param values: other values used by the workers
+    """
+    for key, (name, shape, dtype, order) in arrays.items():
+        shm: shared_memory.SharedMemory = _attach_shared_memory(name)
+        _worker_data[f'{key}_shm'] = shm
+        _worker_data[key] = np.ndarray(shape, dtype, buffer=shm.buf, order=order)
+    _worker_data.update(values)
+
+
+def get_worker_data(key: str) -> Any:
+    """
+    Get a value (or shared array) attached to the current worker process
+
+    :param key: name of the value
+    :return: the value
+    """
+    return _worker_data[key]
+
+
+def evaluate_subset_task(task: tuple[list[function], list[list[int]], int]) -> np.array:
+    """
+    Evaluate a subset inside a worker process, using the dataset in shared memory
+
+    :param task: metrics, subsets holding the subset only, so a lazy subsets slice is generated in the worker, and
+                 subset seed
+    :return: number of metrics x M weights of the features in the subset
+    """
+    functions, random_rows, seed = task
+    with parallel_config(n_jobs=WORKER_THREADS):
+        return evaluate_subset(functions, _worker_data['class'], _worker_data['data'],
+                               _worker_data['features_names'], random_rows[0], seed)
+
+
+def evaluate_batch_task(task: tuple[list[function], list[list[int]], np.array]) -> np.array:
+    """
+    Evaluate a batch of subsets inside a worker process, using the dataset in shared memory
+
+    :param task: metrics, subsets row indexes and subsets seeds
+    :return: number of subsets x number of metrics x M weights of the features in each subset
+    """
+    functions, random_rows, seeds = task
+    with parallel_config(n_jobs=WORKER_THREADS):
+        return evaluate_batch(functions, _worker_data['class'], _worker_data['data'], random_rows, seeds,
+                              WORKER_THREADS)
+
+
+def evaluate_fused_batch_task(task: tuple[list[tuple[list[function], bool, bool]], list[list[int]],
+                                          np.array]) -> tuple[np.array, np.array]:
+    """
+    Evaluate every metric on a batch of subsets inside a worker process, using the dataset in shared memory
+
+    :param task: metrics partitions, subsets row indexes and subsets seeds
+    :return: number of subsets x number of metrics x M weights and the seconds spent on each partition
+    """
+    partitions, random_rows, seeds = task
+    dataset: dict[str, np.array] = dict(_worker_data)
+    dataset.setdefault('distinct', dataset['data'])
+    with parallel_config(n_jobs=WORKER_THREADS):
+        return evaluate_fused_batch(partitions, dataset, random_rows, seeds, WORKER_THREADS)
+
+
+def evaluate_features_block_task(task: tuple[list[function], np.array, list[list[int]], np.array]) -> np.array:
+    """
+    Evaluate every subset over a block of features inside a worker process, using the dataset in shared memory. The
+    subsets are evaluated in a single batch if every metric has a batch function
+
+    :param task: metrics, block column indexes, subsets row indexes and subsets seeds
+    :return: N x number of metrics x block size weights of the features in the block
+    """
+    functions, columns_idx, random_rows, seeds = task
+    data: np.array = _worker_data['data'][:, columns_idx]
+    if all(get_metric_capabilities(f).batch_function is not None for f in functions):
+        with parallel_config(n_jobs=WORKER_THREADS):
+            return evaluate_batch(functions, _worker_data['class'], data, random_rows, seeds, WORKER_THREADS)
+    features_names: np.array = _worker_data['features_names'][columns_idx]
+    return np.array([evaluate_subset(functions, _worker_data['class'], data, features_names, random_rows[i], seeds[i])
+                     for i in range(len(random_rows))]).reshape(len(random_rows), len(functions), len(columns_idx))
+
+
+def get_features_blocks(n_features: int, n_blocks: int) -> list[np.array]:
+    """
+    Split the features columns into blocks
+
+    :param n_features: number of features
+    :param n_blocks: number of blocks
+    :return: column indexes of each block
+    """
+    return np.array_split(np.arange(n_features), min(n_blocks, n_features))
+
+
+@contextmanager
+def shared_dataset_pool(arrays: dict[str, np.array], n_jobs: int,
+                        values: dict[str, Any] = None) -> Iterator[ProcessPoolExecutor]:
+    """
+    Create a process pool whose workers share the arrays of the dataset, each array is copied once to shared memory
+    (keeping its memory order) and is never pickled
+
+    :param arrays: arrays to share by name (class and data for the dataset)
+    :param n_jobs: number of processes
+    :param values: other values to send once to each worker
+    :return: the process pool
+    """
+    with ExitStack() as stack:
+        descriptors: dict[str, tuple[str, tuple[int, ...], np.dtype, str]] = dict()
+        for key, array in arrays.items():
+            order: str = 'F' if array.flags['F_CONTIGUOUS'] and not array.flags['C_CONTIGUOUS'] else 'C'
+            shm: shared_memory.SharedMemory = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            stack.callback(shm.unlink)
+            stack.callback(shm.close)
+            np.ndarray(array.shape, array.dtype, buffer=shm.buf, order=order)[...] = array
+            descriptors[key] = (shm.name, array.shape, array.dtype, order)
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(descriptors, values or dict())) as executor:
+            yield executor
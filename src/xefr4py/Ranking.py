@@ -0,0 +1,192 @@
+from enum import Enum
+
+import numpy as np
+import pandas
+from scipy.stats import kendalltau
+
+# maximum number of weights sorted at once by the rank accumulator
+RANK_CHUNK_SIZE: int = 2 ** 20
+
+
+class StabilityMeasure(Enum):
+    """
+    Enum with the measures of agreement between the top features of two rankings
+    """
+    JACCARD = "jaccard"
+    KENDALL_TAU = "kendall_tau"
+
+
+def ranking_stability(previous: list[str], current: list[str], top_k: int,
+                      measure: StabilityMeasure = StabilityMeasure.JACCARD) -> float:
+    """
+    Measure how much the top features of a ranking changed. Jaccard is the overlap of the top k features of both
+    rankings, Kendall tau is the correlation of the positions of the previous top k features in both rankings
+
+    :param previous: previous ranking, features names ordered by relevance
+    :param current: current ranking, the same features ordered by relevance
+    :param top_k: number of top features to compare
+    :param measure: agreement measure, default value Jaccard
+    :return: agreement between the rankings, 1 if the top features didn't change
+    """
+    previous_top: list[str] = previous[:top_k]
+    if measure == StabilityMeasure.JACCARD:
+        union: set[str] = set(previous_top) | set(current[:top_k])
+        return len(set(previous_top) & set(current[:top_k])) / len(union) if union else 1.0
+    if len(previous_top) < 2:
+        return 1.0 if previous_top == current[:top_k] else 0.0
+    positions: dict[str, int] = {feature: i for i, feature in enumerate(current)}
+    statistic: float = kendalltau(np.arange(len(previous_top)), [positions[f] for f in previous_top]).statistic
+    return float(np.nan_to_num(statistic))
+
+
+def _update_moments(count: np.array, mean: np.array, m2: np.array, values: np.array,
+                    valid: np.array) -> None:
+    """
+    Fold a block of values into the running count, mean and sum of squared deviations of each column, combining the
+    moments of the block with the running ones (Chan et al.)
+
+    :param count: running number of values of each column, updated in place
+    :param mean: running mean of each column, updated in place
+    :param m2: running sum of squared deviations of each column, updated in place
+    :param values: rows x columns block of values
+    :param valid: rows x columns mask of the values to use
+    """
+    block_count: np.array = valid.sum(axis=0)
+    used: np.array = block_count > 0
+    if not used.any():
+        return
+    masked: np.array = np.where(valid, values, 0.0)
+    block_mean: np.array = np.divide(masked.sum(axis=0), block_count, out=np.zeros(len(count)), where=used)
+    block_m2: np.array = np.where(valid, np.square(masked - block_mean), 0.0).sum(axis=0)
+    total: np.array = count + block_count
+    delta: np.array = block_mean - mean
+    mean[used] += delta[used] * block_count[used] / total[used]
+    m2[used] += block_m2[used] + np.square(delta[used]) * count[used] * block_count[used] / total[used]
+    count[:] = total
+
+
+def _order_top(rows: np.array, k: int) -> np.array:
+    """
+    Order the k best features of each row, the ties are ranked by column order. Only the k best are selected with a
+    partition before they are sorted
+
+    :param rows: rows x M weights, without missing values
+    :param k: number of best features to order
+    :return: rows x k column indexes of the best features, the best first
+    """
+    top: np.array
+    if k < rows.shape[1]:
+        # select the k best features of each row, the ties with the k-th best are taken by column order
+        kth: np.array = -np.partition(-rows, k - 1, axis=1)[:, k - 1:k]
+        greater: np.array = rows > kth
+        equal: np.array = rows == kth
+        selected: np.array = greater | (equal & (np.cumsum(equal, axis=1) <= k - greater.sum(axis=1, keepdims=True)))
+        top = np.nonzero(selected)[1].reshape(rows.shape[0], k)
+    else:
+        top = np.broadcast_to(np.arange(rows.shape[1]), rows.shape)
+
+    # sort the selected features, the stable sort keeps the ties by column order
+    order: np.array = np.argsort(-np.take_along_axis(rows, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1)
+
+
+class RankAccumulator:
+    """
+    Accumulate the rank of the features one block of weights rows at a time, so the weights of every subset don't
+    need to be kept. Each row ranks the features and adds the weight of each position to the feature in it. Optionally
+    the mean and variance of the weight and of the position of each feature are kept online
+    """
+
+    def __init__(self, features_names: list[str], weight_per_group: list[float], statistics: bool = False):
+        """
+        Create an empty accumulator
+
+        :param features_names: features names to be ranked
+        :param weight_per_group: weight per group of each rank
+        :param statistics: keep the online statistics of each feature, which needs every row fully sorted, otherwise
+                           only the positions with group weight are sorted, default value False
+        """
+        self.__features_names: list[str] = list(features_names)
+        n_features: int = len(self.__features_names)
+        self.__group_weights: np.array = np.asarray(weight_per_group[:n_features], dtype=np.float64)
+        self.__statistics: bool = statistics
+        # only the positions with group weight add to the rank
+        non_zero: np.array = np.flatnonzero(self.__group_weights)
+        self.__k: int = int(non_zero[-1]) + 1 if non_zero.size > 0 else 0
+        self.__rank_weights: np.array = np.zeros(n_features)
+        self.__n_rows: int = 0
+        self.__weight_moments: tuple[np.array, np.array, np.array] = (np.zeros(n_features), np.zeros(n_features),
+                                                                      np.zeros(n_features))
+        self.__position_moments: tuple[np.array, np.array, np.array] = (np.zeros(n_features), np.zeros(n_features),
+                                                                        np.zeros(n_features))
+
+    def add(self, weights: np.array) -> None:
+        """
+        Fold rows of weights into the rank, the missing weights are ranked last and left out of the weights
+        statistics. The ties are ranked by column order
+
+        :param weights: rows x M weights of the features
+        """
+        weights = np.asarray(weights, dtype=np.float64).reshape(-1, len(self.__features_names))
+        n_features: int = weights.shape[1]
+        chunk: int = max(1, RANK_CHUNK_SIZE // max(1, n_features))
+        k: int = n_features if self.__statistics else self.__k
+        for start in range(0, weights.shape[0] if k > 0 else 0, chunk):
+            rows: np.array = weights[start:start + chunk]
+            ordered: np.array = _order_top(np.where(np.isnan(rows), -np.inf, rows), k)
+            if self.__statistics:
+                _update_moments(*self.__weight_moments, rows, np.isfinite(rows))
+                positions: np.array = np.empty(ordered.shape)
+                np.put_along_axis(positions, ordered, np.arange(n_features, dtype=np.float64)[np.newaxis], axis=1)
+                _update_moments(*self.__position_moments, positions, np.ones(positions.shape, dtype=bool))
+
+            # add the weight of each group to the features in that position
+            self.__rank_weights += np.bincount(ordered.ravel(),
+                                               weights=np.tile(self.__group_weights[:k], rows.shape[0]),
+                                               minlength=n_features)
+        self.__n_rows += weights.shape[0]
+
+    def get_n_rows(self) -> int:
+        """
+        Get the number of weights rows folded into the rank
+
+        :return: number of rows
+        """
+        return self.__n_rows
+
+    def get_rank_weights(self) -> np.array:
+        """
+        Get the rank weight of each feature
+
+        :return: rank weight of each feature, in the features order
+        """
+        return self.__rank_weights.copy()
+
+    def get_ranking(self) -> list[str]:
+        """
+        Get the features ordered by their current rank weight, the ties by column order
+
+        :return: features names
+        """
+        order: np.array = np.argsort(-self.__rank_weights, kind='stable')
+        return [self.__features_names[i] for i in order]
+
+    def get_statistics(self) -> pandas.DataFrame:
+        """
+        Get the online statistics of each feature, the variances are sample variances (NaN with less than 2 values)
+
+        :return: data frame indexed by feature with the rank weight and the mean and variance of the weight and of
+                 the position (0 is the best) of each feature
+        """
+        if not self.__statistics:
+            raise ValueError("The accumulator was created without statistics")
+        weight_count, weight_mean, weight_m2 = self.__weight_moments
+        position_count, position_mean, position_m2 = self.__position_moments
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return pandas.DataFrame({
+                'Rank Weight': self.__rank_weights,
+                'Mean Weight': np.where(weight_count > 0, weight_mean, np.nan),
+                'Weight Variance': np.where(weight_count > 1, weight_m2 / (weight_count - 1), np.nan),
+                'Mean Position': np.where(position_count > 0, position_mean, np.nan),
+                'Position Variance': np.where(position_count > 1, position_m2 / (position_count - 1), np.nan)
+            }, index=self.__features_names)
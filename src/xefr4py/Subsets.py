@@ -0,0 +1,84 @@
+from typing import Iterator
+
+import numpy as np
+
+
+class RandomSubsets:
+    """
+    Random row indexes subsets sampled with replacement, generated on demand. Each subset is drawn by a counter based
+    generator (Philox) keyed by the seed and the subset number, so any subset is reproducible on its own and the
+    subsets are shared between processes or saved by their seed only, never by their row indexes
+    """
+
+    def __init__(self, n_rows: int, size: int, iterations: int, seed: int, start: int = 0):
+        """
+        Create the subsets
+
+        :param n_rows: dataset number of rows
+        :param size: number of rows per subset
+        :param iterations: number of subsets
+        :param seed: seed of the subsets
+        :param start: number of the first subset, default value 0
+        """
+        self.n_rows: int = n_rows
+        self.size: int = size
+        self.iterations: int = iterations
+        self.seed: int = int(seed)
+        self.start: int = start
+        self.dtype: np.dtype = np.dtype(np.int32 if n_rows <= np.iinfo(np.int32).max else np.int64)
+
+    def get_subset(self, number: int) -> np.array:
+        """
+        Generate a subset from its number, independently of the other subsets
+
+        :param number: number of the subset, counted from the first subset of the seed
+        :return: row indexes of the subset
+        """
+        generator = np.random.Generator(np.random.Philox(key=np.array([number, self.seed], dtype=np.uint64)))
+        return generator.integers(0, self.n_rows, self.size, dtype=self.dtype)
+
+    def to_array(self) -> np.array:
+        """
+        Generate every subset into a single matrix
+
+        :return: number of subsets x size row indexes
+        """
+        subsets: np.array = np.empty((self.iterations, self.size), dtype=self.dtype)
+        for i in range(self.iterations):
+            subsets[i] = self.get_subset(self.start + i)
+        return subsets
+
+    def __len__(self) -> int:
+        """
+        Get the number of subsets
+
+        :return: number of subsets
+        """
+        return self.iterations
+
+    def __getitem__(self, item: int | slice) -> 'np.array | RandomSubsets':
+        """
+        Get a subset, generated on demand, or a contiguous range of subsets, which is still generated on demand
+
+        :param item: subset position or slice of positions with step 1
+        :return: row indexes of the subset or the subsets of the range
+        """
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self.iterations)
+            if step != 1:
+                raise ValueError("The subsets can only be sliced with step 1")
+            return RandomSubsets(self.n_rows, self.size, max(0, stop - start), self.seed, self.start + start)
+        if item < 0:
+            item += self.iterations
+        if not 0 <= item < self.iterations:
+            raise IndexError(f"Subset {item} out of range")
+        return self.get_subset(self.start + item)
+
+    def __iter__(self) -> Iterator[np.array]:
+        """
+        Generate the subsets in order
+
+        :return: iterator of the row indexes of each subset
+        """
+        for i in range(self.iterations):
+            yield self.get_subset(self.start + i)
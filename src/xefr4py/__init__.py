@@ -1,18 +1,44 @@
 import datetime
+import functools
 import logging
 import os.path
-from typing import Any
+import tempfile
+from typing import Any, Iterator
 
 import function
 import numpy as np
 import pandas
 
-from xefr4py.discretizer import get_data_frame_from_formula, discretize_all
-from xefr4py.metrics import Metric
+from xefr4py.discretizer import Discretizer, DEFAULT_STRATEGY, get_codes_matrix
+from xefr4py.discretizer.Cache import get_dataset_key, load_cached_dataset, save_cached_dataset
+from xefr4py.metrics import Metric, MetricCapabilities, MetricCost, get_metric_capabilities
+from xefr4py.Parallel import ParallelAxis, get_n_jobs, get_subsets_seeds, evaluate_subset, evaluate_subset_task, \
+    evaluate_features_block_task, get_features_blocks, shared_dataset_pool, evaluate_batch, evaluate_batch_task, \
+    get_metrics_partitions, evaluate_fused_batch, evaluate_fused_batch_task, SERIAL_THREADS
+from xefr4py.Ranking import RankAccumulator, RANK_CHUNK_SIZE, StabilityMeasure, ranking_stability
+from xefr4py.Subsets import RandomSubsets
 from xefr4py.Utils import get_log_dir
 
 LOG_INTERVAL = datetime.timedelta(seconds=30)
 
+# maximum number of cells of the rows weights matrix of a batch of subsets
+BATCH_SIZE: int = 2 ** 22
+
+# number of subsets of each metric timed by the calibration of the time budgeted ranking
+CALIBRATION_SUBSETS: int = 2
+
+# minimum number of subsets of each metric of the time budgeted ranking, the subsets are made smaller to fit them
+BUDGET_MIN_TRIES: int = 10
+
+# minimum number of rows per subset of the time budgeted ranking
+BUDGET_MIN_ROWS: int = 10
+
+# number of batches of each metric of the time budgeted ranking, the deadline is checked after each batch
+BUDGET_BATCHES: int = 10
+
+# fraction of the available memory the weights of a ranking may use, above it they are kept in a memory mapped file
+WEIGHTS_MEMORY_FRACTION: float = 0.5
+
 LOGS_PATH: str = get_log_dir()
 
 
@@ -28,9 +54,9 @@ def _generate_log_file(data: dict[str, Any], file_name: str) -> None:
     pandas.DataFrame([data]).to_csv(f'{LOGS_PATH}/{file_name}.tsv', index=False, sep='\t')
 
 
-def _get_n_randoms_rows_subsets(n_rows: int, size: int, iterations: int, generate_logs: bool = True) -> list[list[int]]:
+def _get_n_randoms_rows_subsets(n_rows: int, size: int, iterations: int, generate_logs: bool = True) -> RandomSubsets:
     """
-    Get N random row indexes subsets
+    Get N random row indexes subsets, generated on demand from a seed drawn from the numpy random generator
 
     :param n_rows: dataset number of rows
     :param size: dataset partition number of rows
@@ -40,68 +66,423 @@ def _get_n_randoms_rows_subsets(n_rows: int, size: int, iterations: int, generat
     """
     timer = datetime.datetime.now()
 
-    randomRowsN: list[list[int]] = list()
-    for _ in range(iterations):
-        randomRowsN.append(np.random.randint(0, n_rows, size, int).tolist())
+    randomRowsN: RandomSubsets = RandomSubsets(n_rows, size, iterations,
+                                               np.random.randint(0, np.iinfo(np.int64).max, dtype=np.int64))
 
     # Log for Knowledge Viewer App
     if generate_logs:
         _generate_log_file({'Dataset Size': n_rows,
                            'Subset Size': size,
                            'Number of Subsets': iterations,
+                           'Subsets Seed': randomRowsN.seed,
                            'Execution Time': datetime.datetime.now() - timer
                             }, 'get_n_randoms_rows_subsets')
     return randomRowsN
 
 
-def _calculate_weights_sampling(Y: pandas.Series, X: pandas.DataFrame, random_rows: list[list[int]],
-                                function_to_use: function, generate_logs: bool = True) -> pandas.DataFrame:
+def _calculate_weights_sampling(Y: np.array, X: np.array, features_names: np.array, random_rows: list[list[int]],
+                                function_to_use: function, generate_logs: bool = True, n_jobs: int = 1,
+                                parallel_axis: ParallelAxis = ParallelAxis.SUBSETS) -> pandas.DataFrame:
     """
     for each sample calculate feature weights based on functionTouse metrics
 
-    :param Y: dataset class
-    :param X: dataset features
+    :param Y: dataset class codes
+    :param X: dataset features codes matrix
+    :param features_names: dataset features names
     :param random_rows: N subset index rows
     :param function_to_use: statistical function to use as relevancy metric of each feature
     :param generate_logs: generate logs for the Knowledge Viewer App, default value True
+    :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores, default value 1
+    :param parallel_axis: split the work between the processes by subsets or by blocks of features, the features
+                          blocks are only used with metrics that evaluate each feature independently, default value
+                          subsets
     :return: N x M list of weights
     """
-    f_names: list[str] = X.columns.tolist()
-    dataset: pandas.DataFrame = pandas.concat([Y, X], axis=1)
+    return _calculate_metrics_weights_sampling(Y, X, features_names, random_rows, [function_to_use], generate_logs,
+                                               n_jobs, parallel_axis)[0]
+
+
+def _calculate_metrics_weights_sampling(Y: np.array, X: np.array, features_names: np.array,
+                                        random_rows: list[list[int]], functions: list[function],
+                                        generate_logs: bool = True, n_jobs: int = 1,
+                                        parallel_axis: ParallelAxis = ParallelAxis.SUBSETS,
+                                        features_groups: np.array = None) -> list[pandas.DataFrame]:
+    """
+    for each sample calculate feature weights based on several metrics at once, the count based metrics share the
+    contingency tables of each sample
+
+    :param Y: dataset class codes
+    :param X: dataset features codes matrix, with a column per group of identical features if features_groups is given
+    :param features_names: dataset features names
+    :param random_rows: N subset index rows
+    :param functions: statistical functions to use as relevancy metrics of each feature
+    :param generate_logs: generate logs for the Knowledge Viewer App, default value True
+    :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores, default value 1
+    :param parallel_axis: split the work between the processes by subsets or by blocks of features, the features
+                          blocks are only used with metrics that evaluate each feature independently, default value
+                          subsets
+    :param features_groups: group (column of X) of each feature, the features of a group get the weights of its
+                            column. Each feature is a column of X if None
+    :return: N x M weights of each metric
+    """
+    features_names = np.asarray(features_names)
+    # name of each evaluated column, the first feature of its group
+    evaluated_names: np.array = features_names if features_groups is None else \
+        features_names[np.unique(features_groups, return_index=True)[1]]
+    function_name: str = ', '.join([f.__name__.replace('_', ' ') for f in functions])
+
+    # one seed per subset, so the results don't depend on the number of processes
+    seeds: np.array = get_subsets_seeds(len(random_rows))
 
     # calculate the weights
-    weights: list[float] = _apply_along_columns(
-        lambda x: function_to_use(dataset.iloc[x, :]).iloc[:, 0].tolist(), random_rows,
-        function_to_use.__name__.replace('_', ' ')
-    )
+    weights: list[np.array] | np.array
+    n_jobs = get_n_jobs(n_jobs)
+    capabilities: list[MetricCapabilities] = [get_metric_capabilities(f) for f in functions]
+    if n_jobs > 1 and parallel_axis == ParallelAxis.FEATURES and all(c.feature_independent for c in capabilities):
+        # wide datasets: each process evaluates every subset over a block of features, in batches if the metrics
+        # have batch functions
+        tasks: list[tuple[list[function], np.array, list[list[int]], np.array]] = [
+            (functions, block, random_rows, seeds) for block in get_features_blocks(len(evaluated_names), n_jobs)
+        ]
+        with shared_dataset_pool({'class': Y, 'data': X}, n_jobs, {'features_names': evaluated_names}) as executor:
+            blocks: list[np.array] = _apply_along_columns(evaluate_features_block_task, tasks, function_name,
+                                                          executor.map)
+        # stitch the blocks back in the features order
+        weights = np.concatenate(blocks, axis=2)
+    elif all(c.batch_function is not None for c in capabilities):
+        # the subsets are evaluated in batches, each metric is called once per batch
+        batch: int = max(1, BATCH_SIZE // max(1, len(Y)))
+        if n_jobs > 1:
+            batch = min(batch, -(-len(random_rows) // (n_jobs * 4)))
+        batches: list[tuple[list[function], list[list[int]], np.array]] = [
+            (functions, random_rows[start:start + batch], seeds[start:start + batch])
+            for start in range(0, len(random_rows), batch)
+        ]
+        if n_jobs == 1:
+            blocks: list[np.array] = _apply_along_columns(
+                lambda task: evaluate_batch(task[0], Y, X, task[1], task[2], SERIAL_THREADS), batches, function_name)
+        else:
+            with shared_dataset_pool({'class': Y, 'data': X}, n_jobs) as executor:
+                blocks: list[np.array] = _apply_along_columns(evaluate_batch_task, batches, function_name,
+                                                              executor.map)
+        weights = np.concatenate(blocks) if blocks else np.zeros((0, len(functions), len(evaluated_names)))
+    elif n_jobs == 1:
+        weights = _apply_along_columns(
+            lambda i: evaluate_subset(functions, Y, X, evaluated_names, random_rows[i], seeds[i]),
+            range(len(random_rows)), function_name
+        )
+    else:
+        # the subsets are sent as one subset slices, so the workers generate their rows from the seed
+        tasks: list[tuple[list[function], RandomSubsets, int]] = [(functions, random_rows[i:i + 1], seeds[i])
+                                                                  for i in range(len(random_rows))]
+        with shared_dataset_pool({'class': Y, 'data': X}, n_jobs, {'features_names': evaluated_names}) as executor:
+            weights = _apply_along_columns(evaluate_subset_task, tasks, function_name,
+                                           functools.partial(executor.map,
+                                                             chunksize=max(1, len(tasks) // (n_jobs * 4))))
+    weights = np.array(weights).reshape(len(random_rows), len(functions), len(evaluated_names))
+    if features_groups is not None:
+        # copy the weights of each group to its features
+        weights = weights[:, :, features_groups]
+
+    weights_data: list[pandas.DataFrame] = list()
+    for i in range(len(functions)):
+        # generate the weights data frame
+        weights_data.append(pandas.DataFrame(weights[:, i, :], columns=features_names))
 
-    # generate the weights data frame
-    weights_data: pandas.DataFrame = pandas.DataFrame(weights, columns=f_names)
+        # Log for Knowledge Viewer App
+        if generate_logs:
+            weights_data[-1].to_csv(f'{LOGS_PATH}/metric_{functions[i].__name__}.tsv', index=False, sep='\t')
 
-    # Log for Knowledge Viewer App
+    return weights_data
+
+
+def _iter_fused_weights_sampling(Y: np.array, X: np.array, features_names: np.array, random_rows: list[list[int]],
+                                 functions: list[function], n_jobs: int = 1, X_distinct: np.array = None,
+                                 features_groups: np.array = None,
+                                 batch_size: int = None) -> Iterator[tuple[np.array, np.array]]:
+    """
+    for each batch of samples calculate the feature weights of every metric at once, so each sample is taken once for
+    all the metrics instead of once per metric. The batches are yielded in the samples order as soon as they are
+    calculated
+
+    :param Y: dataset class codes
+    :param X: dataset features codes matrix
+    :param features_names: dataset features names
+    :param random_rows: N subset index rows
+    :param functions: statistical functions to use as relevancy metrics of each feature
+    :param n_jobs: number of processes to evaluate the batches, -1 to use all cores, default value 1
+    :param X_distinct: distinct columns of X, used by the metrics that evaluate each feature independently, X if None
+    :param features_groups: column of X_distinct of each feature, None if X_distinct is X
+    :param batch_size: maximum number of subsets of each batch, None to bound the batches by memory only
+    :return: iterator of the batch size x number of metrics x M weights of each batch, and the seconds spent on each
+             metric in the batch, the time of the metrics evaluated together is split equally between them
+    """
+    features_names = np.asarray(features_names)
+    if X_distinct is None or features_groups is None:
+        X_distinct, features_groups = X, None
+    distinct_names: np.array = features_names if features_groups is None else \
+        features_names[np.unique(features_groups, return_index=True)[1]]
+    function_name: str = ', '.join([f.__name__.replace('_', ' ') for f in functions])
+    partitions: list[tuple[list[function], bool, bool]] = get_metrics_partitions(functions)
+
+    # position of each metric in the results, which follow the partitions order
+    ordered: list[function] = [f for partition, _, _ in partitions for f in partition]
+    metrics_idx: list[int] = [ordered.index(f) for f in functions]
+    partitions_idx: list[int] = [next(i for i, (partition, _, _) in enumerate(partitions) if f in partition)
+                                 for f in functions]
+    partitions_sizes: np.array = np.array([len(partition) for partition, _, _ in partitions])
+
+    # one seed per subset, so the results don't depend on the number of processes
+    seeds: np.array = get_subsets_seeds(len(random_rows))
+
+    # the subsets are evaluated in batches, each batch by every metric, the batches bound the memory of the rows
+    # weights and of the features weights
+    n_jobs = get_n_jobs(n_jobs)
+    batch: int = max(1, BATCH_SIZE // max(1, len(Y), len(functions) * len(features_names)))
+    if n_jobs > 1:
+        batch = min(batch, -(-len(random_rows) // (n_jobs * 4)))
+    if batch_size is not None:
+        batch = max(1, min(batch, batch_size))
+    batches: list[tuple[list[tuple[list[function], bool, bool]], list[list[int]], np.array]] = [
+        (partitions, random_rows[start:start + batch], seeds[start:start + batch])
+        for start in range(0, len(random_rows), batch)
+    ]
+    if n_jobs == 1:
+        dataset: dict[str, np.array] = {'class': Y, 'data': X, 'distinct': X_distinct,
+                                         'features_names': features_names, 'distinct_names': distinct_names,
+                                         'features_groups': features_groups}
+        for weights, times in _iter_along_columns(
+                lambda task: evaluate_fused_batch(task[0], dataset, task[1], task[2], SERIAL_THREADS), batches,
+                function_name):
+            yield weights[:, metrics_idx, :], (times / partitions_sizes)[partitions_idx]
+    else:
+        arrays: dict[str, np.array] = {'class': Y, 'data': X}
+        if X_distinct is not X:
+            arrays['distinct'] = X_distinct
+        with shared_dataset_pool(arrays, n_jobs, {'features_names': features_names, 'distinct_names': distinct_names,
+                                                  'features_groups': features_groups}) as executor:
+            for weights, times in _iter_along_columns(evaluate_fused_batch_task, batches, function_name,
+                                                      executor.map):
+                yield weights[:, metrics_idx, :], (times / partitions_sizes)[partitions_idx]
+
+
+def _calculate_fused_weights_sampling(Y: np.array, X: np.array, features_names: np.array,
+                                      random_rows: list[list[int]], functions: list[function],
+                                      generate_logs: bool = True, n_jobs: int = 1, X_distinct: np.array = None,
+                                      features_groups: np.array = None) -> tuple[list[pandas.DataFrame],
+                                                                                 list[datetime.timedelta]]:
+    """
+    for each batch of samples calculate the feature weights of every metric at once, so each sample is taken once for
+    all the metrics instead of once per metric
+
+    :param Y: dataset class codes
+    :param X: dataset features codes matrix
+    :param features_names: dataset features names
+    :param random_rows: N subset index rows
+    :param functions: statistical functions to use as relevancy metrics of each feature
+    :param generate_logs: generate logs for the Knowledge Viewer App, default value True
+    :param n_jobs: number of processes to evaluate the batches, -1 to use all cores, default value 1
+    :param X_distinct: distinct columns of X, used by the metrics that evaluate each feature independently, X if None
+    :param features_groups: column of X_distinct of each feature, None if X_distinct is X
+    :return: N x M weights of each metric and the time spent on each metric, split equally between the metrics
+             evaluated together
+    """
+    blocks: list[np.array] = list()
+    seconds: np.array = np.zeros(len(functions))
+    for weights, times in _iter_fused_weights_sampling(Y, X, features_names, random_rows, functions, n_jobs,
+                                                       X_distinct, features_groups):
+        blocks.append(weights)
+        seconds += times
+    all_weights: np.array = np.concatenate(blocks) if blocks else np.zeros((0, len(functions), len(features_names)))
+
+    weights_data: list[pandas.DataFrame] = list()
+    for i, f in enumerate(functions):
+        # generate the weights data frame
+        weights_data.append(pandas.DataFrame(all_weights[:, i, :], columns=features_names))
+
+        # Log for Knowledge Viewer App
+        if generate_logs:
+            weights_data[-1].to_csv(f'{LOGS_PATH}/metric_{f.__name__}.tsv', index=False, sep='\t')
+
+    return weights_data, [datetime.timedelta(seconds=float(t)) for t in seconds]
+
+
+def _calculate_mapped_weights_sampling(Y: np.array, X: np.array, features_names: np.array,
+                                       random_rows: list[list[int]], functions: list[function], weights_path: str,
+                                       generate_logs: bool = True, n_jobs: int = 1, X_distinct: np.array = None,
+                                       features_groups: np.array = None) -> tuple[np.array, list[datetime.timedelta]]:
+    """
+    for each batch of samples calculate the feature weights of every metric at once and write them, as they are
+    calculated, to a float32 memory mapped .npy file, so the weights of every sample are kept without holding them in
+    memory
+
+    :param Y: dataset class codes
+    :param X: dataset features codes matrix
+    :param features_names: dataset features names
+    :param random_rows: N subset index rows
+    :param functions: statistical functions to use as relevancy metrics of each feature
+    :param weights_path: path of the .npy file of the weights
+    :param generate_logs: generate logs for the Knowledge Viewer App, default value True
+    :param n_jobs: number of processes to evaluate the batches, -1 to use all cores, default value 1
+    :param X_distinct: distinct columns of X, used by the metrics that evaluate each feature independently, X if None
+    :param features_groups: column of X_distinct of each feature, None if X_distinct is X
+    :return: number of metrics x N x M memory mapped weights and the time spent on each metric, split equally between
+             the metrics evaluated together
+    """
+    weights: np.array = np.lib.format.open_memmap(weights_path, mode='w+', dtype=np.float32,
+                                                  shape=(len(functions), len(random_rows), len(features_names)))
     if generate_logs:
-        weights_data.to_csv(f'{LOGS_PATH}/metric_{function_to_use.__name__}.tsv', index=False, sep='\t')
+        for f in functions:
+            pandas.DataFrame(columns=features_names).to_csv(f'{LOGS_PATH}/metric_{f.__name__}.tsv', index=False,
+                                                            sep='\t')
+
+    start: int = 0
+    seconds: np.array = np.zeros(len(functions))
+    for batch_weights, times in _iter_fused_weights_sampling(Y, X, features_names, random_rows, functions, n_jobs,
+                                                             X_distinct, features_groups):
+        weights[:, start:start + len(batch_weights), :] = batch_weights.transpose(1, 0, 2)
+        start += len(batch_weights)
+        seconds += times
 
-    return weights_data
+        # Log for Knowledge Viewer App
+        if generate_logs:
+            for i, f in enumerate(functions):
+                pandas.DataFrame(batch_weights[:, i, :]).to_csv(f'{LOGS_PATH}/metric_{f.__name__}.tsv', mode='a',
+                                                                header=False, index=False, sep='\t')
+    weights.flush()
+    return weights, [datetime.timedelta(seconds=float(t)) for t in seconds]
 
 
-def _apply_along_columns(function_to_use: function, array: list[list[int]], function_name: str) -> list[float]:
+def _estimate_weights_memory(n_metrics: int, n_tries: int, n_features: int) -> int:
+    """
+    Estimate the memory used by the weights of a ranking kept in memory, the float64 weights of every metric, their
+    concatenation and the weights of the batches
+
+    :param n_metrics: number of metrics
+    :param n_tries: number of subsets
+    :param n_features: number of features
+    :return: number of bytes
+    """
+    return 3 * np.dtype(np.float64).itemsize * n_metrics * n_tries * n_features
+
+
+def _get_available_memory() -> int:
+    """
+    Get the physical memory available to new allocations, the free memory plus the reclaimable page cache
+    (MemAvailable of /proc/meminfo)
+
+    :return: number of bytes, None if unknown
+    """
+    try:
+        with open('/proc/meminfo') as file:
+            for line in file:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _is_weights_mapped(weights_memory: int, memory_limit: int, weights_path: str) -> bool:
+    """
+    Decide if the weights of a ranking are kept in a memory mapped file
+
+    :param weights_memory: estimated number of bytes of the weights in memory
+    :param memory_limit: bytes the weights may use in memory, None for WEIGHTS_MEMORY_FRACTION of the available
+                         memory
+    :param weights_path: file of the weights, None if not required
+    :return: True if a weights file is required or the weights exceed the memory limit
+    """
+    if weights_path is not None:
+        return True
+    if memory_limit is None and _get_available_memory() is not None:
+        memory_limit = int(_get_available_memory() * WEIGHTS_MEMORY_FRACTION)
+    return memory_limit is not None and weights_memory > memory_limit
+
+
+def _check_ranking_options(parallel_axis: ParallelAxis, cascade_fraction: float, streaming: bool,
+                           convergence_threshold: float, time_budget: float, memory_limit: int,
+                           weights_path: str) -> None:
+    """
+    Check that the options of the ensemble features ranking can be combined, raise a ValueError if not
+
+    :param parallel_axis: split the work between the processes by subsets or by blocks of features
+    :param cascade_fraction: fraction of the features of the cascade, None without the cascade
+    :param streaming: True for the streaming ranking
+    :param convergence_threshold: threshold of the adaptive mode, None without the adaptive mode
+    :param time_budget: seconds to rank the features, None without the time budget
+    :param memory_limit: bytes the weights may use in memory, None for the default limit
+    :param weights_path: file of the weights, None if not required
+    """
+    if time_budget is not None and (parallel_axis != ParallelAxis.SUBSETS or cascade_fraction is not None or streaming
+                                    or convergence_threshold is not None):
+        raise ValueError("The time budgeted ranking only splits the work by subsets, it doesn't support the "
+                         "cascade, the streaming or the convergence")
+    if (streaming or convergence_threshold is not None) and cascade_fraction is not None:
+        raise ValueError("The streaming ranking doesn't support the cascade")
+    # only the fused weights of the subsets axis are written to a memory mapped file
+    if (memory_limit is not None or weights_path is not None) and (
+            parallel_axis != ParallelAxis.SUBSETS or cascade_fraction is not None or streaming
+            or convergence_threshold is not None or time_budget is not None):
+        raise ValueError("The memory limit and the weights file are only supported by the subsets axis ranking, "
+                         "without the cascade, the streaming, the convergence or the time budget")
+
+
+def _plan_time_budget(seconds_per_subset: np.array, share: float, n_jobs: int, n_rows: int,
+                      n_tries: int) -> list[tuple[int, int]]:
+    """
+    Choose the number of rows and of subsets of each metric to fit its share of the time budget, the metrics that
+    can't evaluate BUDGET_MIN_TRIES subsets in their share use smaller subsets
+
+    :param seconds_per_subset: calibrated seconds of a subset of n_rows rows of each metric
+    :param share: seconds of each metric
+    :param n_jobs: number of processes to evaluate the subsets
+    :param n_rows: maximum number of rows per subset
+    :param n_tries: maximum number of subsets of each metric
+    :return: number of rows and number of subsets of each metric
+    """
+    plan: list[tuple[int, int]] = list()
+    for seconds in seconds_per_subset:
+        affordable: float = share * n_jobs / seconds
+        size: int = n_rows
+        if affordable < BUDGET_MIN_TRIES:
+            size = max(min(n_rows, BUDGET_MIN_ROWS), int(n_rows * affordable / BUDGET_MIN_TRIES))
+            affordable *= n_rows / size
+        plan.append((size, int(min(n_tries, affordable))))
+    return plan
+
+
+def _apply_along_columns(function_to_use: function, array: list, function_name: str,
+                         mapper: function = map) -> list:
     """
     Apply a function to each column of a dataset
 
     :param function_to_use: function to apply
     :param array: random rows indexes
     :param function_name: function name to show in the log
+    :param mapper: map function used to apply the function, like the map of a process pool, default value map
     :return: list of results of the function applied to each column
     """
+    return list(_iter_along_columns(function_to_use, array, function_name, mapper))
+
+
+def _iter_along_columns(function_to_use: function, array: list, function_name: str,
+                        mapper: function = map) -> Iterator:
+    """
+    Apply a function to each column of a dataset, yielding each result as soon as it is calculated
+
+    :param function_to_use: function to apply
+    :param array: random rows indexes
+    :param function_name: function name to show in the log
+    :param mapper: map function used to apply the function, like the map of a process pool, default value map
+    :return: iterator of the results of the function applied to each column
+    """
     # calculate the time to log
     next_log: datetime = datetime.datetime.now() + LOG_INTERVAL
 
-    ret: list[float] = list()
-
     # apply the function to each column
-    for i in range(len(array)):
-        ret.append(function_to_use(array[i]))
+    for i, result in enumerate(mapper(function_to_use, array)):
+        yield result
 
         # verify if it is time to log
         now = datetime.datetime.now()
@@ -110,8 +491,6 @@ def _apply_along_columns(function_to_use: function, array: list[list[int]], func
             next_log = now + LOG_INTERVAL
             logging.info(f"{function_name}: Calculating... {round(i / len(array) * 100, 2)}%")
 
-    return ret
-
 
 def _cutoff_by_contrib(attrs: pandas.DataFrame, contrib: float = 1) -> list[str]:
     """
@@ -138,40 +517,94 @@ def _cutoff_by_contrib(attrs: pandas.DataFrame, contrib: float = 1) -> list[str]
     return list(attrs.index[contributors])
 
 
-def _calculate_rank_sampling(weights: pandas.DataFrame, features_names: list[str], weight_per_group: list[float],
-                             cut_off: float = -1, generate_logs: bool = True) -> list[str]:
+def _get_constant_features(X: np.array) -> np.array:
+    """
+    Get the features with the same code in every instance (constant or discretized into a single bin), they have no
+    information about the class
+
+    :param X: features codes matrix
+    :return: mask of the constant features
+    """
+    if X.shape[0] == 0:
+        return np.ones(X.shape[1], dtype=bool)
+    return np.all(X == X[0], axis=0)
+
+
+def _get_features_groups(X: np.array) -> tuple[np.array, np.array]:
+    """
+    Group the identical features (the same codes in every instance)
+
+    :param X: features codes matrix
+    :return: first feature of each group, by order of the features, and group of each feature
+    """
+    columns: np.array = np.ascontiguousarray(X.T)
+    # a single value per column, so the columns are compared at once
+    rows: np.array = columns.view(np.dtype((np.void, columns.dtype.itemsize * max(1, columns.shape[1])))).ravel() \
+        if columns.shape[1] > 0 else np.zeros(columns.shape[0], dtype=np.int8)
+    _, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+
+    # number the groups by their first feature
+    order: np.array = np.argsort(first)
+    groups: np.array = np.empty(order.size, dtype=np.int64)
+    groups[order] = np.arange(order.size)
+    return first[order], groups[inverse.ravel()]
+
+
+def _calculate_rank_sampling(weights: pandas.DataFrame | np.ndarray, features_names: list[str],
+                             weight_per_group: list[float], cut_off: float = -1, generate_logs: bool = True,
+                             pruned_features: list[str] = None) -> list[str]:
     """
     Calculate the rank of features based on the weights of each feature
 
-    :param weights: weights of each feature
+    :param weights: weights of each feature, a data frame or an array whose last axis are the features, like the
+                    memory mapped weights, which is read in chunks
     :param features_names: features names to be ranked
     :param weight_per_group: weight per group of each rank
     :param cut_off: 0 (all features), k (k most ranked features), -1 (automatic k calculation)
     :param generate_logs: generate logs for the Knowledge Viewer App, default value True
+    :param pruned_features: features left out of the sampling, ranked last with zero weight
     :return: rank subset of features ordered by its relevance
     """
     # calculate the time to log
     next_log = datetime.datetime.now() + LOG_INTERVAL
 
-    # create the rank data frame
-    weight_col = "Weight"
-    rank: pandas.DataFrame = pandas.DataFrame(index=features_names, columns=[weight_col])
-    rank[weight_col] = 0.0
-
-    # calculate the rank
-    for i in range(len(weights)):
-        aux_t: pandas.DataFrame = pandas.DataFrame(weights.iloc[i, :]).T
-        aux_t = aux_t.sample(frac=1)
-        aux: list[str] = aux_t.iloc[0, :].sort_values(ascending=False).index.tolist()
-        for j in range(len(aux)):
-            rank.loc[aux[j], weight_col] += weight_per_group[j]
+    # calculate the rank in chunks of rows, missing weights are ranked last
+    values: np.array = weights.to_numpy(dtype=np.float64) if isinstance(weights, pandas.DataFrame) else \
+        weights.reshape(-1, len(features_names))
+    accumulator: RankAccumulator = RankAccumulator(features_names, weight_per_group)
+    chunk: int = max(1, RANK_CHUNK_SIZE // max(1, values.shape[1]))
+    for start in range(0, values.shape[0], chunk):
+        accumulator.add(values[start:start + chunk])
 
         # verify if it is time to log
         now = datetime.datetime.now()
         if next_log < now:
             # calculate the next time to log and log
             next_log += LOG_INTERVAL
-            logging.info(f"{i / len(weights) * 100}% Calculating rank...")
+            logging.info(f"{start / len(values) * 100}% Calculating rank...")
+
+    return _select_ranked_features(accumulator.get_rank_weights(), features_names, cut_off, generate_logs,
+                                   pruned_features)
+
+
+def _select_ranked_features(rank_weights: np.array, features_names: list[str], cut_off: float = -1,
+                            generate_logs: bool = True, pruned_features: list[str] = None) -> list[str]:
+    """
+    Select the features of the rank by their rank weights
+
+    :param rank_weights: rank weight of each feature
+    :param features_names: features names
+    :param cut_off: 0 (all features), k (k most ranked features), -1 (automatic k calculation)
+    :param generate_logs: generate logs for the Knowledge Viewer App, default value True
+    :param pruned_features: features left out of the sampling, ranked last with zero weight
+    :return: rank subset of features ordered by its relevance
+    """
+    # create the rank data frame
+    weight_col = "Weight"
+    rank: pandas.DataFrame = pandas.DataFrame({weight_col: rank_weights}, index=features_names)
+    if pruned_features:
+        rank = pandas.concat([rank, pandas.DataFrame({weight_col: np.zeros(len(pruned_features))},
+                                                     index=pruned_features)])
 
     ret: list[str]
     if cut_off == -1:
@@ -183,7 +616,7 @@ def _calculate_rank_sampling(weights: pandas.DataFrame, features_names: list[str
         logging.info("Calculating k best columns...")
         if cut_off > rank.shape[0] or cut_off < 1:
             cut_off = rank.shape[0]
-        ret = rank[weight_col].sort_values(ascending=False).index.tolist()[:cut_off]
+        ret = rank[weight_col].sort_values(ascending=False, kind='stable').index.tolist()[:cut_off]
 
     # prepare the rank data frame to log
     rank_data: pandas.DataFrame = rank.T[ret]
@@ -200,19 +633,34 @@ class EEFR:
     Enhanced Ensemble Features Ranking class that builds the object to calculate the features ranking with
     method ensemble_features_ranking
     """
-    __Y: pandas.Series
-    __X: pandas.DataFrame
+    __Y: np.array
+    __X: np.array
+    __features_names: np.array
+    __pruned_features: np.array
+    __X_distinct: np.array
+    __features_groups: np.array
+    __features_statistics: pandas.DataFrame = None
+    __discretizer: Discretizer
 
     __generate_logs: bool
 
     def __init__(self, dataset: pandas.DataFrame, class_column: str = None, blacklist_columns: list[str] = None,
-                 generate_logs: bool = True):
+                 generate_logs: bool = True, n_jobs: int = 1, discretizer: Discretizer = None, cache_dir: str = None,
+                 discretization_strategy: str = DEFAULT_STRATEGY):
         """
         Takes a dataset to process
 
         :param dataset: dataset to process
         :param class_column: class column name
         :param blacklist_columns: list of columns to ignore
+        :param n_jobs: number of processes to discretize the features, -1 to use all cores, default value 1
+        :param discretizer: discretization model fitted on data of the same source, a new model is fitted to the
+        dataset if None
+        :param cache_dir: directory to cache the discretized dataset, a dataset with the same content, class column and
+        blacklist is loaded (memory mapped) from it instead of being discretized again. Not used with a fitted
+        discretizer
+        :param discretization_strategy: name of the discretization strategy of the features when a new model is
+        fitted, 'mdl' (default), 'equal_frequency', 'equal_width' or 'chi_merge'
         """
         # timer for Knowledge Viewer App logs
         constructor_timer = datetime.datetime.now()
@@ -229,8 +677,8 @@ class EEFR:
             blacklist_columns = []
         blacklist_columns.append(class_column)
 
-        self.__Y = dataset[class_column]
-        self.__X = dataset.drop(columns=blacklist_columns)
+        Y: pandas.Series = dataset[class_column]
+        X: pandas.DataFrame = dataset.drop(columns=blacklist_columns)
         self.__generate_logs = generate_logs
 
         if os.path.exists(LOGS_PATH):
@@ -243,22 +691,58 @@ class EEFR:
         # timer for the Knowledge Viewer App log
         discretizer_timer = datetime.datetime.now()
 
-        # prepare the dataset for the discretization and discretize it
-        new_data = pandas.concat([self.__Y, self.__X], axis=1)
-        new_data = get_data_frame_from_formula(new_data)
-        new_data = discretize_all(new_data)
+        if discretizer is None:
+            discretizer = Discretizer(strategy=discretization_strategy)
+        cache_key: str = None
+        cached: tuple = None
+        if cache_dir is not None and not discretizer.is_fitted():
+            cache_key = get_dataset_key(dataset, class_column, blacklist_columns[:-1], discretizer)
+            cached = load_cached_dataset(cache_dir, cache_key)
+
+        if cached is not None:
+            self.__Y, self.__X, self.__features_names, self.__pruned_features, self.__discretizer = cached
+            logging.info("Discretized dataset loaded from the cache")
+        else:
+            # discretize the dataset, with the given model if it's already fitted
+            new_data = pandas.concat([Y, X], axis=1)
+            if not discretizer.is_fitted():
+                discretizer.fit(new_data, n_jobs)
+            self.__discretizer = discretizer
+            new_data = discretizer.transform(new_data)
+
+            # keep the discretized data as a compact codes matrix
+            self.__Y, self.__X, self.__features_names = get_codes_matrix(new_data)
+
+            # the constant features are left out of the sampling
+            constant: np.array = _get_constant_features(self.__X)
+            self.__pruned_features = self.__features_names[constant]
+            if constant.any():
+                self.__X = np.ascontiguousarray(self.__X[:, ~constant])
+                self.__features_names = self.__features_names[~constant]
+
+            if cache_key is not None:
+                save_cached_dataset(cache_dir, cache_key, self.__Y, self.__X, self.__features_names,
+                                    self.__pruned_features, discretizer)
 
         # pause the timer for the Knowledge Viewer App log
         discretizer_timer = datetime.datetime.now() - discretizer_timer
 
         logging.info("Discretization done")
-
-        # update the dataset with the discretized data
-        self.__Y = new_data.iloc[:, 0]
-        self.__X = new_data.iloc[:, 1:]
+        if len(self.__pruned_features) > 0:
+            logging.info(f"{len(self.__pruned_features)} constant features pruned")
+
+        # the count based metrics evaluate each group of identical features once
+        distinct, self.__features_groups = _get_features_groups(self.__X)
+        n_duplicated: int = self.__X.shape[1] - len(distinct)
+        if n_duplicated > 0:
+            self.__X_distinct = np.ascontiguousarray(self.__X[:, distinct])
+            logging.info(f"{n_duplicated} duplicated features")
+        else:
+            self.__X_distinct = self.__X
+            self.__features_groups = None
 
         # calculate the class distribution and log it
-        unique, counts = np.unique(self.__Y.to_numpy(), return_counts=True)
+        unique, counts = np.unique(self.__Y, return_counts=True)
 
         if self.__generate_logs:
             _generate_log_file({'Classes': unique,
@@ -270,12 +754,22 @@ class EEFR:
             _generate_log_file({'Class Column': class_column,
                                'Blacklist Columns': blacklist_columns[:-1],
                                'Total Instances': self.__X.shape[0],
-                               'Total Features': self.__X.shape[1],
+                               'Total Features': self.get_total_features(),
+                               'Pruned Features': len(self.__pruned_features),
+                               'Duplicated Features': n_duplicated,
+                               'Discretization Strategy': self.__discretizer.get_settings()['strategy'],
+                               'Discretization Time': discretizer_timer,
                                'Execution Time': datetime.datetime.now() - constructor_timer
                                 }, 'constructor')
 
     def ensemble_features_ranking(self, n_rows: int = None, n_tries: int = 10, cut_off: int = -1,
-                                  metrics: list[Metric] = None) -> list[str]:
+                                  metrics: list[Metric] = None, n_jobs: int = 1,
+                                  parallel_axis: ParallelAxis = ParallelAxis.SUBSETS,
+                                  cascade_fraction: float = None, streaming: bool = False,
+                                  convergence_threshold: float = None, convergence_top_k: int = 10,
+                                  convergence_measure: StabilityMeasure = StabilityMeasure.JACCARD,
+                                  convergence_batch: int = 10, time_budget: float = None, memory_limit: int = None,
+                                  weights_path: str = None) -> list[str]:
         """
         Outputs a features name list inversely ordered by relevance
 
@@ -283,11 +777,155 @@ class EEFR:
         :param n_tries: number of subsets, default value dataset rows/2
         :param cut_off: 0 (all features), k (k most ranked features), -1 (automatic k calculation), default value -1
         :param metrics: list of metrics to use, default value (gain_ratio, symmetrical_uncertainty, chi_squared, random_forest_importance)
+        :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores, default value 1
+        :param parallel_axis: split the work between the processes by subsets or, for wide datasets with few rows, by
+                              blocks of features, default value subsets
+        :param cascade_fraction: fraction of the features, ranked by the cheap metrics, on which the other
+                                 metrics are calculated, the remaining features are ranked last by those metrics,
+                                 None to calculate every metric on every feature, default value None
+        :param streaming: fold the weights of each batch of subsets into the rank as soon as they are calculated,
+                          the memory grows with the features and not with the subsets, and keep the online
+                          statistics of each feature (see get_features_statistics). The work is always split by
+                          subsets and the cascade isn't supported, default value False
+        :param convergence_threshold: adaptive mode, the subsets are evaluated in batches and the ranking stops once
+                                      the agreement between the top features of two consecutive batches reaches this
+                                      threshold, n_tries is then the maximum number of subsets. It implies the
+                                      streaming ranking, None to always evaluate n_tries subsets, default value None
+        :param convergence_top_k: number of top features compared by the adaptive mode, default value 10
+        :param convergence_measure: agreement measure of the adaptive mode, default value Jaccard
+        :param convergence_batch: number of subsets of each batch of the adaptive mode, default value 10
+        :param time_budget: seconds to rank the features, a calibration times a few subsets of each metric and
+                            chooses the number of rows and of subsets of each metric to fit the budget, n_rows and
+                            n_tries are then the maximum values. The best ranking when the time is over is returned,
+                            None to evaluate n_tries subsets, default value None. The work is split by subsets and
+                            the cascade, the streaming, the convergence, the memory limit and the weights file aren't
+                            supported
+        :param memory_limit: bytes the weights of every subset may use in memory, the runs estimated to need more
+                             write the weights to a float32 memory mapped file as they are calculated and rank them in
+                             chunks. None for WEIGHTS_MEMORY_FRACTION of the available memory, default value None.
+                             Only supported by the subsets axis, without the cascade, the streaming, the convergence
+                             or the time budget
+        :param weights_path: .npy file where the weights of every subset (metrics x n_tries x features) are kept,
+                             forces the memory mapped weights. None to use the logs directory, or a temporary file
+                             without logs, when the memory limit is exceeded, default value None. Only supported by
+                             the subsets axis, without the cascade, the streaming, the convergence or the time budget
         :return: list of features names, inverse ordered by its weights
         """
         # timer for Knowledge Viewer App log
         eefr_timer = datetime.datetime.now()
 
+        _check_ranking_options(parallel_axis, cascade_fraction, streaming, convergence_threshold, time_budget,
+                               memory_limit, weights_path)
+
+        if time_budget is not None:
+            return self.__budgeted_ranking(n_rows, n_tries, cut_off, metrics, n_jobs, time_budget, eefr_timer)
+
+        metrics, random_rows_n, weight_per_group = self.__get_sampling(n_rows, n_tries, metrics)
+
+        logging.info("Starting Weights calculation...")
+
+        if streaming or convergence_threshold is not None:
+            convergence: dict[str, Any] = None
+            if convergence_threshold is not None:
+                convergence = {'Convergence Measure': convergence_measure.value,
+                               'Convergence Threshold': convergence_threshold, 'Stability': None, 'Converged': False}
+            return self.__streaming_ranking(random_rows_n, cut_off, metrics, n_jobs, weight_per_group, eefr_timer,
+                                            convergence, convergence_top_k, convergence_measure, convergence_batch)
+
+        # timer for Knowledge Viewer App log
+        metrics_timer = datetime.datetime.now()
+
+        groups, cheap_groups, cascade = self.__get_metrics_groups(metrics, cascade_fraction)
+
+        # without the cascade, every metric is evaluated on each batch of subsets while it is taken
+        fused: bool = not cascade and parallel_axis == ParallelAxis.SUBSETS and self.__X.shape[1] > 0
+
+        # the runs whose weights don't fit in memory keep them in a memory mapped file
+        weights_memory: int = _estimate_weights_memory(len(metrics), n_tries, self.__X.shape[1])
+        if fused and _is_weights_mapped(weights_memory, memory_limit, weights_path):
+            return self.__mapped_ranking(random_rows_n, cut_off, metrics, n_jobs, weight_per_group, weights_memory,
+                                         weights_path, metrics_timer, eefr_timer)
+
+        if fused:
+            weights: dict[Metric, pandas.DataFrame] = self.__fused_weights(random_rows_n, metrics, n_jobs)
+        else:
+            if _is_weights_mapped(weights_memory, None, None):
+                logging.warning(f"The weights need about {weights_memory / 2 ** 20:.1f} MiB, more than the memory "
+                                f"limit, only the subsets axis ranking without the cascade keeps them in a file")
+            weights: dict[Metric, pandas.DataFrame] = self.__groups_weights(
+                random_rows_n, groups, cheap_groups, cascade, cascade_fraction, weight_per_group, n_jobs,
+                parallel_axis)
+        self.__log_weights_sampling(metrics, metrics_timer)
+
+        logging.info("Concatenating the weights...")
+
+        # concatenate the weights into a data frame
+        weights_list: pandas.DataFrame = pandas.concat([weights[method] for method in metrics], ignore_index=True)
+
+        logging.info("Starting rank calculation...")
+
+        # timer for Knowledge Viewer App log
+        rank_timer = datetime.datetime.now()
+
+        ret: list[str] = _calculate_rank_sampling(weights_list, self.__features_names.tolist(), weight_per_group,
+                                                  cut_off, self.__generate_logs, self.__pruned_features.tolist())
+        self.__log_ranking(ret, rank_timer, eefr_timer, {'Subsets Used': n_tries,
+                                                         'Estimated Weights Memory': weights_memory,
+                                                         'Weights File': None})
+        return ret
+
+    def iter_ranking(self, n_rows: int = None, n_tries: int = 10, metrics: list[Metric] = None,
+                     n_jobs: int = 1) -> Iterator[list[str]]:
+        """
+        Streaming ensemble features ranking, the weights of each batch of subsets are folded into the rank as soon as
+        they are calculated and the ranking so far is yielded after each batch. The online statistics of the features
+        are updated after each batch (see get_features_statistics)
+
+        :param n_rows: number of rows per subset, default value dataset rows/2
+        :param n_tries: number of subsets, default value 10
+        :param metrics: list of metrics to use, default value (gain_ratio, symmetrical_uncertainty, chi_squared,
+                        random_forest_importance)
+        :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores, default value 1
+        :return: iterator of the features names ordered by their rank so far, the pruned features last
+        """
+        metrics, random_rows_n, weight_per_group = self.__get_sampling(n_rows, n_tries, metrics)
+        accumulator: RankAccumulator = RankAccumulator(self.__features_names.tolist(), weight_per_group,
+                                                       statistics=True)
+        for _ in self.__iter_accumulator(accumulator, random_rows_n, metrics, n_jobs):
+            yield accumulator.get_ranking() + self.__pruned_features.tolist()
+
+    def get_features_statistics(self) -> pandas.DataFrame:
+        """
+        Get the online statistics of the features of the last streaming ranking
+
+        :return: data frame indexed by feature with the rank weight and the mean and variance of the weight and of
+                 the rank position of each feature, None before a streaming ranking
+        """
+        return self.__features_statistics
+
+    def __get_sampling(self, n_rows: int, n_tries: int,
+                       metrics: list[Metric]) -> tuple[list[Metric], RandomSubsets, list[int]]:
+        """
+        Process the sampling parameters to use the default values and draw the subsets
+
+        :param n_rows: number of rows per subset, None for dataset rows/2
+        :param n_tries: number of subsets
+        :param metrics: list of metrics to use, None for the default metrics
+        :return: metrics, N subset index rows and weight per group of each rank
+        """
+        metrics, n_rows, weight_per_group = self.__get_defaults(n_rows, metrics)
+        random_rows_n: RandomSubsets = _get_n_randoms_rows_subsets(self.get_total_instances(), n_rows, n_tries,
+                                                                     self.__generate_logs)
+        return metrics, random_rows_n, weight_per_group
+
+    def __get_defaults(self, n_rows: int, metrics: list[Metric]) -> tuple[list[Metric], int, list[int]]:
+        """
+        Process the sampling parameters to use the default values
+
+        :param n_rows: number of rows per subset, None for dataset rows/2
+        :param metrics: list of metrics to use, None for the default metrics
+        :return: metrics, number of rows per subset and weight per group of each rank
+        """
         # process the parameters to use the default values
         if metrics is None:
             metrics = [Metric.GAIN_RATIO, Metric.SYMMETRICAL_UNCERTAINTY, Metric.CHI_SQUARED,
@@ -295,8 +933,6 @@ class EEFR:
         if n_rows is None:
             n_rows = int(self.get_total_instances() / 2)
 
-        random_rows_n: list[list[int]] = _get_n_randoms_rows_subsets(self.get_total_instances(), n_rows, n_tries,
-                                                                     self.__generate_logs)
         n: int = self.get_total_features()
 
         logging.info(f"The Dataset as {self.get_total_instances()} lines and {n} columns")
@@ -304,56 +940,530 @@ class EEFR:
         # calculate the weight per group
         weight_per_group: [int] = range(n, 0, -1)
         weight_per_group = [int(w * (w ** 0.5) / (n ** 0.5)) for w in weight_per_group]
+        return metrics, n_rows, weight_per_group
+
+    def __budgeted_rank_weights(self, n_rows: int, n_tries: int, metrics: list[Metric], n_jobs: int,
+                                time_budget: float, weight_per_group: list[int]) -> tuple[np.array, list[int]]:
+        """
+        Rank the features within a time budget. A few subsets of each metric are timed, the cost of a subset is
+        taken as proportional to its number of rows and the remaining time is shared by the metrics, the metrics
+        that can't evaluate BUDGET_MIN_TRIES subsets in their share use smaller subsets. The metrics are then
+        evaluated one at a time until their deadline, the time they don't use is left to the next ones
+
+        :param n_rows: maximum number of rows per subset
+        :param n_tries: maximum number of subsets of each metric
+        :param metrics: list of metrics to use
+        :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores
+        :param time_budget: seconds to rank the features
+        :param weight_per_group: weight per group of each rank
+        :return: rank weight of each feature and number of subsets evaluated by each metric
+        """
+        deadline: datetime.datetime = datetime.datetime.now() + datetime.timedelta(seconds=time_budget)
+        n_instances: int = self.get_total_instances()
+        accumulators: list[RankAccumulator] = [RankAccumulator(self.__features_names.tolist(), weight_per_group)
+                                               for _ in metrics]
+        if self.__X.shape[1] == 0:
+            return np.zeros(0), [0] * len(metrics)
+
+        # calibration, a few subsets of each metric in this process, their weights are kept
+        calibration_timer = datetime.datetime.now()
+        n_calibration: int = max(1, min(CALIBRATION_SUBSETS, n_tries))
+        seconds_per_subset: np.array = self.__calibrate_metrics(n_rows, n_calibration, metrics, accumulators)
+        calibration_time: datetime.timedelta = datetime.datetime.now() - calibration_timer
+
+        # choose the number of rows and of subsets of each metric to fit its share of the remaining time
+        n_jobs = get_n_jobs(n_jobs)
+        share: float = max(0.0, (deadline - datetime.datetime.now()).total_seconds()) / len(metrics)
+        plan: list[tuple[int, int]] = _plan_time_budget(seconds_per_subset, share, n_jobs, n_rows,
+                                                        n_tries - n_calibration)
+        predicted: list[datetime.timedelta] = [
+            datetime.timedelta(seconds=tries * seconds * size / n_rows / n_jobs)
+            for (size, tries), seconds in zip(plan, seconds_per_subset)]
+        logging.info("Time budget plan: " + ', '.join(f"{method.__name__.replace('_', ' ')} {tries} subsets of {size} "
+                                                      f"rows" for method, (size, tries) in zip(metrics, plan)))
+
+        for i, (method, (size, tries)) in enumerate(zip(metrics, plan)):
+            method_timer = datetime.datetime.now()
+            method_deadline: datetime.datetime = method_timer + (deadline - method_timer) / (len(metrics) - i)
+            logging.info(f"Calculating weights for metric: {method.__name__.replace('_', ' ')} "
+                         f"({i + 1}/{len(metrics)})")
+            if tries > 0 and method_deadline > method_timer:
+                for weights, _ in _iter_fused_weights_sampling(
+                        self.__Y, self.__X, self.__features_names,
+                        _get_n_randoms_rows_subsets(n_instances, size, tries, False), [method], n_jobs,
+                        self.__X_distinct, self.__features_groups, max(1, -(-tries // BUDGET_BATCHES))):
+                    accumulators[i].add(weights[:, 0, :])
+                    if datetime.datetime.now() >= method_deadline:
+                        break
+
+            # Log for Knowledge Viewer App
+            if self.__generate_logs:
+                _generate_log_file({'Execution Time': datetime.datetime.now() - method_timer,
+                                    'Subset Size': size,
+                                    'Planned Subsets': n_calibration + tries,
+                                    'Subsets Used': accumulators[i].get_n_rows(),
+                                    'Predicted Time': predicted[i]}, method.__name__)
+
+        # Log for Knowledge Viewer App
+        if self.__generate_logs:
+            _generate_log_file({'Dataset Rows': n_instances,
+                               'Features': self.__X.shape[1],
+                               'Time Budget': datetime.timedelta(seconds=time_budget),
+                               'Calibration Subsets': n_calibration,
+                               'Calibration Time': calibration_time,
+                               'Predicted Time': calibration_time + sum(predicted, datetime.timedelta(0)),
+                               'Execution Time': datetime.datetime.now() - calibration_timer}, 'time_budget')
+            _generate_log_file({'Metrics': [method.__name__.replace('_', ' ') for method in metrics],
+                               'Execution Time': datetime.datetime.now() - calibration_timer},
+                              'calculate_weights_sampling')
+
+        # each metric has the same vote, whatever the number of subsets it evaluated
+        rank_weights: np.array = np.zeros(self.__X.shape[1])
+        for accumulator in accumulators:
+            rank_weights += accumulator.get_rank_weights() / max(1, accumulator.get_n_rows())
+        return rank_weights, [accumulator.get_n_rows() for accumulator in accumulators]
 
+    def __budgeted_ranking(self, n_rows: int, n_tries: int, cut_off: int, metrics: list[Metric], n_jobs: int,
+                           time_budget: float, eefr_timer: datetime.datetime) -> list[str]:
+        """
+        Rank the features within a time budget
+
+        :param n_rows: maximum number of rows per subset, None for dataset rows/2
+        :param n_tries: maximum number of subsets of each metric
+        :param cut_off: 0 (all features), k (k most ranked features), -1 (automatic k calculation)
+        :param metrics: list of metrics to use, None for the default metrics
+        :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores
+        :param time_budget: seconds to rank the features
+        :param eefr_timer: start of the ranking
+        :return: list of features names, inverse ordered by its weights
+        """
+        if time_budget <= 0:
+            raise ValueError(f"The time budget must be positive, got {time_budget}")
+        metrics, n_rows, weight_per_group = self.__get_defaults(n_rows, metrics)
         logging.info("Starting Weights calculation...")
+        rank_weights, subsets_used = self.__budgeted_rank_weights(n_rows, n_tries, metrics, n_jobs, time_budget,
+                                                                  weight_per_group)
 
         # timer for Knowledge Viewer App log
-        metrics_timer = datetime.datetime.now()
+        rank_timer = datetime.datetime.now()
+        ret: list[str] = _select_ranked_features(rank_weights, self.__features_names.tolist(), cut_off,
+                                                 self.__generate_logs, self.__pruned_features.tolist())
+        self.__log_ranking(ret, rank_timer, eefr_timer, {'Subsets Used': subsets_used,
+                                                         'Time Budget': datetime.timedelta(seconds=time_budget)})
+        return ret
+
+    def __streaming_ranking(self, random_rows_n: RandomSubsets, cut_off: int, metrics: list[Metric], n_jobs: int,
+                            weight_per_group: list[int], eefr_timer: datetime.datetime,
+                            convergence: dict[str, Any] = None, convergence_top_k: int = None,
+                            convergence_measure: StabilityMeasure = None,
+                            convergence_batch: int = None) -> list[str]:
+        """
+        Rank the features folding the weights of each batch of subsets into the rank, until the subsets are over or
+        the ranking converged
+
+        :param random_rows_n: N subset index rows
+        :param cut_off: 0 (all features), k (k most ranked features), -1 (automatic k calculation)
+        :param metrics: list of metrics to use
+        :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores
+        :param weight_per_group: weight per group of each rank
+        :param eefr_timer: start of the ranking
+        :param convergence: convergence state with the measure and the threshold, None to evaluate every subset
+        :param convergence_top_k: number of top features compared by the convergence
+        :param convergence_measure: agreement measure of the convergence
+        :param convergence_batch: number of subsets of each batch of the convergence
+        :return: list of features names, inverse ordered by its weights
+        """
+        accumulator: RankAccumulator = RankAccumulator(self.__features_names.tolist(), weight_per_group,
+                                                       statistics=True)
+        stop: function = None
+        if convergence is not None:
+            stop = functools.partial(self.__is_converged, convergence, convergence_top_k, convergence_measure)
+        for _ in self.__iter_accumulator(accumulator, random_rows_n, metrics, n_jobs,
+                                         convergence_batch if stop is not None else None, stop):
+            pass
+        convergence = convergence or dict()
+        convergence.pop('Ranking', None)
+        n_subsets: int = accumulator.get_n_rows() // len(metrics) if self.__X.shape[1] > 0 else len(random_rows_n)
+        if convergence.get('Converged'):
+            logging.info(f"Converged after {n_subsets} of {len(random_rows_n)} subsets, "
+                         f"{convergence['Convergence Measure']} stability {convergence['Stability']:.3f}")
+
+        # timer for Knowledge Viewer App log
+        rank_timer = datetime.datetime.now()
+        ret: list[str] = _select_ranked_features(accumulator.get_rank_weights(), self.__features_names.tolist(),
+                                                 cut_off, self.__generate_logs, self.__pruned_features.tolist())
+        self.__log_ranking(ret, rank_timer, eefr_timer, {'Subsets Used': n_subsets, **convergence})
+        return ret
+
+    def __mapped_ranking(self, random_rows_n: RandomSubsets, cut_off: int, metrics: list[Metric], n_jobs: int,
+                         weight_per_group: list[int], weights_memory: int, weights_path: str,
+                         metrics_timer: datetime.datetime, eefr_timer: datetime.datetime) -> list[str]:
+        """
+        Rank the features keeping the weights of every subset in a float32 memory mapped file
+
+        :param random_rows_n: N subset index rows
+        :param cut_off: 0 (all features), k (k most ranked features), -1 (automatic k calculation)
+        :param metrics: list of metrics to use
+        :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores
+        :param weight_per_group: weight per group of each rank
+        :param weights_memory: estimated number of bytes of the weights in memory
+        :param weights_path: .npy file of the weights, None to use the logs directory, or a temporary file without
+                             logs
+        :param metrics_timer: start of the weights calculation
+        :param eefr_timer: start of the ranking
+        :return: list of features names, inverse ordered by its weights
+        """
+        temporary_weights: bool = weights_path is None and not self.__generate_logs
+        if weights_path is None and self.__generate_logs:
+            weights_path = f'{LOGS_PATH}/weights.npy'
+        elif weights_path is None:
+            descriptor, weights_path = tempfile.mkstemp(suffix='.npy')
+            os.close(descriptor)
+
+        logging.info(f"Calculating weights for metrics: {', '.join([m.__name__.replace('_', ' ') for m in metrics])}")
+        logging.info(f"The weights need about {weights_memory / 2 ** 20:.1f} MiB, writing them to {weights_path}")
+        try:
+            mapped_weights, times = _calculate_mapped_weights_sampling(
+                self.__Y, self.__X, self.__features_names, random_rows_n, metrics, weights_path,
+                self.__generate_logs, n_jobs, self.__X_distinct, self.__features_groups)
+            self.__log_metrics_times(metrics, times)
+            self.__log_weights_sampling(metrics, metrics_timer)
+
+            logging.info("Starting rank calculation...")
+
+            # timer for Knowledge Viewer App log
+            rank_timer = datetime.datetime.now()
+
+            ret: list[str] = _calculate_rank_sampling(mapped_weights, self.__features_names.tolist(),
+                                                      weight_per_group, cut_off, self.__generate_logs,
+                                                      self.__pruned_features.tolist())
+            del mapped_weights
+        finally:
+            # the temporary file is removed even if the weights or the rank calculation fail
+            if temporary_weights and os.path.exists(weights_path):
+                os.remove(weights_path)
+        self.__log_ranking(ret, rank_timer, eefr_timer, {'Subsets Used': len(random_rows_n),
+                                                         'Estimated Weights Memory': weights_memory,
+                                                         'Weights File': None if temporary_weights else weights_path})
+        return ret
+
+    def __fused_weights(self, random_rows_n: RandomSubsets, metrics: list[Metric],
+                        n_jobs: int) -> dict[Metric, pandas.DataFrame]:
+        """
+        Calculate the weights of every metric on each batch of subsets
+
+        :param random_rows_n: N subset index rows
+        :param metrics: list of metrics to use
+        :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores
+        :return: weights of each metric
+        """
+        logging.info(f"Calculating weights for metrics: {', '.join([m.__name__.replace('_', ' ') for m in metrics])}")
+        fused_weights, times = _calculate_fused_weights_sampling(
+            self.__Y, self.__X, self.__features_names, random_rows_n, metrics, self.__generate_logs, n_jobs,
+            self.__X_distinct, self.__features_groups)
+        self.__log_metrics_times(metrics, times)
+        return dict(zip(metrics, fused_weights))
+
+    def __get_metrics_groups(self, metrics: list[Metric],
+                             cascade_fraction: float) -> tuple[list[list[Metric]], list[list[Metric]], bool]:
+        """
+        Group the count based metrics, so they share the contingency tables of each subset, and order the groups for
+        the cascade, the cheap metrics first
+
+        :param metrics: list of metrics to use
+        :param cascade_fraction: fraction of the features on which the other metrics are calculated, None without the
+                                 cascade
+        :return: groups of metrics, groups of cheap metrics and True if the cascade is used
+        """
+        capabilities: dict[Metric, MetricCapabilities] = {method: get_metric_capabilities(method) for method in metrics}
+        tables_metrics: list[Metric] = [method for method in metrics
+                                        if capabilities[method].tables_function is not None]
+        groups: list[list[Metric]] = list()
+        for method in metrics:
+            if capabilities[method].tables_function is None:
+                groups.append([method])
+            elif method == tables_metrics[0]:
+                groups.append(tables_metrics)
+
+        # the cascade evaluates the cheap metrics first, so the other metrics only run on the best features
+        cheap_groups: list[list[Metric]] = [group for group in groups
+                                            if all(capabilities[method].cost == MetricCost.LOW for method in group)]
+        if cascade_fraction is not None and not 0 < cascade_fraction <= 1:
+            raise ValueError(f"The cascade fraction must be in ]0, 1], got {cascade_fraction}")
+        cascade: bool = cascade_fraction is not None and 0 < len(cheap_groups) < len(groups)
+        if cascade_fraction is not None and not cascade:
+            logging.info("The cascade needs cheap metrics and other metrics, evaluating every feature")
+        if cascade:
+            groups = cheap_groups + [group for group in groups if group not in cheap_groups]
+        return groups, cheap_groups, cascade
+
+    def __groups_weights(self, random_rows_n: RandomSubsets, groups: list[list[Metric]],
+                         cheap_groups: list[list[Metric]], cascade: bool, cascade_fraction: float,
+                         weight_per_group: list[int], n_jobs: int,
+                         parallel_axis: ParallelAxis) -> dict[Metric, pandas.DataFrame]:
+        """
+        Calculate the weights of each group of metrics in turn, with the cascade the groups after the cheap ones only
+        evaluate the best features of the cheap metrics
+
+        :param random_rows_n: N subset index rows
+        :param groups: groups of metrics, the cheap ones first with the cascade
+        :param cheap_groups: groups of cheap metrics
+        :param cascade: True to use the cascade
+        :param cascade_fraction: fraction of the features on which the other metrics are calculated
+        :param weight_per_group: weight per group of each rank
+        :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores
+        :param parallel_axis: split the work between the processes by subsets or by blocks of features
+        :return: weights of each metric
+        """
+        n_metrics: int = sum(len(group) for group in groups)
+        weights: dict[Metric, pandas.DataFrame] = dict()
+        survivors: np.array = None
+        cascade_time: datetime.timedelta = datetime.timedelta(0)
+        for group in groups:
+            if cascade and survivors is None and group not in cheap_groups:
+                survivors = self.__get_cascade_survivors(weights, weight_per_group, cascade_fraction)
+                logging.info(f"Cascade: {len(survivors)} of {self.__X.shape[1]} features kept for the other "
+                             f"metrics")
 
-        weights: list[pandas.DataFrame] = list()
-        for i in range(len(metrics)):
-            method: Metric = metrics[i]
             # timer for Knowledge Viewer App log
             method_timer = datetime.datetime.now()
             logging.info(
-                f"Calculating weights for metric: {method.__name__.replace('_', ' ')} ({i + 1}/{len(metrics)})")
-            weights.append(_calculate_weights_sampling(self.__Y, self.__X, random_rows_n, method, self.__generate_logs))
+                f"Calculating weights for metric: {', '.join([m.__name__.replace('_', ' ') for m in group])} "
+                f"({len(weights) + len(group)}/{n_metrics})")
+            weights.update(zip(group, self.__group_weights(random_rows_n, group, survivors, n_jobs, parallel_axis)))
+            group_time: datetime.timedelta = datetime.datetime.now() - method_timer
+            if survivors is not None and survivors.size > 0:
+                cascade_time += group_time
 
-            # Log for Knowledge Viewer App
-            if self.__generate_logs:
-                _generate_log_file({'Execution Time': datetime.datetime.now() - method_timer},
-                                   method.__name__)
+            # the metrics of a group share their calculation, so its time is split equally, as in the fused path
+            self.__log_metrics_times(group, [group_time / len(group)] * len(group))
 
+        # Log for Knowledge Viewer App
+        if self.__generate_logs and cascade:
+            self.__log_cascade(groups, cheap_groups, cascade_fraction, survivors, cascade_time)
+        return weights
+
+    def __group_weights(self, random_rows_n: RandomSubsets, group: list[Metric], survivors: np.array, n_jobs: int,
+                        parallel_axis: ParallelAxis) -> list[pandas.DataFrame]:
+        """
+        Calculate the weights of a group of metrics
+
+        :param random_rows_n: N subset index rows
+        :param group: group of metrics
+        :param survivors: columns kept by the cascade, None to evaluate every feature
+        :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores
+        :param parallel_axis: split the work between the processes by subsets or by blocks of features
+        :return: weights of each metric of the group
+        """
+        if survivors is not None and survivors.size > 0:
+            # the features left out by the cascade get missing weights, which are ranked last
+            group_weights: list[pandas.DataFrame] = list()
+            for frame in _calculate_metrics_weights_sampling(
+                    self.__Y, np.ascontiguousarray(self.__X[:, survivors]), self.__features_names[survivors],
+                    random_rows_n, group, self.__generate_logs, n_jobs, parallel_axis):
+                values: np.array = np.full((len(random_rows_n), self.__X.shape[1]), np.nan)
+                values[:, survivors] = frame.to_numpy()
+                group_weights.append(pandas.DataFrame(values, columns=self.__features_names))
+            return group_weights
+        if self.__X.shape[1] == 0:
+            # every feature was pruned
+            return [pandas.DataFrame(np.zeros((len(random_rows_n), 0))) for _ in group]
+        if all(get_metric_capabilities(method).feature_independent for method in group):
+            return _calculate_metrics_weights_sampling(self.__Y, self.__X_distinct, self.__features_names,
+                                                       random_rows_n, group, self.__generate_logs, n_jobs,
+                                                       parallel_axis, self.__features_groups)
+        return _calculate_metrics_weights_sampling(self.__Y, self.__X, self.__features_names, random_rows_n, group,
+                                                   self.__generate_logs, n_jobs, parallel_axis)
+
+    def __log_cascade(self, groups: list[list[Metric]], cheap_groups: list[list[Metric]], cascade_fraction: float,
+                      survivors: np.array, cascade_time: datetime.timedelta) -> None:
+        """
+        Log the cascade
+
+        :param groups: groups of metrics
+        :param cheap_groups: groups of cheap metrics
+        :param cascade_fraction: fraction of the features on which the other metrics are calculated
+        :param survivors: columns kept by the cascade
+        :param cascade_time: time of the metrics calculated on the survivors
+        """
+        # the other metrics cost about the same per feature, so the saved time is estimated from the survivors
+        n_survivors: int = len(survivors) if survivors is not None else 0
+        _generate_log_file({'Cascade Fraction': cascade_fraction,
+                           'Total Features': self.__X.shape[1],
+                           'Surviving Features': n_survivors,
+                           'Second Stage Metrics': [method.__name__.replace('_', ' ') for group in groups
+                                                    if group not in cheap_groups for method in group],
+                           'Second Stage Time': cascade_time,
+                           'Estimated Time Saved': cascade_time * (self.__X.shape[1] / n_survivors - 1)
+                           if n_survivors > 0 else datetime.timedelta(0)},
+                          'cascade')
+
+    def __log_metrics_times(self, metrics: list[Metric], times: list[datetime.timedelta]) -> None:
+        """
+        Log the execution time of each metric
+
+        :param metrics: list of metrics
+        :param times: execution time of each metric
+        """
+        # Log for Knowledge Viewer App
+        if self.__generate_logs:
+            for method, method_time in zip(metrics, times):
+                _generate_log_file({'Execution Time': method_time}, method.__name__)
+
+    def __log_weights_sampling(self, metrics: list[Metric], metrics_timer: datetime.datetime) -> None:
+        """
+        Log the end of the weights calculation
+
+        :param metrics: list of metrics
+        :param metrics_timer: start of the weights calculation
+        """
         # Log for Knowledge Viewer App
         if self.__generate_logs:
             _generate_log_file({'Metrics': [method.__name__.replace('_', ' ') for method in metrics],
                                'Execution Time': datetime.datetime.now() - metrics_timer},
                               'calculate_weights_sampling')
 
-        logging.info("Concatenating the weights...")
+    def __calibrate_metrics(self, n_rows: int, n_calibration: int, metrics: list[Metric],
+                            accumulators: list[RankAccumulator]) -> np.array:
+        """
+        Time a few subsets of each metric in this process, their weights are folded into the accumulators
 
-        # concatenate the weights into a data frame
-        weights_list: pandas.DataFrame = pandas.concat(weights, ignore_index=True)
-        features_names: list[str] = self.__X.columns
+        :param n_rows: number of rows per subset
+        :param n_calibration: number of subsets of each metric
+        :param metrics: list of metrics to use
+        :param accumulators: rank accumulator of each metric
+        :return: seconds of a subset of each metric
+        """
+        seconds_per_subset: np.array = np.zeros(len(metrics))
+        for i, method in enumerate(metrics):
+            method_timer = datetime.datetime.now()
+            for weights, _ in _iter_fused_weights_sampling(
+                    self.__Y, self.__X, self.__features_names,
+                    _get_n_randoms_rows_subsets(self.get_total_instances(), n_rows, n_calibration, False), [method],
+                    1, self.__X_distinct, self.__features_groups):
+                accumulators[i].add(weights[:, 0, :])
+            seconds_per_subset[i] = max((datetime.datetime.now() - method_timer).total_seconds() / n_calibration,
+                                        1e-6)
+        return seconds_per_subset
+
+    def __iter_accumulator(self, accumulator: RankAccumulator, random_rows_n: RandomSubsets, metrics: list[Metric],
+                           n_jobs: int, batch_size: int = None,
+                           stop: function = None) -> Iterator[RankAccumulator]:
+        """
+        Fold the weights of each batch of subsets into the rank accumulator, the weights of each metric are appended
+        to its log file instead of being kept
+
+        :param accumulator: rank accumulator of the features
+        :param random_rows_n: N subset index rows
+        :param metrics: list of metrics to use
+        :param n_jobs: number of processes to evaluate the subsets, -1 to use all cores
+        :param batch_size: maximum number of subsets of each batch, None to bound the batches by memory only
+        :param stop: function (accumulator) -> True to skip the remaining subsets, checked after each batch, None to
+                     evaluate every subset
+        :return: iterator of the accumulator after each batch
+        """
+        # timer for Knowledge Viewer App log
+        metrics_timer = datetime.datetime.now()
 
-        logging.info("Starting rank calculation...")
+        if self.__generate_logs:
+            for method in metrics:
+                pandas.DataFrame(columns=self.__features_names).to_csv(f'{LOGS_PATH}/metric_{method.__name__}.tsv',
+                                                                       index=False, sep='\t')
+
+        seconds: np.array = np.zeros(len(metrics))
+        batches: Iterator[tuple[np.array, np.array]] = _iter_fused_weights_sampling(
+            self.__Y, self.__X, self.__features_names, random_rows_n, metrics, n_jobs, self.__X_distinct,
+            self.__features_groups, batch_size) if self.__X.shape[1] > 0 else iter(list())
+        for weights, times in batches:
+            accumulator.add(weights.reshape(-1, weights.shape[2]))
+            seconds += times
+            self.__features_statistics = accumulator.get_statistics()
 
-        # timer for Knowledge Viewer App log
-        rank_timer = datetime.datetime.now()
+            # Log for Knowledge Viewer App
+            if self.__generate_logs:
+                for i, method in enumerate(metrics):
+                    pandas.DataFrame(weights[:, i, :]).to_csv(f'{LOGS_PATH}/metric_{method.__name__}.tsv', mode='a',
+                                                              header=False, index=False, sep='\t')
+            yield accumulator
+            if stop is not None and stop(accumulator):
+                break
+        self.__features_statistics = accumulator.get_statistics()
 
-        ret: list[str] = _calculate_rank_sampling(weights_list, features_names, weight_per_group, cut_off,
-                                                  self.__generate_logs)
+        # Log for Knowledge Viewer App
+        if self.__generate_logs:
+            for method, method_seconds in zip(metrics, seconds):
+                _generate_log_file({'Execution Time': datetime.timedelta(seconds=float(method_seconds))},
+                                   method.__name__)
+            _generate_log_file({'Metrics': [method.__name__.replace('_', ' ') for method in metrics],
+                               'Execution Time': datetime.datetime.now() - metrics_timer},
+                              'calculate_weights_sampling')
+            self.__features_statistics.to_csv(f'{LOGS_PATH}/features_statistics.tsv', index_label='Feature',
+                                              sep='\t')
 
+    def __log_ranking(self, ret: list[str], rank_timer: datetime.datetime, eefr_timer: datetime.datetime,
+                      info: dict[str, Any] = None) -> None:
+        """
+        Log the end of the ranking
+
+        :param ret: selected features
+        :param rank_timer: start of the rank calculation
+        :param eefr_timer: start of the ranking
+        :param info: other values of the ranking log
+        """
         # Logs for Knowledge Viewer App
         if self.__generate_logs:
-            _generate_log_file({'Total Features': self.__X.shape[1],
+            _generate_log_file({'Total Features': self.get_total_features(),
                                'Selected Count': len(ret),
                                'Execution Time': datetime.datetime.now() - rank_timer}, 'calculate_rank_sampling')
 
-            _generate_log_file({'Execution Time': datetime.datetime.now() - eefr_timer}, 'EEFR')
+            _generate_log_file({**(info or dict()), 'Execution Time': datetime.datetime.now() - eefr_timer}, 'EEFR')
 
         logging.info("Done!")
-        return ret
+
+    @staticmethod
+    def __is_converged(convergence: dict[str, Any], top_k: int, measure: StabilityMeasure,
+                       accumulator: RankAccumulator) -> bool:
+        """
+        Compare the top features of the ranking so far with the ones of the previous batch
+
+        :param convergence: convergence state with the threshold, updated with the last ranking and stability
+        :param top_k: number of top features to compare
+        :param measure: agreement measure
+        :param accumulator: rank accumulator of the features
+        :return: True if the stability reached the threshold
+        """
+        ranking: list[str] = accumulator.get_ranking()
+        previous: list[str] = convergence.get('Ranking')
+        convergence['Ranking'] = ranking
+        if previous is None:
+            return False
+        convergence['Stability'] = ranking_stability(previous, ranking, top_k, measure)
+        convergence['Converged'] = convergence['Stability'] >= convergence['Convergence Threshold']
+        return convergence['Converged']
+
+    def __get_cascade_survivors(self, weights: dict[Metric, pandas.DataFrame], weight_per_group: list[float],
+                                cascade_fraction: float) -> np.array:
+        """
+        Get the features kept by the first stage of the cascade, the best ranked by the cheap metrics
+
+        :param weights: weights of the cheap metrics
+        :param weight_per_group: weight per group of each rank
+        :param cascade_fraction: fraction of the features to keep
+        :return: column indexes of the kept features, in column order
+        """
+        n_survivors: int = max(1, int(np.ceil(cascade_fraction * self.__X.shape[1])))
+        features_names: list[str] = self.__features_names.tolist()
+        best: list[str] = _calculate_rank_sampling(pandas.concat(list(weights.values()), ignore_index=True),
+                                                   features_names, weight_per_group, n_survivors, False)
+        return np.sort(pandas.Index(features_names).get_indexer(best))
+
+    def get_discretizer(self) -> Discretizer:
+        """
+        Get the discretization model of the dataset, to save it or to use it on new data of the same source
+
+        :return: the fitted discretization model
+        """
+        return self.__discretizer
 
     def get_total_features(self):
         """
@@ -361,7 +1471,7 @@ class EEFR:
 
         :return: number of features of the dataset
         """
-        return self.__X.shape[1]
+        return self.__X.shape[1] + len(self.__pruned_features)
 
     def get_total_instances(self):
         """
@@ -0,0 +1,89 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas
+
+from xefr4py.discretizer import Discretizer, to_saved_array
+
+# files of a cached dataset, the codes matrix is written last and marks a complete entry
+CACHE_FILES: tuple[str, ...] = ('class', 'names', 'pruned', 'discretizer', 'codes')
+
+
+def get_dataset_key(dataset: pandas.DataFrame, class_column: str, blacklist_columns: list[str],
+                    discretizer: Discretizer) -> str:
+    """
+    Get the cache key of a dataset, a hash of its content, the class column, the blacklist and the discretizer version
+    and settings
+
+    :param dataset: dataset to process
+    :param class_column: class column name
+    :param blacklist_columns: list of columns to ignore
+    :param discretizer: discretization model to fit
+    :return: hexadecimal key
+    """
+    key = hashlib.sha256()
+    key.update(repr((Discretizer.VERSION, sorted(discretizer.get_settings().items()), class_column,
+                     list(blacklist_columns), dataset.columns.tolist(),
+                     [str(dtype) for dtype in dataset.dtypes], dataset.shape)).encode())
+    key.update(pandas.util.hash_pandas_object(dataset, index=True).to_numpy().tobytes())
+    return key.hexdigest()
+
+
+def _get_cache_path(cache_dir: str, key: str, name: str) -> str:
+    """
+    Get the path of a file of a cached dataset
+
+    :param cache_dir: cache directory
+    :param key: dataset key
+    :param name: file name (one of CACHE_FILES)
+    :return: the file path
+    """
+    return os.path.join(cache_dir, f'{key}_{name}' + ('.npz' if name == 'discretizer' else '.npy'))
+
+
+def load_cached_dataset(cache_dir: str, key: str) -> tuple[np.array, np.array, np.array, np.array, Discretizer]:
+    """
+    Load a discretized dataset from the cache, the codes matrix is memory mapped
+
+    :param cache_dir: cache directory
+    :param key: dataset key
+    :return: class codes, features codes matrix, features names, pruned features names and discretization model, or
+    None if not cached
+    """
+    if not all(os.path.exists(_get_cache_path(cache_dir, key, name)) for name in CACHE_FILES):
+        return None
+    class_data: np.array = np.load(_get_cache_path(cache_dir, key, 'class'), allow_pickle=False)
+    codes: np.array = np.load(_get_cache_path(cache_dir, key, 'codes'), mmap_mode='r', allow_pickle=False)
+    features_names: np.array = np.load(_get_cache_path(cache_dir, key, 'names'), allow_pickle=False)
+    pruned_features: np.array = np.load(_get_cache_path(cache_dir, key, 'pruned'), allow_pickle=False)
+    discretizer: Discretizer = Discretizer.load(_get_cache_path(cache_dir, key, 'discretizer'))
+    return class_data, codes, features_names, pruned_features, discretizer
+
+
+def save_cached_dataset(cache_dir: str, key: str, class_data: np.array, codes: np.array, features_names: np.array,
+                        pruned_features: np.array, discretizer: Discretizer) -> None:
+    """
+    Save a discretized dataset to the cache
+
+    :param cache_dir: cache directory
+    :param key: dataset key
+    :param class_data: class codes
+    :param codes: features codes matrix
+    :param features_names: features names
+    :param pruned_features: names of the features left out of the sampling
+    :param discretizer: fitted discretization model
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    arrays: dict[str, np.array] = {'class': class_data, 'names': to_saved_array(features_names),
+                                   'pruned': to_saved_array(pruned_features), 'codes': codes}
+    for name in CACHE_FILES:
+        path: str = _get_cache_path(cache_dir, key, name)
+        # write to a temporary file and move it, so a partial entry is never loaded
+        temporary_path: str = f'{path}.{os.getpid()}.tmp'
+        if name == 'discretizer':
+            discretizer.save(temporary_path)
+        else:
+            with open(temporary_path, 'wb') as file:
+                np.save(file, arrays[name], allow_pickle=False)
+        os.replace(temporary_path, path)
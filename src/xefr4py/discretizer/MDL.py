@@ -1,7 +1,6 @@
 import math
 
 import numpy as np
-import pandas
 
 LOG2 = math.log(2)
 
@@ -35,24 +34,40 @@ def entropy_conditioned_on_rows(matrix: np.array) -> float:
     :param matrix: matrix to calculate the conditioned entropy
     :return: conditioned entropy of the matrix
     """
-    # initialize the return value and the total
-    returnValue: float = 0
-    total: float = 0
-
-    # calculate the values
-    for i in range(matrix.shape[0]):
-        sumForRow: float = 0
-        # calculate the values for the row
-        for j in range(matrix.shape[1]):
-            returnValue += lnFunc(matrix[i, j])
-            sumForRow += matrix[i, j]
-        returnValue -= lnFunc(sumForRow)
-        total += sumForRow
-
-    # return the entropy
+    total: float = np.sum(matrix)
     if total == 0:
         return 0
-    return -returnValue / (total * LOG2)
+    return -(np.sum(_x_log_x(matrix)) - np.sum(_x_log_x(np.sum(matrix, axis=1)))) / (total * LOG2)
+
+
+def _x_log_x(array: np.array) -> np.array:
+    """
+    Vectorized version of lnFunc, x * ln(x) of each element or 0 if the element is not positive
+
+    :param array: array to calculate
+    :return: x * ln(x) of each element
+    """
+    array = np.asarray(array, dtype=np.float64)
+    positive: np.array = array > 0
+    ret: np.array = np.zeros(array.shape)
+    ret[positive] = array[positive] * np.log(array[positive])
+    return ret
+
+
+def entropies_conditioned_on_rows(left: np.array, right: np.array) -> np.array:
+    """
+    Calculate the conditioned entropy of every candidate split at once, each candidate is the 2 x classes matrix with
+    the class counts on the left and on the right of the split
+
+    :param left: candidates x classes counts on the left of each split
+    :param right: candidates x classes counts on the right of each split
+    :return: conditioned entropy of each candidate
+    """
+    total: np.array = left.sum(axis=1) + right.sum(axis=1)
+    value: np.array = (_x_log_x(left).sum(axis=1) + _x_log_x(right).sum(axis=1)
+                       - _x_log_x(left.sum(axis=1)) - _x_log_x(right.sum(axis=1)))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(total == 0, 0, -value / (total * LOG2))
 
 
 # numpy versions of the entropy functions
@@ -90,17 +105,9 @@ def E(prior_counts: np.array, best_counts: np.array, num_instances: int, num_cut
     # Number of classes occurring in the set
     num_classes: int = np.sum(prior_counts > 0)
 
-    # Number of classes occurring in the left subset
-    num_classes_left: int = 0
-    for i in range(best_counts[0].size):
-        if best_counts[0, i] > 0:
-            num_classes_left += 1
-
-    # Number of classes occurring in the right subset
-    num_classes_right: int = 0
-    for i in range(best_counts[1].size):
-        if best_counts[1, i] > 0:
-            num_classes_right += 1
+    # Number of classes occurring in the left and right subsets
+    num_classes_left: int = np.count_nonzero(best_counts[0])
+    num_classes_right: int = np.count_nonzero(best_counts[1])
 
     # the entropy gain of the current split compared to the original one
     gain: float = prior_entropy - ent
@@ -114,88 +121,124 @@ def E(prior_counts: np.array, best_counts: np.array, num_instances: int, num_cut
     return gain > (math.log2(num_cut_points) + delta) / num_instances
 
 
-def cut_points_for_subset(sortedData: np.array, first: int, last_plus_one: int) -> np.array:
+def class_counts_by_value(x: np.array, y: np.array) -> tuple[np.array, np.array]:
     """
-    calculate the cut points of the passed subset
+    Group the instances by attribute value, the missing values join the last group as they are sorted after all the
+    values and can't be separated from them
 
-    :param sortedData: the class and attribute sorted by the attribute values
-    :param first: first index of the subset to be considered
-    :param last_plus_one: last index plus one of the subset to be considered
-    :return: list of cut points if it contributes to entropy gain else None
+    :param x: attribute values
+    :param y: class codes
+    :return: sorted distinct values and the class counts of each one (values x classes)
     """
-    # Compute number of instances in set
-    num_instances: int = last_plus_one - first
-    if num_instances < 2:
-        return None
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.int64)
+    n_classes: int = int(y.max()) + 1 if y.size > 0 else 1
 
-    # to make code less verbose
-    sortedClass: np.array = sortedData[:, 0]
-    sortedX: np.array = sortedData[:, 1]
+    valid: np.array = ~np.isnan(x)
+    order: np.array = np.argsort(x[valid], kind='stable')
+    sorted_x: np.array = x[valid][order]
+    sorted_y: np.array = y[valid][order]
 
-    # Compute class counts
-    counts: np.array = np.zeros((2, len(np.unique(sortedClass))))
-    best_counts: np.array = counts.copy()
+    # index of the group of each instance
+    new_value: np.array = np.concatenate([[True], sorted_x[1:] != sorted_x[:-1]]) if sorted_x.size > 0 \
+        else np.zeros(0, dtype=bool)
+    group: np.array = np.cumsum(new_value) - 1
+    values: np.array = sorted_x[new_value]
 
-    for i in range(first, last_plus_one):
-        counts[1, int(sortedClass[i])] += 1
+    counts: np.array = np.bincount(group * n_classes + sorted_y, minlength=values.size * n_classes) \
+        .reshape(values.size, n_classes).astype(np.float64)
+    if values.size > 0:
+        counts[-1] += np.bincount(y[~valid], minlength=n_classes)
+    return values, counts
 
-    # Save prior counts
-    prior_counts: np.array = counts[1].copy()
 
-    # Entropy of the full set
-    prior_entropy: float = entropy(prior_counts)
-    best_entropy: float = prior_entropy
-
-    current_cut_point: float = float('-inf')
-    best_cut_point: float = current_cut_point
-    best_index: int = -1
-    num_cut_points: int = 0
-
-    next_x: float = sortedX[first]
-
-    # Find best entropy
-    for i in range(first, last_plus_one - 1):
-        counts[0, int(sortedClass[i])] += 1
-        counts[1, int(sortedClass[i])] -= 1
-
-        cur_x: float = next_x
-        next_x: float = sortedX[i + 1]
-
-        if cur_x < next_x:
-            current_cut_point = (cur_x + next_x) / 2
-            current_entropy = entropy_conditioned_on_rows(counts)
-            if current_entropy < best_entropy:
-                best_cut_point = current_cut_point
-                best_entropy = current_entropy
-                best_index = i
-                best_counts = counts.copy()
-            num_cut_points += 1
-
-    # Checks if gain is zero
-    gain: float = prior_entropy - best_entropy
-    if gain <= 0:
-        return None
-
-    # Check if split is to be accepted
-    if E(prior_counts, best_counts, num_instances, num_cut_points):
-        # Select split points for the left and right subsets
-        left: np.array = cut_points_for_subset(sortedData, first, best_index + 1)
-        right: np.array = cut_points_for_subset(sortedData, best_index + 1, last_plus_one)
-
-        cut_points: np.array
-
-        # Merge cut points and return them
-        if left is None and right is None:
-            cut_points = np.array([best_cut_point])
-        elif right is None:
-            cut_points = np.concatenate([left, np.array([best_cut_point])])
-        elif left is None:
-            cut_points = np.concatenate([np.array([best_cut_point]), right])
-        else:
-            cut_points = np.concatenate([left, np.array([best_cut_point]), right])
-        return cut_points
+def class_counts_by_bins(x: np.array, y: np.array, n_bins: int) -> tuple[np.array, np.array, np.array]:
+    """
+    Group the instances by quantile bins of the attribute, right closed like the intervals of the cut points. The
+    missing values join the last bin, as in class_counts_by_value
 
-    return None
+    :param x: attribute values
+    :param y: class codes
+    :param n_bins: maximum number of bins
+    :return: lowest and highest value of each non-empty bin and the class counts of each one (bins x classes)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.int64)
+    n_classes: int = int(y.max()) + 1 if y.size > 0 else 1
+
+    valid: np.array = ~np.isnan(x)
+    valid_x: np.array = x[valid]
+    if valid_x.size == 0:
+        return np.zeros(0), np.zeros(0), np.zeros((0, n_classes), dtype=np.int64)
+
+    # inner edges of the bins, the value of an edge belongs to the bin on its left
+    edges: np.array = np.unique(np.quantile(valid_x, np.linspace(0, 1, n_bins + 1)[1:-1]))
+    bins: np.array = np.searchsorted(edges, valid_x, side='left')
+    n_groups: int = edges.size + 1
+
+    counts: np.array = np.bincount(bins * n_classes + y[valid],
+                                   minlength=n_groups * n_classes).reshape(n_groups, n_classes)
+    lower: np.array = np.full(n_groups, np.inf)
+    np.minimum.at(lower, bins, valid_x)
+    upper: np.array = np.full(n_groups, -np.inf)
+    np.maximum.at(upper, bins, valid_x)
+
+    non_empty: np.array = counts.sum(axis=1) > 0
+    counts = counts[non_empty]
+    counts[-1] += np.bincount(y[~valid], minlength=n_classes)
+    return lower[non_empty], upper[non_empty], counts
+
+
+def cut_points_for_groups(lower: np.array, upper: np.array, counts: np.array) -> np.array:
+    """
+    Calculate the MDL cut points of instances grouped by sorted attribute values, the candidate cuts lie between
+    consecutive groups. The recursion of Fayyad and Irani uses an explicit work stack and the conditional entropy of
+    every candidate of a subset is evaluated at once from the cumulative class counts
+
+    :param lower: lowest attribute value of each group
+    :param upper: highest attribute value of each group
+    :param counts: groups x classes counts
+    :return: sorted cut points, empty if no cut contributes to the entropy gain
+    """
+    # a group with a single class (pure) and its neighbour with the same single class can't have a boundary point
+    pure_class: np.array = np.where(np.count_nonzero(counts, axis=1) == 1, np.argmax(counts, axis=1), -1)
+    boundaries: np.array = (pure_class[:-1] == -1) | (pure_class[:-1] != pure_class[1:])
+
+    cut_points: list[float] = list()
+    stack: list[tuple[int, int]] = [(0, counts.shape[0])]
+    while stack:
+        first, last_plus_one = stack.pop()
+
+        # number of candidate cuts (between consecutive groups)
+        num_cut_points: int = last_plus_one - first - 1
+        if num_cut_points < 1:
+            continue
+
+        # class counts on the left and right of every candidate
+        cumulative: np.array = np.cumsum(counts[first:last_plus_one], axis=0)
+        prior_counts: np.array = cumulative[-1]
+        left: np.array = cumulative[:-1]
+        right: np.array = prior_counts - left
+        num_instances: int = prior_counts.sum()
+
+        # only the boundary points can be the best cut
+        candidates: np.array = np.flatnonzero(boundaries[first:last_plus_one - 1])
+        if candidates.size == 0:
+            continue
+        entropies: np.array = entropies_conditioned_on_rows(left[candidates], right[candidates])
+        best: int = candidates[np.argmin(entropies)]
+
+        # Checks if gain is zero
+        if entropy(prior_counts) - np.min(entropies) <= 0:
+            continue
+
+        # Check if split is to be accepted
+        if E(prior_counts, np.vstack([left[best], right[best]]), num_instances, num_cut_points):
+            cut_points.append((upper[first + best] + lower[first + best + 1]) / 2)
+            stack.append((first, first + best + 1))
+            stack.append((first + best + 1, last_plus_one))
+
+    return np.sort(np.array(cut_points))
 
 
 def MDL(x: list[float], y: list[float]) -> list[float]:
@@ -206,14 +249,46 @@ def MDL(x: list[float], y: list[float]) -> list[float]:
     :param y: class to supervise the discretization
     :return: discretized attribute
     """
-    # sort the attribute and class based on the attribute values
-    data = pandas.DataFrame([y, x], index=["class", "x"]).transpose()
-    sorted_data: np.array = data.sort_values("x", axis=0).to_numpy()
+    # group the class counts by the sorted attribute values
+    values, counts = class_counts_by_value(x, y)
 
     # calculate the cut points
-    aux: np.array = cut_points_for_subset(sorted_data, 0, sorted_data.shape[0])
+    aux: np.array = cut_points_for_groups(values, values, counts)
 
-    if aux is None:
-        return [float('-inf'), float('inf')]
+    return np.concatenate([np.array([float('-inf')]), aux, np.array([float('inf')])]).tolist()
+
+
+def approximate_MDL(x: list[float], y: list[float], n_bins: int) -> list[float]:
+    """
+    Approximate MDL - the recursion of Fayyad and Irani over quantile bins of the attribute instead of its distinct
+    values, only the bins edges are candidate cuts
+
+    :param x: attribute to be discretized
+    :param y: class to supervise the discretization
+    :param n_bins: maximum number of bins, the accuracy of the approximation
+    :return: discretized attribute
+    """
+    lower, upper, counts = class_counts_by_bins(x, y, n_bins)
+
+    aux: np.array = cut_points_for_groups(lower, upper, counts)
 
     return np.concatenate([np.array([float('-inf')]), aux, np.array([float('inf')])]).tolist()
+
+
+def cut_points_distance(exact: list[float], approximate: list[float]) -> float:
+    """
+    Distance between two sets of cut points, the largest distance from a cut point of one set to the nearest cut point
+    of the other (Hausdorff distance)
+
+    :param exact: cut points, may include the -inf and inf bounds
+    :param approximate: cut points, may include the -inf and inf bounds
+    :return: the distance, 0 if both have no cut points and inf if only one has none
+    """
+    exact = np.asarray(exact, dtype=np.float64)
+    exact = exact[np.isfinite(exact)]
+    approximate = np.asarray(approximate, dtype=np.float64)
+    approximate = approximate[np.isfinite(approximate)]
+    if exact.size == 0 or approximate.size == 0:
+        return 0.0 if exact.size == approximate.size else float('inf')
+    distances: np.array = np.abs(exact[:, np.newaxis] - approximate[np.newaxis, :])
+    return float(max(distances.min(axis=1).max(), distances.min(axis=0).max()))
@@ -0,0 +1,203 @@
+import numpy as np
+from scipy.stats import chi2
+
+# number of intervals of the unsupervised strategies
+DEFAULT_BINS: int = 10
+
+# number of initial quantile intervals of ChiMerge, bounds the number of merges
+CHI_MERGE_BINS: int = 32
+
+# significance level of the ChiMerge threshold
+CHI_MERGE_SIGNIFICANCE: float = 0.95
+
+
+def _to_cut_points(edges: np.array) -> list[list[float]]:
+    """
+    Convert the inner edges of the intervals of each feature to cut points
+
+    :param edges: number of edges x M inner edges, NaN for the features without values
+    :return: cut points of each feature, starting at -inf and ending at inf
+    """
+    return [[float('-inf')] + np.unique(column[np.isfinite(column)]).tolist() + [float('inf')] for column in edges.T]
+
+
+def _quantile_edges(features: np.array, n_bins: int) -> np.array:
+    """
+    Inner edges of the quantile bins of every feature, the features without missing values are processed at once
+
+    :param features: N x M features values
+    :param n_bins: number of bins
+    :return: number of bins - 1 x M inner edges, NaN for the features without values
+    """
+    edges: np.array = np.full((max(0, n_bins - 1), features.shape[1]), np.nan)
+    if features.shape[0] == 0 or n_bins < 2:
+        return edges
+    quantiles: np.array = np.linspace(0, 1, n_bins + 1)[1:-1]
+    missing: np.array = np.isnan(features)
+    complete: np.array = ~missing.any(axis=0)
+    partial: np.array = ~complete & ~missing.all(axis=0)
+    if complete.any():
+        edges[:, complete] = np.quantile(features[:, complete], quantiles, axis=0)
+    if partial.any():
+        edges[:, partial] = np.nanquantile(features[:, partial], quantiles, axis=0)
+    return edges
+
+
+def equal_frequency_cut_points(class_data: np.array, features: np.array, n_bins: int = None,
+                               n_jobs: int = 1) -> list[list[float]]:
+    """
+    Calculate the cut points of intervals with the same number of instances, all features at once
+
+    :param class_data: class codes (not used)
+    :param features: N x M features values
+    :param n_bins: number of intervals, DEFAULT_BINS if None
+    :param n_jobs: number of processes (not used, the features are processed at once)
+    :return: cut points of each feature, starting at -inf and ending at inf
+    """
+    return _to_cut_points(_quantile_edges(features, n_bins or DEFAULT_BINS))
+
+
+def equal_width_cut_points(class_data: np.array, features: np.array, n_bins: int = None,
+                           n_jobs: int = 1) -> list[list[float]]:
+    """
+    Calculate the cut points of intervals with the same width, all features at once
+
+    :param class_data: class codes (not used)
+    :param features: N x M features values
+    :param n_bins: number of intervals, DEFAULT_BINS if None
+    :param n_jobs: number of processes (not used, the features are processed at once)
+    :return: cut points of each feature, starting at -inf and ending at inf
+    """
+    n_bins = n_bins or DEFAULT_BINS
+    valid: np.array = ~np.all(np.isnan(features), axis=0)
+    edges: np.array = np.full((n_bins - 1, features.shape[1]), np.nan)
+    if np.any(valid):
+        lowest: np.array = np.nanmin(features[:, valid], axis=0)
+        highest: np.array = np.nanmax(features[:, valid], axis=0)
+        edges[:, valid] = lowest + (highest - lowest) * (np.arange(1, n_bins) / n_bins)[:, np.newaxis]
+    return _to_cut_points(edges)
+
+
+def _pairs_chi_squared(left: np.array, right: np.array) -> np.array:
+    """
+    Chi-squared statistic of pairs of adjacent intervals
+
+    :param left: classes x ... counts of the left interval
+    :param right: classes x ... counts of the right interval
+    :return: chi-squared of each pair, the cells without expected values are ignored
+    """
+    left_total: np.array = left.sum(axis=0)
+    right_total: np.array = right.sum(axis=0)
+    total: np.array = left_total + right_total
+    total = np.where(total > 0, total, 1)
+    statistic: np.array = np.zeros(total.shape)
+    for left_counts, right_counts in zip(left, right):
+        column: np.array = left_counts + right_counts
+        for counts, row in ((left_counts, left_total), (right_counts, right_total)):
+            expected: np.array = row * column / total
+            statistic += np.divide((counts - expected) ** 2, expected, out=np.zeros(total.shape), where=expected > 0)
+    return statistic
+
+
+def _class_counts_by_quantile_bins(class_data: np.array, features: np.array, n_bins: int,
+                                   n_classes: int) -> tuple[np.array, np.array, np.array]:
+    """
+    Group the instances of every feature at once by quantile bins, right closed like the intervals of the cut points.
+    The missing values join the last non-empty bin, as in class_counts_by_bins
+
+    :param class_data: class codes
+    :param features: N x M features values
+    :param n_bins: number of bins
+    :param n_classes: number of classes
+    :return: M x bins x classes counts, M x bins lowest and highest values of each bin (only valid if not empty)
+    """
+    n_rows, n_features = features.shape
+    class_data = np.asarray(class_data, dtype=np.int64)
+    edges: np.array = _quantile_edges(features, n_bins)
+
+    bins: np.array = np.empty(features.shape, dtype=np.int64)
+    for j in range(n_features):
+        bins[:, j] = np.searchsorted(edges[:, j], features[:, j], side='left')
+    valid: np.array = ~np.isnan(features)
+    # key of each bin: feature offset + bin
+    keys: np.array = (bins + np.arange(n_features) * n_bins)[valid]
+    values: np.array = features[valid]
+    classes: np.array = np.broadcast_to(class_data[:, np.newaxis], features.shape)[valid]
+
+    counts: np.array = np.bincount(keys * n_classes + classes, minlength=n_features * n_bins * n_classes)
+    counts = counts.reshape(n_features, n_bins, n_classes)
+    lower: np.array = np.full(n_features * n_bins, np.inf)
+    np.minimum.at(lower, keys, values)
+    upper: np.array = np.full(n_features * n_bins, -np.inf)
+    np.maximum.at(upper, keys, values)
+
+    # the missing values join the last non-empty bin
+    missing_features: np.array = np.nonzero(~valid)[1]
+    missing_classes: np.array = np.broadcast_to(class_data[:, np.newaxis], features.shape)[~valid]
+    missing: np.array = np.bincount(missing_features * n_classes + missing_classes,
+                                    minlength=n_features * n_classes).reshape(n_features, n_classes)
+    non_empty: np.array = counts.sum(axis=2) > 0
+    last: np.array = n_bins - 1 - np.argmax(non_empty[:, ::-1], axis=1)
+    has_values: np.array = non_empty.any(axis=1)
+    counts[np.flatnonzero(has_values), last[has_values]] += missing[has_values]
+    return counts, lower.reshape(n_features, n_bins), upper.reshape(n_features, n_bins)
+
+
+def chi_merge_cut_points(class_data: np.array, features: np.array, n_bins: int = None,
+                         n_jobs: int = 1) -> list[list[float]]:
+    """
+    ChiMerge - Kerber - Supervised discretization method. Starts from quantile intervals and merges, in every feature
+    at once, the adjacent pair with the lowest chi-squared while it is below the threshold of independence from the
+    class. The number of merges is bounded by the number of initial intervals
+
+    :param class_data: class codes
+    :param features: N x M features values
+    :param n_bins: number of initial intervals, CHI_MERGE_BINS if None
+    :param n_jobs: number of processes (not used, the features are merged at once)
+    :return: cut points of each feature, starting at -inf and ending at inf
+    """
+    n_bins = n_bins or CHI_MERGE_BINS
+    n_features: int = features.shape[1]
+    n_classes: int = int(np.max(class_data)) + 1 if len(class_data) > 0 else 1
+    threshold: float = chi2.ppf(CHI_MERGE_SIGNIFICANCE, max(1, n_classes - 1))
+
+    # initial intervals of every feature, the empty ones aren't alive
+    counts, lower, upper = _class_counts_by_quantile_bins(class_data, features, n_bins, n_classes)
+    non_empty: np.array = counts.sum(axis=2) > 0
+    alive: np.array = non_empty.copy()
+    # classes x M x bins, so the operations on each class are contiguous
+    counts = np.ascontiguousarray(counts.transpose(2, 0, 1))
+
+    features_idx: np.array = np.arange(n_features)
+    positions: np.array = np.broadcast_to(np.arange(n_bins), (n_features, n_bins))
+    for _ in range(n_bins - 1):
+        # next alive interval of each interval
+        alive_positions: np.array = np.where(alive, positions, n_bins)
+        following: np.array = np.minimum.accumulate(alive_positions[:, ::-1], axis=1)[:, ::-1]
+        following = np.concatenate([following[:, 1:], np.full((n_features, 1), n_bins)], axis=1)
+        pairs: np.array = alive & (following < n_bins)
+        if not pairs.any():
+            break
+
+        right: np.array = np.take_along_axis(counts, np.minimum(following, n_bins - 1)[np.newaxis], axis=2)
+        statistic: np.array = np.where(pairs, _pairs_chi_squared(counts, right), np.inf)
+        best: np.array = np.argmin(statistic, axis=1)
+        merge: np.array = statistic[features_idx, best] < threshold
+        if not merge.any():
+            break
+
+        # merge the right interval of the best pair into the left one
+        merged_features: np.array = features_idx[merge]
+        merged_left: np.array = best[merge]
+        merged_right: np.array = following[merged_features, merged_left]
+        counts[:, merged_features, merged_left] += counts[:, merged_features, merged_right]
+        alive[merged_features, merged_right] = False
+
+    # a cut point between the highest value before a merged interval and its lowest value
+    highest: np.array = np.maximum.accumulate(np.where(non_empty, upper, -np.inf), axis=1)
+    cut_points: list[list[float]] = list()
+    for j in range(n_features):
+        starts: np.array = np.flatnonzero(alive[j])[1:]
+        cut_points.append([float('-inf')] + ((highest[j, starts - 1] + lower[j, starts]) / 2).tolist()
+                          + [float('inf')])
+    return cut_points
@@ -1,15 +1,32 @@
 import datetime
 import logging
+from typing import Any
 
+import function
 import numpy as np
 import pandas
 from pandas import CategoricalDtype
 from pandas.core.dtypes.common import is_bool_dtype, is_string_dtype
 
-from xefr4py.discretizer.MDL import MDL
+from xefr4py.Parallel import get_n_jobs, get_features_blocks, get_worker_data, shared_dataset_pool
+from xefr4py.discretizer.MDL import MDL, approximate_MDL, cut_points_distance
+from xefr4py.discretizer.Strategies import equal_frequency_cut_points, equal_width_cut_points, chi_merge_cut_points
 
 LOG_INTERVAL = datetime.timedelta(seconds=30)
 
+# code reserved for the missing values in the codes matrix, the intervals codes start at 1
+MISSING_CODE: int = 0
+
+
+def _is_factor_column(column: pandas.Series) -> bool:
+    """
+    Check if a column is non-numeric and has to be factorized
+
+    :param column: column to check
+    :return: True if the column is categorical, boolean or string
+    """
+    return isinstance(column, CategoricalDtype) or is_bool_dtype(column) or is_string_dtype(column)
+
 
 def get_data_frame_from_formula(data: pandas.DataFrame) -> pandas.DataFrame:
     """
@@ -20,60 +37,455 @@ def get_data_frame_from_formula(data: pandas.DataFrame) -> pandas.DataFrame:
     """
     d: pandas.DataFrame = data.copy()
     for i in d.columns:
-        if isinstance(d[i], CategoricalDtype) or is_bool_dtype(d[i]) or is_string_dtype(d[i]):
+        if _is_factor_column(d[i]):
             d[i], _ = pandas.factorize(d[i], sort=True)
     return d
 
 
-def discretize(data: pandas.DataFrame) -> pandas.DataFrame:
+def apply_cut_points(x: np.array, cut_points: list[float]) -> np.array:
+    """
+    Get the interval of each value, the same labels as pandas.cut with the cut points as bins (right closed intervals)
+
+    :param x: attribute values
+    :param cut_points: sorted cut points, starting at -inf and ending at inf
+    :return: interval of each value, NaN for the missing values
+    """
+    x = np.asarray(x, dtype=np.float64)
+    intervals: np.array = np.searchsorted(np.asarray(cut_points[1:-1], dtype=np.float64), x, side='left')
+    missing: np.array = np.isnan(x) | (x == cut_points[0])
+    if missing.any():
+        return np.where(missing, np.nan, intervals)
+    return intervals
+
+
+def _column_cut_points(x: np.array, class_data: np.array, n_bins: int = None) -> list[float]:
+    """
+    Calculate the MDL cut points of a column
+
+    :param x: attribute values
+    :param class_data: class codes
+    :param n_bins: maximum number of quantile bins of the approximate MDL, exact MDL if None
+    :return: cut points, starting at -inf and ending at inf
+    """
+    return MDL(x, class_data) if n_bins is None else approximate_MDL(x, class_data, n_bins)
+
+
+def _cut_points_task(task: tuple[np.array, int]) -> list[list[float]]:
+    """
+    Calculate the cut points of a block of columns inside a worker process, using the dataset in shared memory
+
+    :param task: block column indexes and maximum number of bins of the approximate MDL
+    :return: cut points of each column of the block
+    """
+    columns_idx, n_bins = task
+    class_data: np.array = get_worker_data('class')
+    data: np.array = get_worker_data('data')
+    return [_column_cut_points(data[:, j], class_data, n_bins) for j in columns_idx]
+
+
+def mdl_cut_points(class_data: np.array, features: np.array, n_bins: int = None, n_jobs: int = 1) -> list[list[float]]:
+    """
+    Calculate the MDL cut points of the features, one column at a time
+
+    :param class_data: class codes
+    :param features: N x M features values, column major
+    :param n_bins: maximum number of quantile bins of each feature for the approximate MDL, the higher the closer to
+    the exact cut points. Exact MDL if None
+    :param n_jobs: number of processes to discretize the columns, -1 to use all cores, default value 1
+    :return: cut points of each feature, starting at -inf and ending at inf
+    """
+    n_jobs = get_n_jobs(n_jobs)
+    if n_jobs == 1 or features.shape[1] <= 1:
+        cut_points: list[list[float]] = list()
+        next_log: datetime = datetime.datetime.now() + LOG_INTERVAL
+        for j in range(features.shape[1]):
+            now = datetime.datetime.now()
+            if next_log < now:
+                next_log = now + LOG_INTERVAL
+                logging.info(f"Discretizing... {round((j + 1) / features.shape[1] * 100, 2)}%")
+            cut_points.append(_column_cut_points(features[:, j], class_data, n_bins))
+    else:
+        tasks: list[tuple[np.array, int]] = [(block, n_bins)
+                                             for block in get_features_blocks(features.shape[1], n_jobs * 4)]
+        cut_points: list[list[float]] = list()
+        with shared_dataset_pool({'class': class_data, 'data': features}, n_jobs) as executor:
+            next_log: datetime = datetime.datetime.now() + LOG_INTERVAL
+            for i, block_cut_points in enumerate(executor.map(_cut_points_task, tasks)):
+                now = datetime.datetime.now()
+                if next_log < now:
+                    next_log = now + LOG_INTERVAL
+                    logging.info(f"Discretizing... {round((i + 1) / len(tasks) * 100, 2)}%")
+                cut_points.extend(block_cut_points)
+    return cut_points
+
+
+# discretization strategies by name, each one gets the class codes, the features values (column major), the number of
+# bins and the number of processes, and returns the cut points of each feature
+DISCRETIZATION_STRATEGIES: dict[str, function] = {
+    'mdl': mdl_cut_points,
+    'equal_frequency': equal_frequency_cut_points,
+    'equal_width': equal_width_cut_points,
+    'chi_merge': chi_merge_cut_points
+}
+
+DEFAULT_STRATEGY: str = 'mdl'
+
+
+def register_strategy(name: str, strategy: function) -> None:
+    """
+    Register a discretization strategy
+
+    :param name: strategy name
+    :param strategy: function that gets the class codes, the N x M features values, the number of bins and the number
+    of processes, and returns the cut points of each feature, starting at -inf and ending at inf
+    """
+    DISCRETIZATION_STRATEGIES[name] = strategy
+
+
+def get_cut_points(data: pandas.DataFrame, n_jobs: int = 1, n_bins: int = None,
+                   strategy: str = DEFAULT_STRATEGY) -> list[list[float]]:
+    """
+    Calculate the cut points of the numeric features
+
+    :param data: dataset to discretize, with the class in the first column
+    :param n_jobs: number of processes to discretize the columns, -1 to use all cores, default value 1
+    :param n_bins: number of bins of the strategy, for MDL the maximum number of quantile bins of each feature of the
+    approximate MDL (exact MDL if None)
+    :param strategy: name of the discretization strategy, one of DISCRETIZATION_STRATEGIES
+    :return: cut points of each feature, starting at -inf and ending at inf
+    """
+    if strategy not in DISCRETIZATION_STRATEGIES:
+        raise ValueError(f"Unknown discretization strategy {strategy}, use one of {list(DISCRETIZATION_STRATEGIES)}")
+    class_data: np.array = data.iloc[:, 0].to_numpy()
+    # column major, so every column is a contiguous slice
+    features: np.array = np.asfortranarray(data.iloc[:, 1:].to_numpy(dtype=np.float64))
+    return DISCRETIZATION_STRATEGIES[strategy](class_data, features, n_bins, n_jobs)
+
+
+def discretize_with_cut_points(data: pandas.DataFrame, cut_points: list[list[float]]) -> pandas.DataFrame:
+    """
+    Discretize the numeric features with known cut points
+
+    :param data: dataset to discretize, with the class in the first column
+    :param cut_points: cut points of each feature, starting at -inf and ending at inf
+    :return: discretized dataset
+    """
+    columns: list[str] = data.columns
+    features: np.array = np.asfortranarray(data.iloc[:, 1:].to_numpy(dtype=np.float64))
+    discretized: dict[str, np.array] = {columns[j + 1]: apply_cut_points(features[:, j], cut_points[j])
+                                        for j in range(features.shape[1])}
+    return pandas.concat([data.iloc[:, :1], pandas.DataFrame(discretized, index=data.index)], axis=1)
+
+
+def discretize(data: pandas.DataFrame, n_jobs: int = 1) -> pandas.DataFrame:
     """
     Discretize numeric features
 
     :param data: dataset to discretize
+    :param n_jobs: number of processes to discretize the columns, -1 to use all cores, default value 1
     :return: discretized dataset
     """
-    columns: list[str] = data.columns
-    next_log: datetime = datetime.datetime.now() + LOG_INTERVAL
-    for i in range(1, data.shape[1]):
-        now = datetime.datetime.now()
-        if next_log < now:
-            next_log = now + LOG_INTERVAL
-            logging.info(f"Discretizing... {round(i / len(columns) * 100, 2)}%")
-        cut_points = MDL(data[columns[i]].tolist(), data[columns[0]].tolist())
-        data[columns[i]] = pandas.cut(data[columns[i]], cut_points, labels=False)
-    return data
+    return discretize_with_cut_points(data, get_cut_points(data, n_jobs))
 
 
-def supervised_discretization(data: pandas.DataFrame) -> pandas.DataFrame:
+def supervised_discretization(data: pandas.DataFrame, n_jobs: int = 1) -> pandas.DataFrame:
     """
     supervised discretization of the features, removing tuples that don't have class
 
     :param data: dataset to discretize
+    :param n_jobs: number of processes to discretize the columns, -1 to use all cores, default value 1
     :return: discretized dataset without missing class values
     """
     complete: pandas.Series = data.iloc[:, 0].notna()
     all_complete: bool = complete.all()
     if not all_complete:
         new_data = data[complete]
-        return discretize(new_data)
+        return discretize(new_data, n_jobs)
     else:
-        return discretize(data)
+        return discretize(data, n_jobs)
 
 
-def discretize_all(data: pandas.DataFrame) -> pandas.DataFrame:
+def discretize_all(data: pandas.DataFrame, n_jobs: int = 1) -> pandas.DataFrame:
     """
     Discretize all columns of the dataset
 
     :param data: dataset to discretize
+    :param n_jobs: number of processes to discretize the columns, -1 to use all cores, default value 1
     :return: discretized numeric dataset, without missing class values
     """
     new_data: pandas.DataFrame = data.copy()
     class_col: str = data.columns[0]
-    # Discretize the class column - if it's not categorical, use quantiles, otherwise use the number of classes
-    if not isinstance(data[class_col], CategoricalDtype) and len(data[class_col].value_counts()) > 5:
-        new_data[class_col] = pandas.qcut(data[class_col], 5, labels=False, duplicates='drop')
-    else:
-        n_classes = np.unique(data[class_col]).shape[0]
-        new_data[class_col] = pandas.cut(data[class_col], n_classes, labels=False, duplicates='drop')
-    new_data = supervised_discretization(new_data)
+    new_data[class_col] = discretize_class(data[class_col], get_class_bins(data[class_col]))
+    new_data = supervised_discretization(new_data, n_jobs)
     return new_data
+
+
+def get_class_bins(class_data: pandas.Series) -> np.array:
+    """
+    Get the bins of the class column - if it's not categorical, use quantiles, otherwise use the number of classes.
+    The outer bins are open, so the values of new data outside the range go to the first and last classes
+
+    :param class_data: class column
+    :return: class bins
+    """
+    if not isinstance(class_data, CategoricalDtype) and len(class_data.value_counts()) > 5:
+        _, bins = pandas.qcut(class_data, 5, retbins=True, duplicates='drop')
+    else:
+        n_classes = np.unique(class_data).shape[0]
+        _, bins = pandas.cut(class_data, n_classes, retbins=True, duplicates='drop')
+    bins = np.asarray(bins, dtype=np.float64).copy()
+    bins[0], bins[-1] = float('-inf'), float('inf')
+    return bins
+
+
+def discretize_class(class_data: pandas.Series, bins: np.array) -> pandas.Series:
+    """
+    Discretize the class column
+
+    :param class_data: class column
+    :param bins: class bins
+    :return: class of each instance, NaN for the missing values
+    """
+    return pandas.cut(class_data, bins, labels=False)
+
+
+def get_codes_dtype(max_code: int) -> np.dtype:
+    """
+    Get the smallest unsigned integer type able to hold the codes
+
+    :param max_code: maximum code
+    :return: numpy type of the codes
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if max_code <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def get_codes_matrix(data: pandas.DataFrame) -> tuple[np.array, np.array, np.array]:
+    """
+    Convert a discretized dataset to the compact representation used by the algorithm: the class codes, a C-contiguous
+    matrix with the interval code of each feature (the missing values get the reserved code MISSING_CODE) and the
+    features names
+
+    :param data: discretized dataset, with the class in the first column
+    :return: class codes, features codes matrix and features names
+    """
+    class_data: np.array = data.iloc[:, 0].to_numpy()
+    class_data = class_data.astype(get_codes_dtype(int(class_data.max()) if class_data.size > 0 else 0))
+
+    features: np.array = data.iloc[:, 1:].to_numpy(dtype=np.float64)
+    missing: np.array = np.isnan(features)
+    codes: np.array = np.where(missing, MISSING_CODE, features + 1)
+    codes = np.ascontiguousarray(codes, dtype=get_codes_dtype(int(codes.max()) if codes.size > 0 else 0))
+
+    return class_data, codes, data.columns[1:].to_numpy()
+
+
+class Discretizer:
+    """
+    Discretization model, fitted once on a dataset and applied to it or to new data of the same source. It keeps the
+    factorization maps of the non-numeric columns, the class bins and the MDL cut points of each feature
+    """
+    # version of the discretization, changes when the same data and model give a different discretization
+    VERSION: int = 1
+
+    __strategy: str
+    __n_bins: int
+    __columns: np.array
+    __factors: dict[Any, np.array]
+    __class_bins: np.array
+    __cut_points: list[list[float]]
+
+    def __init__(self, n_bins: int = None, strategy: str = DEFAULT_STRATEGY):
+        """
+        Creates a discretization model to fit
+
+        :param n_bins: maximum number of quantile bins of each feature for the approximate MDL, for datasets with many
+        rows. The higher the closer to the exact cut points. Exact MDL if None. The number of bins of the other
+        strategies
+        :param strategy: name of the discretization strategy of the features, one of DISCRETIZATION_STRATEGIES
+        """
+        if strategy not in DISCRETIZATION_STRATEGIES:
+            raise ValueError(f"Unknown discretization strategy {strategy}, "
+                             f"use one of {list(DISCRETIZATION_STRATEGIES)}")
+        self.__strategy = strategy
+        self.__n_bins = n_bins
+        self.__columns = None
+        self.__factors = dict()
+        self.__class_bins = None
+        self.__cut_points = None
+
+    def fit(self, data: pandas.DataFrame, n_jobs: int = 1) -> 'Discretizer':
+        """
+        Fit the discretization model to a dataset
+
+        :param data: dataset, with the class in the first column
+        :param n_jobs: number of processes to discretize the columns, -1 to use all cores, default value 1
+        :return: the fitted model
+        """
+        self.__columns = data.columns.to_numpy()
+        self.__factors = {column: pandas.factorize(data[column], sort=True)[1].to_numpy()
+                          for column in data.columns if _is_factor_column(data[column])}
+        self.__class_bins = get_class_bins(self.__factorize(data.iloc[:, :1]).iloc[:, 0])
+        self.__cut_points = get_cut_points(self.__prepare(data), n_jobs, self.__n_bins, self.__strategy)
+        return self
+
+    def transform(self, data: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        Discretize a dataset with the fitted model, removing tuples that don't have class
+
+        :param data: dataset with the columns of the fitted dataset, with the class in the first column
+        :return: discretized numeric dataset
+        """
+        if not self.is_fitted():
+            raise ValueError("The discretizer isn't fitted")
+        return discretize_with_cut_points(self.__prepare(data), self.__cut_points)
+
+    def fit_transform(self, data: pandas.DataFrame, n_jobs: int = 1) -> pandas.DataFrame:
+        """
+        Fit the discretization model to a dataset and discretize it
+
+        :param data: dataset, with the class in the first column
+        :param n_jobs: number of processes to discretize the columns, -1 to use all cores, default value 1
+        :return: discretized numeric dataset, without missing class values
+        """
+        return self.fit(data, n_jobs).transform(data)
+
+    def is_fitted(self) -> bool:
+        """
+        Check if the model is fitted
+
+        :return: True if the model is fitted
+        """
+        return self.__cut_points is not None
+
+    def get_settings(self) -> dict[str, Any]:
+        """
+        Get the settings of the model, the same data and settings give the same discretization
+
+        :return: settings by name
+        """
+        return {'strategy': self.__strategy, 'n_bins': self.__n_bins}
+
+    def get_approximation_report(self, data: pandas.DataFrame, n_jobs: int = 1) -> pandas.DataFrame:
+        """
+        Compare the cut points of the approximate MDL (or of other strategy) with the exact ones, running the exact MDL
+        on a dataset
+
+        :param data: dataset with the columns of the fitted dataset, with the class in the first column
+        :param n_jobs: number of processes to discretize the columns, -1 to use all cores, default value 1
+        :return: number of exact and approximate cut points of each feature, the distance between them (the largest
+        distance from a cut point to the nearest one of the other discretization) and that distance relative to the
+        range of the feature
+        """
+        if not self.is_fitted():
+            raise ValueError("The discretizer isn't fitted")
+        new_data: pandas.DataFrame = self.__prepare(data)
+        exact: list[list[float]] = get_cut_points(new_data, n_jobs)
+        distances: np.array = np.array([cut_points_distance(exact[j], self.__cut_points[j])
+                                        for j in range(len(exact))])
+        features: pandas.DataFrame = new_data.iloc[:, 1:]
+        return pandas.DataFrame({'Exact Cut Points': [len(c) - 2 for c in exact],
+                                 'Approximate Cut Points': [len(c) - 2 for c in self.__cut_points],
+                                 'Distance': distances,
+                                 'Relative Distance': distances / (features.max() - features.min()).to_numpy()
+                                 }, index=features.columns)
+
+    def get_cut_points(self) -> dict[Any, list[float]]:
+        """
+        Get the cut points of the features
+
+        :return: cut points of each feature, starting at -inf and ending at inf
+        """
+        return dict(zip(self.__columns[1:], self.__cut_points))
+
+    def save(self, path: str) -> None:
+        """
+        Save the fitted model to a compressed numpy file
+
+        :param path: file path
+        """
+        if not self.is_fitted():
+            raise ValueError("The discretizer isn't fitted")
+        factors_idx: list[int] = [i for i, column in enumerate(self.__columns) if column in self.__factors]
+        arrays: dict[str, np.array] = {
+            'version': np.array(self.VERSION),
+            # 0 for the exact MDL
+            'n_bins': np.array(self.__n_bins or 0),
+            'strategy': np.array(self.__strategy),
+            'columns': to_saved_array(self.__columns),
+            'class_bins': self.__class_bins,
+            # inner cut points of all features, each feature starts at its offset
+            'cut_points': np.concatenate([np.zeros(0)] + [np.asarray(c[1:-1]) for c in self.__cut_points]),
+            'cut_points_offsets': np.cumsum([0] + [len(c) - 2 for c in self.__cut_points]),
+            'factors': np.array(factors_idx, dtype=np.int64)
+        }
+        for i in factors_idx:
+            arrays[f'factor_{i}'] = to_saved_array(self.__factors[self.__columns[i]])
+        with open(path, 'wb') as file:
+            np.savez_compressed(file, **arrays)
+
+    @staticmethod
+    def load(path: str) -> 'Discretizer':
+        """
+        Load a fitted model saved with save
+
+        :param path: file path
+        :return: the fitted model
+        """
+        with np.load(path, allow_pickle=False) as arrays:
+            if int(arrays['version']) != Discretizer.VERSION:
+                raise ValueError(f"The discretizer version {int(arrays['version'])} isn't supported")
+            discretizer: Discretizer = Discretizer(int(arrays['n_bins']) or None)
+            # the strategy isn't needed to apply the cut points, it may not be registered
+            discretizer.__strategy = str(arrays['strategy'])
+            discretizer.__columns = arrays['columns']
+            discretizer.__class_bins = arrays['class_bins']
+            cut_points: np.array = arrays['cut_points']
+            offsets: np.array = arrays['cut_points_offsets']
+            discretizer.__cut_points = [[float('-inf')] + cut_points[offsets[j]:offsets[j + 1]].tolist()
+                                        + [float('inf')] for j in range(len(offsets) - 1)]
+            discretizer.__factors = {discretizer.__columns[i]: arrays[f'factor_{i}'] for i in arrays['factors']}
+        return discretizer
+
+    def __prepare(self, data: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        Factorize a dataset and discretize its class with the fitted model, removing tuples that don't have class
+
+        :param data: dataset with the columns of the fitted dataset, with the class in the first column
+        :return: dataset with the class discretized and the numeric features to discretize
+        """
+        if data.columns[0] != self.__columns[0] or set(data.columns) != set(self.__columns):
+            raise ValueError("The dataset columns don't match the columns of the fitted discretizer")
+        new_data: pandas.DataFrame = self.__factorize(data[list(self.__columns)])
+
+        class_col: str = new_data.columns[0]
+        new_data[class_col] = discretize_class(new_data[class_col], self.__class_bins)
+        return new_data[new_data[class_col].notna()]
+
+    def __factorize(self, data: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        Discretize non-numeric features with the fitted factorization maps, the unknown values are missing values
+
+        :param data: dataset to discretize
+        :return: discretized dataset
+        """
+        d: pandas.DataFrame = data.copy()
+        for column in d.columns:
+            if column in self.__factors:
+                codes: np.array = pandas.Categorical(d[column], categories=self.__factors[column]).codes
+                # the unknown and missing values get the code -1, which would be discretized as a category
+                d[column] = np.where(codes == -1, np.nan, codes)
+        return d
+
+
+def to_saved_array(array: np.array) -> np.array:
+    """
+    Convert an array to a type that is saved without pickle
+
+    :param array: array to convert
+    :return: the array, with the objects as strings
+    """
+    array = np.asarray(array)
+    return array.astype(str) if array.dtype == object else array
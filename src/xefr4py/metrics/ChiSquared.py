@@ -1,6 +1,54 @@
 import numpy as np
 import pandas
 
+from xefr4py.metrics.ContingencyTables import contingency_tables, get_codes, get_contingency_tables, \
+    tables_batch_metric
+
+
+def chi_squared_from_tables(tables: np.array) -> np.array:
+    """
+    Calculate the chi squared (Cramér's V) of the features from their contingency tables
+
+    :param tables: M x number of classes x number of values contingency tables
+    :return: chi squared of each feature
+    """
+    # calculate the sum of the rows and columns
+    row_sums: np.array = tables.sum(axis=2)
+    col_sums: np.array = tables.sum(axis=1)
+    all_sums: np.array = row_sums.sum(axis=1)
+
+    # use the outer product of the sums to calculate the expected tables
+    with np.errstate(divide='ignore', invalid='ignore'):
+        expected: np.array = (row_sums[:, :, np.newaxis] * col_sums[:, np.newaxis, :]
+                              / all_sums[:, np.newaxis, np.newaxis])
+        # chis = sum((cont - expected) ^ 2 / expected), classes and values absent from the table are ignored
+        chis: np.array = np.where(expected > 0, np.square(tables - expected) / expected, 0).sum(axis=(1, 2))
+
+    # the degrees of freedom only count the classes and values present in the table
+    n_rows: np.array = np.count_nonzero(row_sums, axis=1)
+    n_cols: np.array = np.count_nonzero(col_sums, axis=1)
+    dof: np.array = np.minimum(n_cols - 1, n_rows - 1)
+
+    results: np.array = np.zeros(tables.shape[0])
+    valid: np.array = (chis != 0) & (dof > 0)
+    results[valid] = np.sqrt(chis[valid] / (all_sums[valid] * dof[valid]))
+    return results
+
+
+def chi_squared_batch(class_data: np.array, data: np.array, rows_weights: np.array, seeds: np.array = None,
+                      n_jobs: int = 1) -> np.array:
+    """
+    Calculate the chi squared (Cramér's V) of the features in several subsets at once
+
+    :param class_data: class codes
+    :param data: features codes matrix
+    :param rows_weights: number of subsets x N multiplicity of each row in each subset
+    :param seeds: seed of each subset (not used)
+    :param n_jobs: number of threads (not used)
+    :return: number of subsets x M chi squared of each feature
+    """
+    return tables_batch_metric(chi_squared_from_tables, class_data, data, rows_weights)
+
 
 def chi_aux(class_data: np.array, w: np.array) -> np.float64:
     """
@@ -10,37 +58,18 @@ def chi_aux(class_data: np.array, w: np.array) -> np.float64:
     :param w: feature values
     :return: chi squared of the feature
     """
-    # cont = table(class_data, w)
-    categories, cat_idx = np.unique(class_data, return_inverse=True)
-    values, val_idx = np.unique(w, return_inverse=True)
-    cont: np.array = np.zeros((len(categories), len(values)), dtype=np.uint64)
-    np.add.at(cont, (cat_idx, val_idx), 1)
-
-    # calculate the sum of the rows and columns
-    row_sums: np.array = np.sum(cont, axis=1)
-    col_sums: np.array = np.sum(cont, axis=0)
-    all_sum: int = np.sum(col_sums)
-
-    # use numpy outer to calculate the product of the sums
-    expected_matrix: np.array = np.outer(row_sums, col_sums) / all_sum
-
-    # chis = sum((cont - expected_matrix) ^ 2 / expected_matrix)
-    chis: np.float64 = np.sum(np.square(cont - expected_matrix) / expected_matrix)
-    if chis == 0 or len(col_sums) < 2 or len(row_sums) < 2:
-        return np.float64(0)
-    return np.sqrt(chis / (all_sum * min(len(col_sums) - 1, len(row_sums) - 1)))
+    class_codes: np.array = np.unique(class_data, return_inverse=True)[1]
+    codes: np.array = get_codes(np.asarray(w).reshape(-1, 1))
+    return np.float64(chi_squared_from_tables(contingency_tables(class_codes, codes))[0])
 
 
-def chi_squared(data: pandas.DataFrame) -> pandas.DataFrame:
+def chi_squared(data: pandas.DataFrame, weights: np.array = None) -> pandas.DataFrame:
     """
     Calculate the chi squared of the features
 
     :param data: dataset to calculate the chi squared of the features
+    :param weights: weight (multiplicity) of each row of the dataset, each row counts once if None
     :return: chi squared of the features of the dataset
     """
-    attr_names: list[str] = data.columns[1:]
-    np_data: np.array = data.to_numpy(np.uint)
-    np_class_data: np.array = np_data[:, 0]
-    #  calculate the chi squared of the features
-    np_results = np.apply_along_axis(lambda x: chi_aux(np_class_data, x), 0, np_data[:, 1:])
-    return pandas.DataFrame({"attr_importance": np_results}, index=attr_names)
+    return pandas.DataFrame({"attr_importance": chi_squared_from_tables(get_contingency_tables(data, weights))},
+                            index=data.columns[1:])
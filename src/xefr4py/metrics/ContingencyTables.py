@@ -0,0 +1,143 @@
+import function
+import numpy as np
+import pandas
+from scipy import sparse
+
+# maximum number of cells of the keys matrix built at once by the contingency tables (bounds the memory used)
+BLOCK_SIZE: int = 2 ** 22
+
+# maximum value of a column to be used as code without compacting it
+MAX_CODE: int = 2 ** 16
+
+
+def get_codes(data: np.array) -> np.array:
+    """
+    Get the codes of each column of the data, the codes are the dense rank of the values of each column (0 to number
+    of distinct values - 1), small non-negative integer data is used as is
+
+    :param data: N x M data matrix
+    :return: N x M codes matrix
+    """
+    data = np.asarray(data)
+    if data.size == 0 or (np.issubdtype(data.dtype, np.integer) and data.min() >= 0 and data.max() < MAX_CODE):
+        return data
+
+    # dense rank of the values of every column at once
+    order: np.array = np.argsort(data, axis=0, kind='stable')
+    sorted_data: np.array = np.take_along_axis(data, order, axis=0)
+    sorted_codes: np.array = np.concatenate([np.zeros((1, data.shape[1]), dtype=np.int64),
+                                             np.cumsum(sorted_data[1:] != sorted_data[:-1], axis=0)])
+    codes: np.array = np.empty(data.shape, dtype=np.int64)
+    np.put_along_axis(codes, order, sorted_codes, axis=0)
+    return codes
+
+
+def contingency_tables(class_data: np.array, data: np.array, weights: np.array = None) -> np.array:
+    """
+    Build the class x value contingency table of every feature in a single vectorized pass, the class and feature
+    values of each cell are offset encoded by feature and counted with one bincount
+
+    :param class_data: N class codes (0 to number of classes - 1)
+    :param data: N x M feature codes (0 to number of values - 1)
+    :param weights: N weights of the rows, each row counts once if None
+    :return: M x number of classes x number of values contingency tables
+    """
+    class_data = np.asarray(class_data, dtype=np.int64)
+    data = np.asarray(data)
+    n_features: int = data.shape[1]
+    n_classes: int = int(class_data.max()) + 1 if class_data.size > 0 else 1
+    n_values: int = int(data.max()) + 1 if data.size > 0 else 1
+    n_cells: int = n_classes * n_values
+
+    tables: np.array = np.zeros((n_features, n_cells))
+    block: int = max(1, BLOCK_SIZE // max(1, data.shape[0]))
+    for start in range(0, n_features, block):
+        stop: int = min(start + block, n_features)
+        # key of each cell: feature offset + class * number of values + value
+        keys: np.array = (class_data[:, np.newaxis] * n_values + data[:, start:stop].astype(np.int64)
+                          + np.arange(stop - start) * n_cells)
+        block_weights: np.array = None if weights is None else np.repeat(weights, stop - start)
+        tables[start:stop] = np.bincount(keys.ravel(), weights=block_weights,
+                                         minlength=(stop - start) * n_cells).reshape(stop - start, n_cells)
+    return tables.reshape(n_features, n_classes, n_values)
+
+
+def contingency_tables_batch(class_data: np.array, data: np.array, rows_weights: np.array) -> np.array:
+    """
+    Build the contingency tables of every feature in several subsets at once, the cell of each row and feature is a
+    sparse indicator matrix, so the tables of all the subsets are a single product with the weights of the rows
+
+    :param class_data: N class codes (0 to number of classes - 1)
+    :param data: N x M feature codes (0 to number of values - 1)
+    :param rows_weights: number of subsets x N multiplicity of each row in each subset
+    :return: number of subsets x M x number of classes x number of values contingency tables
+    """
+    class_data = np.asarray(class_data, dtype=np.int64)
+    data = np.asarray(data)
+    n_rows, n_features = data.shape
+    n_subsets: int = rows_weights.shape[0]
+    n_classes: int = int(class_data.max()) + 1 if class_data.size > 0 else 1
+    n_values: int = int(data.max()) + 1 if data.size > 0 else 1
+    n_cells: int = n_classes * n_values
+
+    # key of each cell: feature offset + class * number of values + value
+    keys: np.array = class_data[:, np.newaxis] * n_values + data.astype(np.int64) + np.arange(n_features) * n_cells
+    indicator: sparse.csr_matrix = sparse.csr_matrix(
+        (np.ones(keys.size), keys.ravel(), np.arange(n_rows + 1) * n_features),
+        shape=(n_rows, n_features * n_cells))
+    tables: np.array = np.asarray((indicator.T @ np.asarray(rows_weights, dtype=np.float64).T).T)
+    return tables.reshape(n_subsets, n_features, n_classes, n_values)
+
+
+def tables_batch_metric(tables_function: function, class_data: np.array, data: np.array,
+                        rows_weights: np.array) -> np.array:
+    """
+    Calculate a count based metric of the features in several subsets at once, the subsets are processed in blocks
+    that bound the memory used by their contingency tables
+
+    :param tables_function: function (M x classes x values contingency tables) -> M weights
+    :param class_data: N class codes (0 to number of classes - 1)
+    :param data: N x M feature codes (0 to number of values - 1)
+    :param rows_weights: number of subsets x N multiplicity of each row in each subset
+    :return: number of subsets x M weights
+    """
+    return tables_batch_metrics([tables_function], class_data, data, rows_weights)[:, 0, :]
+
+
+def tables_batch_metrics(tables_functions: list[function], class_data: np.array, data: np.array,
+                         rows_weights: np.array) -> np.array:
+    """
+    Calculate several count based metrics of the features in several subsets at once, the contingency tables of each
+    block of subsets are shared by all the metrics
+
+    :param tables_functions: functions (M x classes x values contingency tables) -> M weights
+    :param class_data: N class codes (0 to number of classes - 1)
+    :param data: N x M feature codes (0 to number of values - 1)
+    :param rows_weights: number of subsets x N multiplicity of each row in each subset
+    :return: number of subsets x number of metrics x M weights
+    """
+    n_subsets: int = rows_weights.shape[0]
+    n_features: int = data.shape[1]
+    n_cells: int = (int(np.max(class_data)) + 1 if len(class_data) > 0 else 1) * \
+        (int(data.max()) + 1 if data.size > 0 else 1)
+    results: np.array = np.zeros((n_subsets, len(tables_functions), n_features))
+    block: int = max(1, BLOCK_SIZE // max(1, n_features * n_cells))
+    for start in range(0, n_subsets if n_features > 0 else 0, block):
+        tables: np.array = contingency_tables_batch(class_data, data, rows_weights[start:start + block])
+        tables = tables.reshape(-1, tables.shape[2], tables.shape[3])
+        for i, tables_function in enumerate(tables_functions):
+            results[start:start + block, i] = tables_function(tables).reshape(-1, n_features)
+    return results
+
+
+def get_contingency_tables(data: pandas.DataFrame, weights: np.array = None) -> np.array:
+    """
+    Build the contingency tables of a dataset
+
+    :param data: dataset with the class in the first column
+    :param weights: weight (multiplicity) of each row of the dataset, each row counts once if None
+    :return: M x number of classes x number of values contingency tables of the features
+    """
+    np_data: np.array = data.to_numpy(np.uint)
+    class_data: np.array = np.unique(np_data[:, 0], return_inverse=True)[1]
+    return contingency_tables(class_data, get_codes(np_data[:, 1:]), weights)
@@ -2,8 +2,12 @@ from enum import Enum
 
 import numpy as np
 import pandas
+from scipy.special import entr
 from scipy.stats import entropy
 
+from xefr4py.metrics.ContingencyTables import contingency_tables, get_codes, get_contingency_tables, \
+    tables_batch_metric
+
 
 class InformationGain(Enum):
     """
@@ -21,62 +25,133 @@ def entropy_helper(x: np.array) -> float:
     :return: entropy of the column
     """
     if len(x.shape) == 2:
-        # Create a contingency table
-        features, fet_idx = np.unique(x[:, 0], return_inverse=True)
-        values, val_idx = np.unique(x[:, 1], return_inverse=True)
-        cont: np.array = np.zeros((len(features), len(values)), dtype=np.uint64)
-        np.add.at(cont, (fet_idx, val_idx), 1)
-
-        # Flatten the table to a 1D array
-        table = cont.flatten()
+        # Create a contingency table and flatten it to a 1D array
+        class_codes: np.array = np.unique(x[:, 0], return_inverse=True)[1]
+        table = contingency_tables(class_codes, get_codes(x[:, 1:2])).flatten()
     else:
         table = np.unique(x, return_counts=True)[1]
     return entropy(table)
 
 
-def information_gain_body(data: pandas.DataFrame, metric: InformationGain) -> pandas.DataFrame:
+def _entropies(counts: np.array) -> np.array:
     """
-    Auxiliary method for the information gain methods
+    Calculates the entropy of each row of a counts matrix, like the scipy entropy of each row
 
-    :param data: dataset to calculate the metric
+    :param counts: matrix with a counts distribution in each row
+    :return: entropy of each row
+    """
+    totals: np.array = counts.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return entr(counts / totals).sum(axis=1)
+
+
+def information_gain_from_tables(tables: np.array, metric: InformationGain) -> np.array:
+    """
+    Calculate an information gain metric of the features from their contingency tables
+
+    :param tables: M x number of classes x number of values contingency tables
     :param metric: specify the information metric
-    :return: return a dataset with the attribute importance
+    :return: the metric of each feature
     """
-    attr_names: [str] = data.columns[1:]
-    data: np.array = data.to_numpy(dtype=np.uint)
-    attr_entropies: np.array = np.apply_along_axis(entropy_helper, 0, data)
-    # noinspection PyTypeChecker
-    class_entropy: float = attr_entropies[0]
-    attr_entropies = attr_entropies[1:]
-    class_data: np.array = data[:, 0]
-    joint_entropies: np.array = np.apply_along_axis(lambda x: entropy_helper(np.array([class_data, x]).transpose()),
-                                                    0, data[:, 1:])
-    results: np.array = class_entropy + attr_entropies - joint_entropies
+    n_features: int = tables.shape[0]
+    if n_features == 0:
+        return np.zeros(0)
+    # the class entropy of each table, so tables of different subsets can be evaluated together
+    class_entropies: np.array = _entropies(tables.sum(axis=2))
+    attr_entropies: np.array = _entropies(tables.sum(axis=1))
+    joint_entropies: np.array = _entropies(tables.reshape(n_features, -1))
+    results: np.array = class_entropies + attr_entropies - joint_entropies
     if metric == InformationGain.GAIN_RATIO:
         # can't use numpy.where because of division by 0
         non_zero_mask: np.array = attr_entropies != 0
         results[non_zero_mask] = np.divide(results[non_zero_mask], attr_entropies[non_zero_mask])
         results[~non_zero_mask] = 0
     elif metric == InformationGain.SYMMETRICAL_UNCERTAINTY:
-        results = 2 * results / (attr_entropies + class_entropy)
-    return pandas.DataFrame({"attr_importance": results}, index=attr_names)
+        results = 2 * results / (attr_entropies + class_entropies)
+    return results
+
+
+def gain_ratio_from_tables(tables: np.array) -> np.array:
+    """
+    Calculate the gain ratio of the features from their contingency tables
+
+    :param tables: M x number of classes x number of values contingency tables
+    :return: gain ratio of each feature
+    """
+    return information_gain_from_tables(tables, InformationGain.GAIN_RATIO)
+
+
+def symmetrical_uncertainty_from_tables(tables: np.array) -> np.array:
+    """
+    Calculate the symmetrical uncertainty of the features from their contingency tables
+
+    :param tables: M x number of classes x number of values contingency tables
+    :return: symmetrical uncertainty of each feature
+    """
+    return information_gain_from_tables(tables, InformationGain.SYMMETRICAL_UNCERTAINTY)
+
+
+def gain_ratio_batch(class_data: np.array, data: np.array, rows_weights: np.array, seeds: np.array = None,
+                     n_jobs: int = 1) -> np.array:
+    """
+    Calculate the gain ratio of the features in several subsets at once
+
+    :param class_data: class codes
+    :param data: features codes matrix
+    :param rows_weights: number of subsets x N multiplicity of each row in each subset
+    :param seeds: seed of each subset (not used)
+    :param n_jobs: number of threads (not used)
+    :return: number of subsets x M gain ratio of each feature
+    """
+    return tables_batch_metric(gain_ratio_from_tables, class_data, data, rows_weights)
+
+
+def symmetrical_uncertainty_batch(class_data: np.array, data: np.array, rows_weights: np.array,
+                                  seeds: np.array = None, n_jobs: int = 1) -> np.array:
+    """
+    Calculate the symmetrical uncertainty of the features in several subsets at once
+
+    :param class_data: class codes
+    :param data: features codes matrix
+    :param rows_weights: number of subsets x N multiplicity of each row in each subset
+    :param seeds: seed of each subset (not used)
+    :param n_jobs: number of threads (not used)
+    :return: number of subsets x M symmetrical uncertainty of each feature
+    """
+    return tables_batch_metric(symmetrical_uncertainty_from_tables, class_data, data, rows_weights)
+
+
+def information_gain_body(data: pandas.DataFrame, metric: InformationGain,
+                          weights: np.array = None) -> pandas.DataFrame:
+    """
+    Auxiliary method for the information gain methods
+
+    :param data: dataset to calculate the metric
+    :param metric: specify the information metric
+    :param weights: weight (multiplicity) of each row of the dataset, each row counts once if None
+    :return: return a dataset with the attribute importance
+    """
+    results: np.array = information_gain_from_tables(get_contingency_tables(data, weights), metric)
+    return pandas.DataFrame({"attr_importance": results}, index=data.columns[1:])
 
 
-def gain_ratio(data: pandas.DataFrame) -> pandas.DataFrame:
+def gain_ratio(data: pandas.DataFrame, weights: np.array = None) -> pandas.DataFrame:
     """
     Calculate the gain ratio for the dataset
 
     :param data: dataset to use
+    :param weights: weight (multiplicity) of each row of the dataset, each row counts once if None
     :return: gain ratio of the dataset
     """
-    return information_gain_body(data, metric=InformationGain.GAIN_RATIO)
+    return information_gain_body(data, metric=InformationGain.GAIN_RATIO, weights=weights)
 
 
-def symmetrical_uncertainty(data: pandas.DataFrame) -> pandas.DataFrame:
+def symmetrical_uncertainty(data: pandas.DataFrame, weights: np.array = None) -> pandas.DataFrame:
     """
     Calculate the symmetrical uncertainty for the dataset
 
     :param data: dataset to use
+    :param weights: weight (multiplicity) of each row of the dataset, each row counts once if None
     :return: symmetrical uncertainty of the dataset
     """
-    return information_gain_body(data, metric=InformationGain.SYMMETRICAL_UNCERTAINTY)
+    return information_gain_body(data, metric=InformationGain.SYMMETRICAL_UNCERTAINTY, weights=weights)
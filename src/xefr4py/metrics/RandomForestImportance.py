@@ -1,5 +1,158 @@
+from enum import Enum
+
+import numpy as np
 import pandas
-from sklearn.ensemble import RandomForestRegressor
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier, ExtraTreesRegressor, \
+    ExtraTreesClassifier
+from sklearn.tree import DecisionTreeRegressor, DecisionTreeClassifier, ExtraTreeRegressor, ExtraTreeClassifier
+
+# number of trees of the fast extra trees option
+EXTRA_TREES_ESTIMATORS: int = 50
+
+
+class ForestType(Enum):
+    """
+    Enum with the supported tree ensembles
+    """
+    RANDOM_FOREST_REGRESSOR = "random_forest_regressor"
+    RANDOM_FOREST_CLASSIFIER = "random_forest_classifier"
+    EXTRA_TREES_REGRESSOR = "extra_trees_regressor"
+    EXTRA_TREES_CLASSIFIER = "extra_trees_classifier"
+
+
+# scikit-learn estimator of each tree ensemble
+FORESTS: dict[ForestType, type] = {
+    ForestType.RANDOM_FOREST_REGRESSOR: RandomForestRegressor,
+    ForestType.RANDOM_FOREST_CLASSIFIER: RandomForestClassifier,
+    ForestType.EXTRA_TREES_REGRESSOR: ExtraTreesRegressor,
+    ForestType.EXTRA_TREES_CLASSIFIER: ExtraTreesClassifier
+}
+
+# scikit-learn tree of each tree ensemble
+TREES: dict[ForestType, type] = {
+    ForestType.RANDOM_FOREST_REGRESSOR: DecisionTreeRegressor,
+    ForestType.RANDOM_FOREST_CLASSIFIER: DecisionTreeClassifier,
+    ForestType.EXTRA_TREES_REGRESSOR: ExtraTreeRegressor,
+    ForestType.EXTRA_TREES_CLASSIFIER: ExtraTreeClassifier
+}
+
+
+class ForestImportance:
+    """
+    Configurable tree ensemble importance metric, it can be used in the metrics list as the functions of Metric.
+    The number of threads of each forest follows the joblib configuration of the pipeline unless n_jobs is given.
+    With trees_per_subset the forest is the ensemble: a single forest is grown with a group of trees per subset,
+    trained on the rows of that subset, instead of a new forest per subset
+    """
+
+    def __init__(self, forest_type: ForestType = ForestType.RANDOM_FOREST_REGRESSOR, n_estimators: int = 100,
+                 max_depth: int = None, max_features: float | int | str = 1.0, max_samples: float | int = None,
+                 n_jobs: int = None, trees_per_subset: int = None):
+        """
+        Create a tree ensemble importance metric
+
+        :param forest_type: tree ensemble to use, default value random forest regressor
+        :param n_estimators: number of trees, default value 100
+        :param max_depth: maximum depth of the trees, None for no limit, default value None
+        :param max_features: features considered in each split (fraction, number, 'sqrt' or 'log2'), default value all
+        :param max_samples: rows drawn with replacement to train each tree (fraction or number), None for as many as
+                            the subset rows, default value None
+        :param n_jobs: number of threads of each forest, None to follow the pipeline, default value None
+        :param trees_per_subset: number of trees grown on each subset, None to fit a new forest per subset,
+                                 default value None
+        """
+        self.forest_type: ForestType = forest_type
+        self.n_estimators: int = n_estimators
+        self.max_depth: int = max_depth
+        self.max_features: float | int | str = max_features
+        self.max_samples: float | int = max_samples
+        self.n_jobs: int = n_jobs
+        self.trees_per_subset: int = trees_per_subset
+        self.__name__: str = f'{forest_type.value}_importance'
+
+    def get_forest(self):
+        """
+        Create the scikit-learn estimator of the metric, the extra trees only draw rows when max_samples is given
+
+        :return: the unfitted estimator
+        """
+        bootstrap: bool = self.max_samples is not None or self.forest_type in (ForestType.RANDOM_FOREST_REGRESSOR,
+                                                                               ForestType.RANDOM_FOREST_CLASSIFIER)
+        return FORESTS[self.forest_type](n_estimators=self.n_estimators, max_depth=self.max_depth,
+                                         max_features=self.max_features, bootstrap=bootstrap,
+                                         max_samples=self.max_samples, n_jobs=self.n_jobs)
+
+    def __call__(self, dataset: pandas.DataFrame) -> pandas.DataFrame:
+        """
+        Returns the importance of the features based on the tree ensemble
+
+        :param dataset: dataset that wants to calculate the importance of the features
+        :return: importance of the features
+        """
+        return pandas.DataFrame({"attr_importance": self.from_codes(dataset[dataset.columns[0]].to_numpy(),
+                                                                    dataset.iloc[:, 1:].to_numpy())},
+                                index=dataset.columns[1:])
+
+    def from_codes(self, class_data: np.array, data: np.array) -> np.array:
+        """
+        Returns the importance of the features based on the tree ensemble, using the codes matrix directly
+
+        :param class_data: class codes
+        :param data: features codes matrix
+        :return: importance of each feature
+        """
+        forest = self.get_forest()
+        forest.fit(data, class_data)
+        return forest.feature_importances_
+
+    def get_tree(self, random_state: int):
+        """
+        Create a scikit-learn tree of the ensemble of the metric
+
+        :param random_state: seed of the tree
+        :return: the unfitted tree
+        """
+        return TREES[self.forest_type](max_depth=self.max_depth, max_features=self.max_features,
+                                       random_state=random_state)
+
+    def __fit_subset_trees(self, class_data: np.array, data: np.array, weights: np.array, seed: int) -> np.array:
+        """
+        Grow the group of trees of a subset, each row weighted by its multiplicity like the bootstrap of a forest
+
+        :param class_data: class codes
+        :param data: features codes matrix
+        :param weights: N multiplicity of each row in the subset
+        :param seed: subset seed
+        :return: mean importance of each feature in the trees of the subset
+        """
+        rows: np.array = np.flatnonzero(weights)
+        importances: np.array = np.zeros(data.shape[1])
+        for random_state in np.random.RandomState(seed).randint(0, 2 ** 31 - 1, self.trees_per_subset):
+            tree = self.get_tree(random_state)
+            tree.fit(data[rows], class_data[rows], sample_weight=weights[rows])
+            importances += tree.feature_importances_
+        return importances / self.trees_per_subset
+
+    def subsets_importances(self, class_data: np.array, data: np.array, rows_weights: np.array, seeds: np.array,
+                            n_jobs: int = 1) -> np.array:
+        """
+        Grow the forest as the ensemble, a group of trees per subset grown in parallel threads, the max_samples of the
+        forest is not used, the rows of each tree are the rows of its subset
+
+        :param class_data: class codes
+        :param data: features codes matrix
+        :param rows_weights: number of subsets x N multiplicity of each row in each subset
+        :param seeds: seed of each subset
+        :param n_jobs: number of threads, used if the metric doesn't set n_jobs, -1 to use all cores, default value 1
+        :return: number of subsets x M importances
+        """
+        n_threads: int = self.n_jobs if self.n_jobs is not None else n_jobs
+        importances: list[np.array] = Parallel(n_jobs=n_threads, prefer='threads')(
+            delayed(self.__fit_subset_trees)(class_data, data, weights, seed)
+            for weights, seed in zip(rows_weights, seeds)
+        )
+        return np.array(importances).reshape(len(rows_weights), data.shape[1])
 
 
 def r_forest_importance2(dataset: pandas.DataFrame) -> pandas.DataFrame:
@@ -12,3 +165,60 @@ def r_forest_importance2(dataset: pandas.DataFrame) -> pandas.DataFrame:
     rf: RandomForestRegressor = RandomForestRegressor()
     rf.fit(dataset.iloc[:, 1:], dataset[dataset.columns[0]])
     return pandas.DataFrame({"attr_importance": rf.feature_importances_}, index=dataset.columns[1:])
+
+
+def r_forest_importance_from_codes(class_data: np.array, data: np.array) -> np.array:
+    """
+    Returns the importance of de features based on the random forest regressor, using the codes matrix directly
+
+    :param class_data: class codes
+    :param data: features codes matrix
+    :return: importance of each feature
+    """
+    rf: RandomForestRegressor = RandomForestRegressor()
+    rf.fit(data, class_data)
+    return rf.feature_importances_
+
+
+def r_forest_classifier_importance(dataset: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Returns the importance of the features based on the random forest classifier, the class codes are labels
+
+    :param dataset: dataset that wants to calculate the importance of the features
+    :return: importance of the features
+    """
+    return ForestImportance(ForestType.RANDOM_FOREST_CLASSIFIER, max_features='sqrt')(dataset)
+
+
+def r_forest_classifier_importance_from_codes(class_data: np.array, data: np.array) -> np.array:
+    """
+    Returns the importance of the features based on the random forest classifier, using the codes matrix directly
+
+    :param class_data: class codes
+    :param data: features codes matrix
+    :return: importance of each feature
+    """
+    return ForestImportance(ForestType.RANDOM_FOREST_CLASSIFIER, max_features='sqrt').from_codes(class_data, data)
+
+
+def extra_trees_importance(dataset: pandas.DataFrame) -> pandas.DataFrame:
+    """
+    Returns the importance of the features based on a small extra trees classifier, a fast alternative to the random
+    forest, the split points are drawn at random instead of searched
+
+    :param dataset: dataset that wants to calculate the importance of the features
+    :return: importance of the features
+    """
+    return ForestImportance(ForestType.EXTRA_TREES_CLASSIFIER, EXTRA_TREES_ESTIMATORS, max_features='sqrt')(dataset)
+
+
+def extra_trees_importance_from_codes(class_data: np.array, data: np.array) -> np.array:
+    """
+    Returns the importance of the features based on a small extra trees classifier, using the codes matrix directly
+
+    :param class_data: class codes
+    :param data: features codes matrix
+    :return: importance of each feature
+    """
+    return ForestImportance(ForestType.EXTRA_TREES_CLASSIFIER, EXTRA_TREES_ESTIMATORS,
+                            max_features='sqrt').from_codes(class_data, data)
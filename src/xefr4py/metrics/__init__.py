@@ -1,8 +1,16 @@
 from enum import Enum
 
-from xefr4py.metrics.ChiSquared import chi_squared
-from xefr4py.metrics.InformationGain import gain_ratio, symmetrical_uncertainty
-from xefr4py.metrics.RandomForestImportance import r_forest_importance2
+import function
+import numpy as np
+import pandas
+
+from xefr4py.metrics.ChiSquared import chi_squared, chi_squared_from_tables, chi_squared_batch
+from xefr4py.metrics.ContingencyTables import get_contingency_tables, contingency_tables, tables_batch_metrics
+from xefr4py.metrics.InformationGain import gain_ratio, symmetrical_uncertainty, gain_ratio_from_tables, \
+    symmetrical_uncertainty_from_tables, gain_ratio_batch, symmetrical_uncertainty_batch
+from xefr4py.metrics.RandomForestImportance import r_forest_importance2, r_forest_importance_from_codes, \
+    r_forest_classifier_importance, r_forest_classifier_importance_from_codes, extra_trees_importance, \
+    extra_trees_importance_from_codes, ForestImportance, ForestType
 
 
 class Metric(Enum):
@@ -13,3 +21,175 @@ class Metric(Enum):
     CHI_SQUARED = chi_squared
     RANDOM_FOREST_IMPORTANCE = r_forest_importance2
     SYMMETRICAL_UNCERTAINTY = symmetrical_uncertainty
+    RANDOM_FOREST_CLASSIFIER_IMPORTANCE = r_forest_classifier_importance
+    EXTRA_TREES_IMPORTANCE = extra_trees_importance
+
+
+class MetricCost(Enum):
+    """
+    Enum with the rough cost of a metric per subset, the cheap metrics are scheduled first
+    """
+    LOW = 1
+    MEDIUM = 2
+    HIGH = 3
+
+
+class MetricCapabilities:
+    """
+    Capabilities declared by a metric, used to pick the fastest execution path of each metric
+    """
+
+    def __init__(self, codes_function: function = None, tables_function: function = None, weights: bool = False,
+                 batch_function: function = None, feature_independent: bool = False,
+                 cost: MetricCost = MetricCost.HIGH):
+        """
+        Declare the capabilities of a metric
+
+        :param codes_function: function (class codes, features codes matrix) -> M weights, None if the metric only
+                               accepts the dataset with the class in the first column
+        :param tables_function: function (M x classes x values contingency tables) -> M weights of the count based
+                                metrics, the tables are shared by every count based metric of a subset
+        :param weights: the codes function accepts the multiplicity of each row as the weights argument, otherwise
+                        the rows are repeated
+        :param batch_function: function (class codes, features codes matrix, number of subsets x N multiplicity of
+                               each row in each subset, seed of each subset, n_jobs) -> number of subsets x M
+                               weights, that evaluates several subsets in a single call
+        :param feature_independent: the weight of each feature doesn't depend on the other features
+        :param cost: rough cost of the metric per subset
+        """
+        self.codes_function: function = codes_function
+        self.tables_function: function = tables_function
+        self.weights: bool = weights or tables_function is not None
+        self.batch_function: function = batch_function
+        self.feature_independent: bool = feature_independent
+        self.cost: MetricCost = cost
+
+
+# registered metrics and their capabilities
+METRICS_REGISTRY: dict[function, MetricCapabilities] = {
+    Metric.GAIN_RATIO: MetricCapabilities(tables_function=gain_ratio_from_tables, batch_function=gain_ratio_batch,
+                                          feature_independent=True, cost=MetricCost.LOW),
+    Metric.SYMMETRICAL_UNCERTAINTY: MetricCapabilities(tables_function=symmetrical_uncertainty_from_tables,
+                                                       batch_function=symmetrical_uncertainty_batch,
+                                                       feature_independent=True, cost=MetricCost.LOW),
+    Metric.CHI_SQUARED: MetricCapabilities(tables_function=chi_squared_from_tables, batch_function=chi_squared_batch,
+                                           feature_independent=True, cost=MetricCost.LOW),
+    Metric.RANDOM_FOREST_IMPORTANCE: MetricCapabilities(codes_function=r_forest_importance_from_codes),
+    Metric.RANDOM_FOREST_CLASSIFIER_IMPORTANCE: MetricCapabilities(
+        codes_function=r_forest_classifier_importance_from_codes),
+    Metric.EXTRA_TREES_IMPORTANCE: MetricCapabilities(codes_function=extra_trees_importance_from_codes,
+                                                      cost=MetricCost.MEDIUM)
+}
+
+
+def register_metric(metric: function, capabilities: MetricCapabilities = None) -> None:
+    """
+    Register a custom metric, it can then be used in the metrics list of EEFR like the Metric functions. The metric
+    is a function (dataset with the class in the first column) -> data frame with the weight of each feature in the
+    first column, like the Metric functions
+
+    :param metric: metric function
+    :param capabilities: capabilities of the metric, only the dataset function is used if None
+    """
+    METRICS_REGISTRY[metric] = capabilities if capabilities is not None else MetricCapabilities()
+
+
+def get_metric_capabilities(metric: function) -> MetricCapabilities:
+    """
+    Get the capabilities of a metric, the metrics that are not registered are only evaluated on the dataset
+
+    :param metric: metric function
+    :return: the capabilities of the metric
+    """
+    if isinstance(metric, ForestImportance):
+        return MetricCapabilities(codes_function=metric.from_codes,
+                                  batch_function=metric.subsets_importances if metric.trees_per_subset else None,
+                                  cost=MetricCost.MEDIUM if metric.trees_per_subset else MetricCost.HIGH)
+    capabilities: MetricCapabilities = METRICS_REGISTRY.get(metric)
+    return capabilities if capabilities is not None else MetricCapabilities()
+
+
+def evaluate_metrics(data: pandas.DataFrame, metrics: list[function], weights: np.array = None) -> np.array:
+    """
+    Calculate the weights of the features with several metrics, the contingency tables are built once and shared by
+    all the count based metrics
+
+    :param data: dataset with the class in the first column
+    :param metrics: metrics to use
+    :param weights: weight (multiplicity) of each row of the dataset, each row counts once if None. The count based
+                    metrics use the weights in the contingency tables, the other metrics get each row repeated by its
+                    weight
+    :return: number of metrics x M weights
+    """
+    capabilities: list[MetricCapabilities] = [get_metric_capabilities(m) for m in metrics]
+    tables: np.array = get_contingency_tables(data, weights) \
+        if any(c.tables_function is not None for c in capabilities) else None
+    if weights is not None and not all(c.tables_function is not None for c in capabilities):
+        data = data.iloc[np.repeat(np.arange(data.shape[0]), weights.astype(np.int64))]
+    return np.array([c.tables_function(tables) if c.tables_function is not None else m(data).iloc[:, 0].to_numpy()
+                     for m, c in zip(metrics, capabilities)]).reshape(len(metrics), data.shape[1] - 1)
+
+
+def evaluate_metrics_codes(class_data: np.array, data: np.array, metrics: list[function], weights: np.array = None,
+                           features_names: np.array = None) -> np.array:
+    """
+    Calculate the weights of the features with several metrics directly on the codes matrix of the dataset, the
+    contingency tables are built once and shared by all the count based metrics
+
+    :param class_data: class codes
+    :param data: features codes matrix
+    :param metrics: metrics to use
+    :param weights: weight (multiplicity) of each row of the dataset, each row counts once if None. The count based
+                    metrics use the weights in the contingency tables, the metrics that declare weights support get
+                    them, the other metrics get each row repeated by its weight
+    :param features_names: features names, used to build the dataset for the metrics without a codes version
+    :return: number of metrics x M weights
+    """
+    capabilities: list[MetricCapabilities] = [get_metric_capabilities(m) for m in metrics]
+    tables: np.array = contingency_tables(class_data, data, weights) \
+        if any(c.tables_function is not None for c in capabilities) else None
+    repeated: tuple[np.array, np.array] = (class_data, data)
+    if weights is not None and not all(c.weights for c in capabilities):
+        repeat: np.array = np.repeat(np.arange(data.shape[0]), weights.astype(np.int64))
+        repeated = (class_data[repeat], data[repeat, :])
+
+    results: list[np.array] = list()
+    for m, c in zip(metrics, capabilities):
+        if c.tables_function is not None:
+            results.append(c.tables_function(tables))
+        elif c.codes_function is not None and c.weights:
+            results.append(c.codes_function(class_data, data, weights=weights))
+        elif c.codes_function is not None:
+            results.append(c.codes_function(*repeated))
+        else:
+            # metric without codes version, use the dataset with the class in the first column
+            columns: list = ['class'] + (list(features_names) if features_names is not None
+                                         else list(range(1, data.shape[1] + 1)))
+            results.append(m(pandas.DataFrame(np.column_stack(repeated), columns=columns)).iloc[:, 0].to_numpy())
+    return np.array(results).reshape(len(metrics), data.shape[1])
+
+
+def evaluate_metrics_batch(class_data: np.array, data: np.array, metrics: list[function], rows_weights: np.array,
+                           seeds: np.array = None, n_jobs: int = 1) -> np.array:
+    """
+    Calculate the weights of the features with several metrics in several subsets at once, every metric must have a
+    batch function. The contingency tables of the subsets are built once and shared by all the count based metrics
+
+    :param class_data: class codes
+    :param data: features codes matrix
+    :param metrics: metrics to use
+    :param rows_weights: number of subsets x N multiplicity of each row in each subset
+    :param seeds: seed of each subset, used by the metrics with random choices
+    :param n_jobs: number of threads of the metrics that use them, default value 1
+    :return: number of subsets x number of metrics x M weights
+    """
+    capabilities: list[MetricCapabilities] = [get_metric_capabilities(m) for m in metrics]
+    tables_idx: list[int] = [i for i, c in enumerate(capabilities) if c.tables_function is not None]
+    results: np.array = np.zeros((rows_weights.shape[0], len(metrics), data.shape[1]))
+    if len(tables_idx) > 1:
+        results[:, tables_idx] = tables_batch_metrics([capabilities[i].tables_function for i in tables_idx],
+                                                      class_data, data, rows_weights)
+    for i, c in enumerate(capabilities):
+        if len(tables_idx) <= 1 or i not in tables_idx:
+            results[:, i] = c.batch_function(class_data, data, rows_weights, seeds, n_jobs)
+    return results
@@ -0,0 +1,42 @@
+import tempfile
+import unittest
+
+import numpy as np
+import pandas
+
+from xefr4py.discretizer.__init__ import Discretizer, get_codes_matrix
+from xefr4py.discretizer.Cache import get_dataset_key, load_cached_dataset, save_cached_dataset
+
+
+class TestCache(unittest.TestCase):
+    def test_get_dataset_key(self):
+        data: pandas.DataFrame = pandas.DataFrame({'a': [0, 1, 1, 0], 'b': [1.5, 2, 3, 4], 'c': ['x', 'y', 'x', 'y']})
+        key: str = get_dataset_key(data, 'a', [], Discretizer())
+        self.assertEqual(key, get_dataset_key(data.copy(), 'a', [], Discretizer()))
+        self.assertNotEqual(key, get_dataset_key(data, 'b', [], Discretizer()))
+        self.assertNotEqual(key, get_dataset_key(data, 'a', ['c'], Discretizer()))
+        changed: pandas.DataFrame = data.copy()
+        changed.loc[3, 'b'] = 5
+        self.assertNotEqual(key, get_dataset_key(changed, 'a', [], Discretizer()))
+        self.assertNotEqual(key, get_dataset_key(data, 'a', [], Discretizer(n_bins=16)))
+
+    def test_save_load_cached_dataset(self):
+        data: pandas.DataFrame = pandas.DataFrame({'class': [0, 1] * 50, 'a': np.arange(100.0), 'b': [1, 2] * 50})
+        discretizer: Discretizer = Discretizer()
+        class_data, codes, names = get_codes_matrix(discretizer.fit_transform(data))
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsNone(load_cached_dataset(directory, 'key'))
+            save_cached_dataset(directory, 'key', class_data, codes, names, np.array(['c'], dtype=object), discretizer)
+            cached_class, cached_codes, cached_names, cached_pruned, cached_discretizer = load_cached_dataset(directory,
+                                                                                                              'key')
+            self.assertIsInstance(cached_codes, np.memmap)
+            np.testing.assert_array_equal(class_data, cached_class)
+            np.testing.assert_array_equal(codes, cached_codes)
+            self.assertEqual(['a', 'b'], cached_names.tolist())
+            self.assertEqual(['c'], cached_pruned.tolist())
+            self.assertEqual(discretizer.get_cut_points(), cached_discretizer.get_cut_points())
+            del cached_codes
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+import numpy as np
+import pandas
+
+from xefr4py.metrics import evaluate_metrics, evaluate_metrics_codes, evaluate_metrics_batch, Metric
+from xefr4py.metrics.ChiSquared import chi_squared_batch
+from xefr4py.metrics.ContingencyTables import get_codes, contingency_tables, contingency_tables_batch
+
+
+class TestContingencyTables(unittest.TestCase):
+    def test_get_codes(self):
+        codes: np.array = get_codes(np.array([[0.5, 10], [-1, 10], [0.5, 3], [7, 3]]))
+        self.assertEqual([[1, 1], [0, 1], [1, 0], [2, 0]], codes.tolist())
+
+        codes = get_codes(np.array([[3, 1], [2, 0]]))
+        self.assertEqual([[3, 1], [2, 0]], codes.tolist())
+
+    def test_contingency_tables(self):
+        class_data: np.array = np.array([0, 0, 1, 1])
+        data: np.array = np.array([[0, 1], [1, 1], [1, 0], [1, 2]])
+        tables: np.array = contingency_tables(class_data, data)
+        self.assertEqual((2, 2, 3), tables.shape)
+        self.assertEqual([[1, 1, 0], [0, 2, 0]], tables[0].tolist())
+        self.assertEqual([[0, 2, 0], [1, 0, 1]], tables[1].tolist())
+
+        tables = contingency_tables(class_data, data, np.array([2, 0, 1, 3]))
+        self.assertEqual([[2, 0, 0], [0, 4, 0]], tables[0].tolist())
+        self.assertEqual([[0, 2, 0], [1, 0, 3]], tables[1].tolist())
+
+    # noinspection PyTypeChecker
+    def test_evaluate_metrics(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.random.randint(0, 3, (50, 4)))
+        metrics: list = [Metric.CHI_SQUARED, Metric.GAIN_RATIO, Metric.SYMMETRICAL_UNCERTAINTY]
+        weights: np.array = evaluate_metrics(data, metrics)
+        self.assertEqual((3, 3), weights.shape)
+        for i in range(len(metrics)):
+            self.assertTrue(np.allclose(metrics[i](data).iloc[:, 0].to_numpy(), weights[i]))
+
+    # noinspection PyTypeChecker
+    def test_evaluate_metrics_weights(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.random.randint(0, 3, (50, 4)))
+        weights: np.array = np.random.randint(0, 4, 50)
+        repeated: pandas.DataFrame = data.iloc[np.repeat(np.arange(50), weights)]
+        metrics: list = [Metric.CHI_SQUARED, Metric.GAIN_RATIO, Metric.SYMMETRICAL_UNCERTAINTY]
+        self.assertTrue(np.allclose(evaluate_metrics(repeated, metrics), evaluate_metrics(data, metrics, weights)))
+        for metric in metrics:
+            self.assertTrue(np.allclose(metric(repeated).to_numpy(), metric(data, weights).to_numpy()))
+
+    # noinspection PyTypeChecker
+    def test_evaluate_metrics_codes(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.random.randint(0, 3, (50, 4)))
+        weights: np.array = np.random.randint(0, 4, 50)
+        metrics: list = [Metric.CHI_SQUARED, Metric.GAIN_RATIO, Metric.SYMMETRICAL_UNCERTAINTY]
+        np_data: np.array = data.to_numpy(np.uint8)
+        self.assertTrue(np.allclose(evaluate_metrics(data, metrics, weights),
+                                    evaluate_metrics_codes(np_data[:, 0], np_data[:, 1:], metrics, weights)))
+
+        importance: np.array = evaluate_metrics_codes(np_data[:, 0], np_data[:, 1:], [Metric.RANDOM_FOREST_IMPORTANCE])
+        self.assertEqual((1, 3), importance.shape)
+        self.assertAlmostEqual(1, importance.sum())
+
+    def test_contingency_tables_batch(self):
+        class_data: np.array = np.array([0, 0, 1, 1])
+        data: np.array = np.array([[0, 1], [1, 1], [1, 0], [1, 2]])
+        rows_weights: np.array = np.array([[1, 1, 1, 1], [2, 0, 1, 3]])
+        tables: np.array = contingency_tables_batch(class_data, data, rows_weights)
+        self.assertEqual((2, 2, 2, 3), tables.shape)
+        for i in range(2):
+            self.assertEqual(contingency_tables(class_data, data, rows_weights[i]).tolist(), tables[i].tolist())
+
+    def test_evaluate_metrics_batch(self):
+        np_data: np.array = np.random.randint(0, 3, (50, 4))
+        rows_weights: np.array = np.random.randint(0, 3, (6, 50))
+        metrics: list = [Metric.CHI_SQUARED, Metric.GAIN_RATIO, Metric.SYMMETRICAL_UNCERTAINTY]
+        weights: np.array = evaluate_metrics_batch(np_data[:, 0], np_data[:, 1:], metrics, rows_weights)
+        self.assertEqual((6, 3, 3), weights.shape)
+        for i in range(6):
+            rows: np.array = np.flatnonzero(rows_weights[i])
+            self.assertTrue(np.allclose(evaluate_metrics_codes(np_data[rows, 0], np_data[rows, 1:], metrics,
+                                                               rows_weights[i, rows]), weights[i]))
+        self.assertTrue(np.allclose(chi_squared_batch(np_data[:, 0], np_data[:, 1:], rows_weights), weights[:, 0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
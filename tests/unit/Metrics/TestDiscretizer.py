@@ -4,7 +4,10 @@ import numpy as np
 import pandas
 from pandas.core.dtypes.common import is_integer_dtype
 
-from xefr4py.discretizer.__init__ import get_data_frame_from_formula, discretize, supervised_discretization, discretize_all
+from xefr4py.discretizer.__init__ import get_data_frame_from_formula, discretize, supervised_discretization, \
+    discretize_all, get_codes_matrix, apply_cut_points, MISSING_CODE
+from xefr4py.discretizer.MDL import MDL, class_counts_by_value, class_counts_by_bins, approximate_MDL, \
+    cut_points_distance
 
 
 class TestDiscretizer(unittest.TestCase):
@@ -68,6 +71,67 @@ class TestDiscretizer(unittest.TestCase):
         self.assertEqual([0, 1, 2, 3, 4], unique.tolist())
         self.assertEqual([40, 40, 40, 40, 40], count.tolist())
 
+    # noinspection PyTypeChecker
+    def test_discretize_n_jobs(self):
+        np.random.seed(42)
+        data: pandas.DataFrame = pandas.DataFrame(np.random.random((200, 9)))
+        data[0] = np.random.randint(0, 3, 200)
+        data[1] = data[1] + data[0]
+        data.iloc[:10, 2] = np.nan
+        pandas.testing.assert_frame_equal(discretize(data.copy()), discretize(data.copy(), n_jobs=2))
+
+    def test_apply_cut_points(self):
+        x: np.array = np.array([0.5, 1.5, 1, np.nan, 3, 4])
+        cut_points: list[float] = [float('-inf'), 1, 3, float('inf')]
+        expected: list[float] = pandas.cut(x, cut_points, labels=False).tolist()
+        np.testing.assert_array_equal(expected, apply_cut_points(x, cut_points))
+        self.assertEqual([0, 1, 2], apply_cut_points([1, 2, 4], cut_points).tolist())
+
+    def test_class_counts_by_value(self):
+        values, counts = class_counts_by_value([3, 1, np.nan, 1, 2], [0, 1, 1, 0, 1])
+        self.assertEqual([1, 2, 3], values.tolist())
+        self.assertEqual([[1, 1], [0, 1], [1, 1]], counts.tolist())
+
+    def test_MDL(self):
+        self.assertEqual([float('-inf'), 1.5, float('inf')], MDL([0, 1] * 20 + [2, 3] * 20, [0] * 40 + [1] * 40))
+        self.assertEqual([float('-inf'), float('inf')], MDL(list(range(80)), [0] * 80))
+        self.assertEqual([float('-inf'), 19.5, 39.5, float('inf')],
+                         MDL(list(range(60)), [0] * 20 + [1] * 20 + [0] * 20))
+
+    def test_class_counts_by_bins(self):
+        lower, upper, counts = class_counts_by_bins([3, 1, np.nan, 1, 2, 4], [0, 1, 1, 0, 1, 0], 2)
+        self.assertEqual([1, 3], lower.tolist())
+        self.assertEqual([2, 4], upper.tolist())
+        self.assertEqual([[1, 2], [2, 1]], counts.tolist())
+
+    def test_approximate_MDL(self):
+        x: list[int] = [0, 1] * 20 + [2, 3] * 20
+        y: list[int] = [0] * 40 + [1] * 40
+        self.assertEqual(MDL(x, y), approximate_MDL(x, y, 4))
+        self.assertEqual([float('-inf'), float('inf')], approximate_MDL(list(range(80)), [0] * 80, 8))
+        np.random.seed(42)
+        x = np.random.random(2000)
+        y = (x > 0.3).astype(int)
+        self.assertLess(cut_points_distance(MDL(x, y), approximate_MDL(x, y, 64)), 0.02)
+
+    def test_cut_points_distance(self):
+        self.assertEqual(0, cut_points_distance([float('-inf'), float('inf')], [float('-inf'), float('inf')]))
+        self.assertEqual(float('inf'), cut_points_distance([1.5], []))
+        self.assertEqual(0.5, cut_points_distance([float('-inf'), 1, 2, float('inf')], [1.5, 2]))
+
+    def test_get_codes_matrix(self):
+        data: pandas.DataFrame = pandas.DataFrame({'class': [0, 1, 1, 0], 'a': [0, 1, np.nan, 2], 'b': [3, 3, 0, 1]})
+        class_data, codes, names = get_codes_matrix(data)
+        self.assertEqual(np.uint8, class_data.dtype)
+        self.assertEqual([0, 1, 1, 0], class_data.tolist())
+        self.assertEqual(np.uint8, codes.dtype)
+        self.assertTrue(codes.flags['C_CONTIGUOUS'])
+        self.assertEqual([[1, 4], [2, 4], [MISSING_CODE, 1], [3, 2]], codes.tolist())
+        self.assertEqual(['a', 'b'], names.tolist())
+
+        data = pandas.DataFrame({'class': [0, 1], 'a': [0, 300]})
+        self.assertEqual(np.uint16, get_codes_matrix(data)[1].dtype)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas
+
+from xefr4py.discretizer.__init__ import Discretizer, get_data_frame_from_formula, discretize_all, register_strategy, \
+    DISCRETIZATION_STRATEGIES
+
+
+class TestDiscretizerModel(unittest.TestCase):
+    @staticmethod
+    def get_data() -> pandas.DataFrame:
+        np.random.seed(42)
+        data: pandas.DataFrame = pandas.DataFrame({'class': np.random.randint(0, 3, 200),
+                                                   'a': np.random.random(200),
+                                                   'b': np.random.random(200),
+                                                   'c': np.random.choice(['x', 'y', 'z'], 200)})
+        data['a'] = data['a'] + data['class']
+        data.loc[:10, 'b'] = np.nan
+        return data
+
+    def test_fit_transform(self):
+        data: pandas.DataFrame = self.get_data()
+        discretizer: Discretizer = Discretizer()
+        self.assertFalse(discretizer.is_fitted())
+        self.assertRaises(ValueError, discretizer.transform, data)
+        pandas.testing.assert_frame_equal(discretize_all(get_data_frame_from_formula(data)),
+                                          discretizer.fit_transform(data))
+        self.assertEqual(['a', 'b', 'c'], list(discretizer.get_cut_points().keys()))
+        self.assertEqual(4, len(discretizer.get_cut_points()['a']))
+
+    def test_transform(self):
+        data: pandas.DataFrame = self.get_data()
+        discretizer: Discretizer = Discretizer().fit(data)
+        new_data: pandas.DataFrame = pandas.DataFrame({'class': [0, 2], 'a': [0.5, 10], 'b': [np.nan, 0.5],
+                                                       'c': ['z', 'w']})
+        discretized: pandas.DataFrame = discretizer.transform(new_data[['class', 'c', 'b', 'a']])
+        self.assertEqual(['class', 'a', 'b', 'c'], discretized.columns.tolist())
+        self.assertEqual([0, 2], discretized['class'].tolist())
+        self.assertEqual([0, 2], discretized['a'].tolist())
+        self.assertTrue(np.isnan(discretized['b'][0]))
+        # the unknown categories are factorized as the missing values
+        self.assertFalse(np.isnan(discretized['c'][0]))
+        self.assertTrue(np.isnan(discretized['c'][1]))
+        missing: pandas.DataFrame = new_data.astype({'c': object})
+        missing.loc[1, 'c'] = np.nan
+        np.testing.assert_array_equal(discretizer.transform(missing)['c'].to_numpy(), discretized['c'].to_numpy())
+        self.assertRaises(ValueError, discretizer.transform, new_data[['a', 'class', 'b', 'c']])
+        self.assertRaises(ValueError, discretizer.transform, new_data[['class', 'a', 'b']])
+
+    def test_approximation_report(self):
+        data: pandas.DataFrame = self.get_data()
+        discretizer: Discretizer = Discretizer(n_bins=256).fit(data)
+        pandas.testing.assert_frame_equal(Discretizer().fit_transform(data), discretizer.transform(data))
+        report: pandas.DataFrame = discretizer.get_approximation_report(data)
+        self.assertEqual(['a', 'b', 'c'], report.index.tolist())
+        self.assertEqual(report['Exact Cut Points'].tolist(), report['Approximate Cut Points'].tolist())
+        self.assertEqual([0, 0, 0], report['Distance'].tolist())
+
+        discretizer = Discretizer(n_bins=4).fit(data)
+        report = discretizer.get_approximation_report(data)
+        self.assertGreater(report['Relative Distance']['a'], 0)
+        self.assertLess(report['Relative Distance']['a'], 0.25)
+
+    def test_strategies(self):
+        data: pandas.DataFrame = self.get_data()
+        self.assertRaises(ValueError, Discretizer, strategy='unknown')
+        for strategy in ('equal_frequency', 'equal_width', 'chi_merge'):
+            discretizer: Discretizer = Discretizer(n_bins=4, strategy=strategy)
+            discretized: pandas.DataFrame = discretizer.fit_transform(data)
+            self.assertEqual(strategy, discretizer.get_settings()['strategy'])
+            self.assertLessEqual(discretized['a'].max(), 3)
+        self.assertEqual(4, len(Discretizer(n_bins=4, strategy='equal_width').fit(data).get_cut_points()['a']) - 1)
+
+        register_strategy('halves', lambda class_data, features, n_bins, n_jobs:
+                          [[float('-inf'), float(np.nanmedian(x)), float('inf')] for x in features.T])
+        try:
+            discretized = Discretizer(strategy='halves').fit_transform(data)
+            self.assertEqual([0, 1], np.unique(discretized['a']).tolist())
+        finally:
+            del DISCRETIZATION_STRATEGIES['halves']
+
+    def test_save_load(self):
+        data: pandas.DataFrame = self.get_data()
+        discretizer: Discretizer = Discretizer(n_bins=64, strategy='chi_merge').fit(data)
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, 'discretizer.npz')
+            discretizer.save(path)
+            loaded: Discretizer = Discretizer.load(path)
+        self.assertTrue(loaded.is_fitted())
+        self.assertEqual({'strategy': 'chi_merge', 'n_bins': 64}, loaded.get_settings())
+        self.assertEqual(discretizer.get_cut_points(), loaded.get_cut_points())
+        pandas.testing.assert_frame_equal(discretizer.transform(data), loaded.transform(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+import pandas
+
+from xefr4py import EEFR
+from xefr4py.metrics import register_metric, get_metric_capabilities, evaluate_metrics_codes, Metric, \
+    MetricCapabilities, MetricCost, METRICS_REGISTRY, ForestImportance
+
+
+def correlation_from_codes(class_data: np.array, data: np.array, weights: np.array = None) -> np.array:
+    weights = np.ones(len(class_data), dtype=np.int64) if weights is None else weights.astype(np.int64)
+    return np.nan_to_num(np.abs([np.cov(column, class_data, fweights=weights)[0, 1] for column in data.T]))
+
+
+def correlation(dataset: pandas.DataFrame) -> pandas.DataFrame:
+    np_data: np.array = dataset.to_numpy(np.float64)
+    return pandas.DataFrame({"attr_importance": correlation_from_codes(np_data[:, 0], np_data[:, 1:])},
+                            index=dataset.columns[1:])
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def tearDown(self):
+        METRICS_REGISTRY.pop(correlation, None)
+
+    def test_get_metric_capabilities(self):
+        self.assertEqual(MetricCost.LOW, get_metric_capabilities(Metric.GAIN_RATIO).cost)
+        self.assertTrue(get_metric_capabilities(Metric.CHI_SQUARED).weights)
+        self.assertTrue(get_metric_capabilities(Metric.CHI_SQUARED).feature_independent)
+        self.assertIsNotNone(get_metric_capabilities(Metric.RANDOM_FOREST_IMPORTANCE).codes_function)
+        self.assertFalse(get_metric_capabilities(Metric.RANDOM_FOREST_IMPORTANCE).weights)
+        self.assertIsNone(get_metric_capabilities(ForestImportance()).batch_function)
+        self.assertIsNotNone(get_metric_capabilities(ForestImportance(trees_per_subset=1)).batch_function)
+        # not registered, only the dataset function
+        self.assertIsNone(get_metric_capabilities(correlation).codes_function)
+
+    def test_register_metric(self):
+        class_data: np.array = np.random.randint(0, 2, 50)
+        data: np.array = np.column_stack([class_data * 2, np.random.randint(0, 3, 50)])
+        weights: np.array = np.random.randint(0, 4, 50)
+        dataset_weights: np.array = evaluate_metrics_codes(class_data, data, [correlation], weights)
+
+        register_metric(correlation, MetricCapabilities(codes_function=correlation_from_codes, weights=True,
+                                                        feature_independent=True, cost=MetricCost.LOW))
+        self.assertIs(correlation_from_codes, get_metric_capabilities(correlation).codes_function)
+        np.testing.assert_allclose(dataset_weights, evaluate_metrics_codes(class_data, data, [correlation], weights))
+
+        dataset: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        features: list[str] = EEFR(dataset).ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=1,
+                                                                      metrics=[correlation, Metric.GAIN_RATIO])
+        self.assertEqual(['b'], features)
+
+    def test_register_metric_cascade(self):
+        evaluated_columns: list[int] = list()
+
+        def expensive_correlation(class_data: np.array, data: np.array, weights: np.array = None) -> np.array:
+            evaluated_columns.append(data.shape[1])
+            return correlation_from_codes(class_data, data, weights)
+
+        register_metric(correlation, MetricCapabilities(codes_function=expensive_correlation, weights=True,
+                                                        feature_independent=True, cost=MetricCost.HIGH))
+        np.random.seed(42)
+        class_data: np.array = np.random.randint(0, 2, 400)
+        dataset: pandas.DataFrame = pandas.DataFrame({f'f{i}': class_data * 4 + np.random.randint(0, 2 + i, 400)
+                                                      for i in range(8)})
+        dataset.insert(0, 'class', class_data)
+        features: list[str] = EEFR(dataset, 'class').ensemble_features_ranking(
+            n_rows=200, n_tries=10, cut_off=0, metrics=[Metric.GAIN_RATIO, correlation], cascade_fraction=0.25)
+        self.assertEqual(8, len(features))
+        self.assertEqual([2], np.unique(evaluated_columns).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
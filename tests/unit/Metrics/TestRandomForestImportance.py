@@ -3,7 +3,8 @@ import unittest
 import numpy as np
 import pandas
 
-from xefr4py.metrics import r_forest_importance2
+from xefr4py.metrics import r_forest_importance2, r_forest_classifier_importance, extra_trees_importance, \
+    ForestImportance, ForestType, evaluate_metrics_codes
 
 
 class TestRandomForestImportance(unittest.TestCase):
@@ -28,6 +29,42 @@ class TestRandomForestImportance(unittest.TestCase):
         self.assertEqual(1, importance.iloc[0, 0])
         self.assertEqual(0, importance.iloc[1, 0])
 
+    # noinspection PyTypeChecker
+    def test_forest_importance(self):
+        shuffled: np.array = np.concatenate([[i for _ in range(25)] for i in range(8)])
+        np.random.shuffle(shuffled)
+        data: pandas.DataFrame = pandas.DataFrame([np.concatenate([[0 for _ in range(100)], [1 for _ in range(100)]]),
+                                                   np.concatenate([[0 for _ in range(100)], [10 for _ in range(100)]]),
+                                                   shuffled
+                                                   ]).transpose()
+        for metric in [r_forest_classifier_importance, extra_trees_importance]:
+            importance: pandas.DataFrame = metric(data)
+            self.assertGreater(importance.iloc[0, 0], importance.iloc[1, 0])
+
+        forest: ForestImportance = ForestImportance(ForestType.EXTRA_TREES_REGRESSOR, n_estimators=10, max_depth=2,
+                                                    max_features=1, max_samples=0.5, n_jobs=1)
+        self.assertEqual('extra_trees_regressor_importance', forest.__name__)
+        self.assertEqual(2, len(forest(data)))
+        weights: np.array = evaluate_metrics_codes(data.iloc[:, 0].to_numpy(), data.iloc[:, 1:].to_numpy(),
+                                                   [ForestImportance(ForestType.RANDOM_FOREST_CLASSIFIER, 20)])
+        self.assertEqual((1, 2), weights.shape)
+        self.assertGreater(weights[0, 0], weights[0, 1])
+
+    def test_subsets_importances(self):
+        class_data: np.array = np.repeat([0, 1], 100)
+        data: np.array = np.column_stack([class_data * 10, np.random.randint(0, 8, 200)])
+        rows_weights: np.array = np.array([np.bincount(np.random.randint(0, 200, 100), minlength=200)
+                                           for _ in range(6)])
+        seeds: np.array = np.arange(6)
+        forest: ForestImportance = ForestImportance(ForestType.RANDOM_FOREST_CLASSIFIER, max_features=None,
+                                                    trees_per_subset=3)
+        importances: np.array = forest.subsets_importances(class_data, data, rows_weights, seeds, n_jobs=2)
+        self.assertEqual((6, 2), importances.shape)
+        np.testing.assert_allclose(np.ones(6), importances[:, 0])
+        # each subset is reproducible on its own
+        np.testing.assert_array_equal(importances[2:4],
+                                      forest.subsets_importances(class_data, data, rows_weights[2:4], seeds[2:4]))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from xefr4py.discretizer.Strategies import equal_frequency_cut_points, equal_width_cut_points, \
+    chi_merge_cut_points
+
+
+class TestStrategies(unittest.TestCase):
+    def test_equal_frequency_cut_points(self):
+        features: np.array = np.array([np.arange(1.0, 9), [1, 1, 1, 1, 1, 1, 2, np.nan], [np.nan] * 8]).T
+        cut_points: list[list[float]] = equal_frequency_cut_points(None, features, 4)
+        self.assertEqual([float('-inf'), 2.75, 4.5, 6.25, float('inf')], cut_points[0])
+        self.assertEqual([float('-inf'), 1, float('inf')], cut_points[1])
+        self.assertEqual([float('-inf'), float('inf')], cut_points[2])
+
+    def test_equal_width_cut_points(self):
+        features: np.array = np.array([[0, 10, 5, np.nan], [3, 3, 3, 3], [np.nan] * 4]).T
+        cut_points: list[list[float]] = equal_width_cut_points(None, features, 5)
+        self.assertEqual([float('-inf'), 2, 4, 6, 8, float('inf')], cut_points[0])
+        self.assertEqual([float('-inf'), 3, float('inf')], cut_points[1])
+        self.assertEqual([float('-inf'), float('inf')], cut_points[2])
+
+    def test_chi_merge_cut_points(self):
+        x: np.array = np.repeat(np.arange(20.0), 20)
+        class_data: np.array = (x >= 10).astype(int) + (x >= 16).astype(int)
+        features: np.array = np.array([x, np.full(400, 1.0), np.full(400, np.nan)]).T
+        cut_points: list[list[float]] = chi_merge_cut_points(class_data, features, 20)
+        self.assertEqual([float('-inf'), 9.5, 15.5, float('inf')], cut_points[0])
+        self.assertEqual([float('-inf'), float('inf')], cut_points[1])
+        self.assertEqual([float('-inf'), float('inf')], cut_points[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,18 @@
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 import numpy as np
 import pandas
 
 from xefr4py import _get_n_randoms_rows_subsets, _calculate_weights_sampling, Metric, _cutoff_by_contrib, \
-    _calculate_rank_sampling, EEFR
+    _calculate_rank_sampling, _calculate_metrics_weights_sampling, _get_constant_features, _get_features_groups, \
+    _calculate_fused_weights_sampling, _get_available_memory, \
+    EEFR, ParallelAxis, Discretizer, RankAccumulator, StabilityMeasure, LOGS_PATH, RandomSubsets
+import xefr4py
+from xefr4py.metrics import ForestImportance, ForestType
+from xefr4py.Ranking import ranking_stability
 
 
 class TestEEFR(unittest.TestCase):
@@ -21,6 +29,18 @@ class TestEEFR(unittest.TestCase):
             for u in unique:
                 self.assertIn(u, range(nRows))
 
+    def test_random_subsets(self):
+        subsets: RandomSubsets = RandomSubsets(100, 50, 10, 42)
+        matrix: np.array = subsets.to_array()
+        self.assertEqual((10, 50), matrix.shape)
+        self.assertEqual(np.int32, matrix.dtype)
+        np.testing.assert_array_equal(matrix[7], subsets[7])
+        np.testing.assert_array_equal(matrix[7], subsets[5:][2])
+        np.testing.assert_array_equal(matrix[7], RandomSubsets(100, 50, 10, 42)[-3])
+        np.testing.assert_array_equal(matrix, np.array(list(subsets)))
+        self.assertEqual(3, len(subsets[7:20]))
+        self.assertFalse(np.array_equal(matrix, RandomSubsets(100, 50, 10, 43).to_array()))
+
     # noinspection PyTypeChecker
     def test_calculate_weights_sampling(self):
         shuffled: np.array = np.concatenate([[i for _ in range(25)] for i in range(8)])
@@ -32,13 +52,63 @@ class TestEEFR(unittest.TestCase):
                                                    ]).transpose()
         subsets: list[list[int]] = _get_n_randoms_rows_subsets(200, 100, 10)
         class_column: str = data.columns[0]
-        weights: pandas.DataFrame = _calculate_weights_sampling(data[class_column], data.drop(columns=class_column),
-                                                                subsets, Metric.GAIN_RATIO)
+        weights: pandas.DataFrame = _calculate_weights_sampling(data[class_column].to_numpy(),
+                                                                data.drop(columns=class_column).to_numpy(),
+                                                                data.columns[1:], subsets, Metric.GAIN_RATIO)
         weights_mean: list[float] = weights.mean().tolist()
         self.assertEqual(1, round(weights_mean[0], 1))
         self.assertEqual(0, weights_mean[1])
         self.assertLess(weights_mean[2], 0.5)
 
+    # noinspection PyTypeChecker
+    def test_calculate_weights_sampling_n_jobs(self):
+        shuffled: np.array = np.concatenate([[i for _ in range(25)] for i in range(8)])
+        np.random.shuffle(shuffled)
+        data: pandas.DataFrame = pandas.DataFrame([np.concatenate([[0 for _ in range(100)], [1 for _ in range(100)]]),
+                                                   np.concatenate([[0 for _ in range(100)], [1 for _ in range(100)]]),
+                                                   shuffled
+                                                   ]).transpose()
+        subsets: list[list[int]] = _get_n_randoms_rows_subsets(200, 100, 10)
+        class_column: str = data.columns[0]
+        np.random.seed(42)
+        weights: pandas.DataFrame = _calculate_weights_sampling(data[class_column].to_numpy(),
+                                                                data.drop(columns=class_column).to_numpy(),
+                                                                data.columns[1:], subsets,
+                                                                Metric.RANDOM_FOREST_IMPORTANCE, n_jobs=1)
+        np.random.seed(42)
+        with mock.patch('xefr4py._apply_along_columns', wraps=xefr4py._apply_along_columns) as apply:
+            weights_pool: pandas.DataFrame = _calculate_weights_sampling(data[class_column].to_numpy(),
+                                                                         data.drop(columns=class_column).to_numpy(),
+                                                                         data.columns[1:], subsets,
+                                                                         Metric.RANDOM_FOREST_IMPORTANCE, n_jobs=2)
+        self.assertTrue(weights.equals(weights_pool))
+        # the workers get the subsets as seeds, never as row indexes
+        tasks: list[tuple] = apply.call_args.args[1]
+        self.assertEqual(len(subsets), len(tasks))
+        for i, (_, task_subsets, _) in enumerate(tasks):
+            self.assertIsInstance(task_subsets, RandomSubsets)
+            np.testing.assert_array_equal(subsets[i], task_subsets[0])
+
+    # noinspection PyTypeChecker
+    def test_calculate_weights_sampling_features_axis(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.random.randint(0, 4, (200, 9)))
+        data[0] = np.concatenate([[0 for _ in range(100)], [1 for _ in range(100)]])
+        data[1] = data[0]
+        subsets: list[list[int]] = _get_n_randoms_rows_subsets(200, 100, 10)
+        class_column: str = data.columns[0]
+        weights: pandas.DataFrame = _calculate_weights_sampling(data[class_column].to_numpy(),
+                                                                data.drop(columns=class_column).to_numpy(),
+                                                                data.columns[1:], subsets, Metric.CHI_SQUARED)
+        with mock.patch('xefr4py.get_features_blocks', wraps=xefr4py.get_features_blocks) as blocks:
+            weights_blocks: pandas.DataFrame = _calculate_weights_sampling(data[class_column].to_numpy(),
+                                                                           data.drop(columns=class_column).to_numpy(),
+                                                                           data.columns[1:], subsets,
+                                                                           Metric.CHI_SQUARED, n_jobs=3,
+                                                                           parallel_axis=ParallelAxis.FEATURES)
+        blocks.assert_called_once_with(8, 3)
+        self.assertEqual(weights.columns.tolist(), weights_blocks.columns.tolist())
+        self.assertTrue(np.allclose(weights.to_numpy(), weights_blocks.to_numpy()))
+
     # noinspection PyTypeChecker
     def test_cutoff_by_contrib(self):
         data: pandas.DataFrame = pandas.DataFrame([[1, 0, 0.6]]).transpose()
@@ -75,6 +145,104 @@ class TestEEFR(unittest.TestCase):
         ranking = _calculate_rank_sampling(weights, list(weights.columns), weightPerGroup)
         self.assertEqual(['a'], ranking)
 
+    def test_calculate_rank_sampling_ties(self):
+        weights: pandas.DataFrame = pandas.DataFrame([[1, 0.5, 1, np.nan], [0.2, 0.5, 0.5, 0.5], [1, 0, 0, 0]],
+                                                     columns=['a', 'b', 'c', 'd'])
+        ranking: list[str] = _calculate_rank_sampling(weights, list(weights.columns), [4, 3, 0, 0], 0)
+        self.assertEqual(['a', 'b', 'c', 'd'], ranking)
+
+        ranking = _calculate_rank_sampling(weights, list(weights.columns), [5, 3, 2, 1], 0)
+        self.assertEqual(['a', 'b', 'c', 'd'], ranking)
+
+    # noinspection PyTypeChecker
+    def test_calculate_metrics_weights_sampling_groups(self):
+        np.random.seed(42)
+        Y: np.array = np.random.randint(0, 2, 200)
+        X: np.array = np.random.randint(1, 4, (200, 3))
+        X[:, 2] = np.where(Y == 1, 3, X[:, 2])
+        duplicated: np.array = X[:, [0, 1, 0, 2, 2]]
+        names: np.array = np.array(['a', 'b', 'c', 'd', 'e'])
+        subsets: list[list[int]] = _get_n_randoms_rows_subsets(200, 100, 10)
+        metrics: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED]
+        expected: list[pandas.DataFrame] = _calculate_metrics_weights_sampling(Y, duplicated, names, subsets, metrics)
+        distinct, groups = _get_features_groups(duplicated)
+        self.assertEqual([0, 1, 3], distinct.tolist())
+        self.assertEqual([0, 1, 0, 2, 2], groups.tolist())
+        weights: list[pandas.DataFrame] = _calculate_metrics_weights_sampling(Y, duplicated[:, distinct], names,
+                                                                              subsets, metrics, features_groups=groups)
+        for i in range(len(metrics)):
+            pandas.testing.assert_frame_equal(expected[i], weights[i])
+
+    def test_calculate_fused_weights_sampling(self):
+        np.random.seed(42)
+        Y: np.array = np.random.randint(0, 2, 200)
+        X: np.array = np.random.randint(1, 4, (200, 3))
+        X[:, 2] = np.where(Y == 1, 3, X[:, 2])
+        duplicated: np.array = X[:, [0, 1, 0, 2, 2]]
+        names: np.array = np.array(['a', 'b', 'c', 'd', 'e'])
+        subsets: list[list[int]] = _get_n_randoms_rows_subsets(200, 100, 10)
+        metrics: list = [Metric.GAIN_RATIO, Metric.RANDOM_FOREST_IMPORTANCE, Metric.CHI_SQUARED]
+        expected: list[pandas.DataFrame] = list()
+        for metric in metrics:
+            np.random.seed(1)
+            expected.extend(_calculate_metrics_weights_sampling(Y, duplicated, names, subsets, [metric], False))
+        distinct, groups = _get_features_groups(duplicated)
+        for n_jobs in [1, 2]:
+            np.random.seed(1)
+            weights, times = _calculate_fused_weights_sampling(Y, duplicated, names, subsets, metrics, False, n_jobs,
+                                                               duplicated[:, distinct], groups)
+            self.assertEqual(len(metrics), len(times))
+            for i in range(len(metrics)):
+                pandas.testing.assert_frame_equal(expected[i], weights[i])
+
+    def test_calculate_rank_sampling_pruned(self):
+        weights: pandas.DataFrame = pandas.DataFrame([[1, 0.5], [0.2, 0.5], [1, 0]], columns=['a', 'b'])
+        ranking: list[str] = _calculate_rank_sampling(weights, list(weights.columns), [4, 3, 2, 1], 0,
+                                                      pruned_features=['c', 'd'])
+        self.assertEqual(['a', 'b', 'c', 'd'], ranking)
+
+        ranking = _calculate_rank_sampling(weights, list(weights.columns), [4, 3, 2, 1], -1, pruned_features=['c', 'd'])
+        self.assertEqual(['a', 'b'], ranking)
+
+    def test_rank_accumulator(self):
+        weights: np.array = np.random.rand(30, 4)
+        weights[3, 1] = np.nan
+        expected: list[str] = _calculate_rank_sampling(pandas.DataFrame(weights, columns=list('abcd')), list('abcd'),
+                                                       [4, 3, 2, 1], 0, False)
+        accumulator: RankAccumulator = RankAccumulator(list('abcd'), [4, 3, 2, 1], statistics=True)
+        for start in range(0, 30, 7):
+            accumulator.add(weights[start:start + 7])
+        self.assertEqual(30, accumulator.get_n_rows())
+        self.assertEqual(expected, accumulator.get_ranking())
+
+        # without statistics only the positions with group weight are sorted
+        top: RankAccumulator = RankAccumulator(list('abcd'), [4, 3, 0, 0])
+        top.add(weights)
+        full: RankAccumulator = RankAccumulator(list('abcd'), [4, 3, 0, 0], statistics=True)
+        full.add(weights)
+        np.testing.assert_array_equal(full.get_rank_weights(), top.get_rank_weights())
+        with self.assertRaises(ValueError):
+            top.get_statistics()
+
+        statistics: pandas.DataFrame = accumulator.get_statistics()
+        np.testing.assert_allclose(np.nanmean(weights, axis=0), statistics['Mean Weight'])
+        np.testing.assert_allclose(np.nanvar(weights, axis=0, ddof=1), statistics['Weight Variance'])
+        positions: np.array = np.argsort(np.argsort(-np.nan_to_num(weights, nan=-np.inf), axis=1, kind='stable'),
+                                         axis=1)
+        np.testing.assert_allclose(positions.mean(axis=0), statistics['Mean Position'])
+        np.testing.assert_allclose(positions.var(axis=0, ddof=1), statistics['Position Variance'])
+
+    def test_ranking_stability(self):
+        self.assertEqual(1.0, ranking_stability(list('abcd'), list('bacd'), 2))
+        self.assertAlmostEqual(1 / 3, ranking_stability(list('abcd'), list('acbd'), 2))
+        self.assertEqual(1.0, ranking_stability(list('abcd'), list('abdc'), 3, StabilityMeasure.KENDALL_TAU))
+        self.assertAlmostEqual(1 / 3, ranking_stability(list('abcd'), list('bacd'), 3, StabilityMeasure.KENDALL_TAU))
+
+    def test_get_constant_features(self):
+        X: np.array = np.array([[1, 2, 0, 3], [1, 1, 0, 3], [1, 2, 1, 3]])
+        self.assertEqual([True, False, False, True], _get_constant_features(X).tolist())
+        self.assertEqual([True, True], _get_constant_features(np.zeros((0, 2))).tolist())
+
     def test_ensemble_features_ranking(self):
         data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
             np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
@@ -84,6 +252,244 @@ class TestEEFR(unittest.TestCase):
         methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED]
         features: list[str] = eEFR.ensemble_features_ranking(n_rows=nRows, n_tries=20, cut_off=-1, metrics=methods)
         self.assertEqual(['b'], features)
+        for method in methods:
+            log: pandas.DataFrame = pandas.read_csv(f'{LOGS_PATH}/{method.__name__}.tsv', sep='\t')
+            self.assertEqual(['Execution Time'], log.columns.tolist())
+        # the metrics calculated together by the features axis keep the same log
+        features = eEFR.ensemble_features_ranking(n_rows=nRows, n_tries=20, cut_off=-1, metrics=methods, n_jobs=2,
+                                                  parallel_axis=ParallelAxis.FEATURES)
+        self.assertEqual(['b'], features)
+        for method in methods:
+            log: pandas.DataFrame = pandas.read_csv(f'{LOGS_PATH}/{method.__name__}.tsv', sep='\t')
+            self.assertEqual(['Execution Time'], log.columns.tolist())
+
+    def test_ensemble_features_ranking_n_jobs(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        eEFR: EEFR = EEFR(data)
+        nRows: int = int(len(data) / 2)
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED]
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=nRows, n_tries=20, cut_off=-1, metrics=methods,
+                                                             n_jobs=2)
+        self.assertEqual(['b'], features)
+
+    def test_ensemble_features_ranking_forest_n_jobs(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        eEFR: EEFR = EEFR(data)
+        methods: list = [Metric.GAIN_RATIO, Metric.EXTRA_TREES_IMPORTANCE,
+                         ForestImportance(ForestType.RANDOM_FOREST_CLASSIFIER, n_estimators=20, max_depth=4)]
+        np.random.seed(42)
+        serial: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=8, cut_off=0, metrics=methods)
+        np.random.seed(42)
+        parallel: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=8, cut_off=0, metrics=methods,
+                                                             n_jobs=2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual('b', serial[0])
+
+    def test_ensemble_features_ranking_forest_ensemble(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        eEFR: EEFR = EEFR(data)
+        methods: list = [ForestImportance(ForestType.RANDOM_FOREST_CLASSIFIER, max_features=None, trees_per_subset=2)]
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=1, metrics=methods,
+                                                             n_jobs=2)
+        self.assertEqual(['b'], features)
+
+        # without a process pool the trees of each subset are grown on every core
+        with mock.patch.object(ForestImportance, 'subsets_importances', autospec=True,
+                               side_effect=ForestImportance.subsets_importances) as subsets_importances:
+            features = eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=1, metrics=methods)
+        self.assertEqual(['b'], features)
+        self.assertTrue(subsets_importances.called)
+        self.assertTrue(all(call.args[-1] == -1 for call in subsets_importances.call_args_list))
+
+    def test_ensemble_features_ranking_missing_values(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c']).astype(float)
+        data.iloc[::10, 2] = np.nan
+        eEFR: EEFR = EEFR(data)
+        nRows: int = int(len(data) / 2)
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED, Metric.RANDOM_FOREST_IMPORTANCE]
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=nRows, n_tries=20, cut_off=-1, metrics=methods)
+        self.assertEqual(['b'], features)
+
+    def test_ensemble_features_ranking_with_discretizer(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        discretizer: Discretizer = EEFR(data).get_discretizer()
+        self.assertTrue(discretizer.is_fitted())
+        eEFR: EEFR = EEFR(data.iloc[:250], discretizer=discretizer)
+        self.assertIs(discretizer, eEFR.get_discretizer())
+        self.assertEqual(250, eEFR.get_total_instances())
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED]
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=125, n_tries=20, cut_off=-1, metrics=methods)
+        self.assertEqual(['b'], features)
+
+    def test_ensemble_features_ranking_with_strategy(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        eEFR: EEFR = EEFR(data, discretization_strategy='equal_frequency')
+        self.assertEqual('equal_frequency', eEFR.get_discretizer().get_settings()['strategy'])
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED]
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=-1, metrics=methods)
+        self.assertEqual(['b'], features)
+
+    def test_ensemble_features_ranking_with_cache(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED]
+        with tempfile.TemporaryDirectory() as directory:
+            EEFR(data, cache_dir=directory)
+            eEFR: EEFR = EEFR(data, cache_dir=directory)
+            self.assertTrue(eEFR.get_discretizer().is_fitted())
+            self.assertEqual(2, eEFR.get_total_features())
+            np.random.seed(42)
+            features: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=-1, metrics=methods)
+            self.assertEqual(['b'], features)
+            del eEFR
+
+    def test_ensemble_features_ranking_pruned(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [5, 5, 5, 5, 5], [7, 4, 2, 66, 1]]).transpose()
+            for _ in range(100)
+        ]), columns=['a', 'b', 'd', 'c'])
+        eEFR: EEFR = EEFR(data)
+        self.assertEqual(3, eEFR.get_total_features())
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED, Metric.RANDOM_FOREST_IMPORTANCE]
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=0, metrics=methods)
+        self.assertEqual(['b', 'c', 'd'], features)
+
+    def test_ensemble_features_ranking_cascade(self):
+        np.random.seed(42)
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        data['e'] = np.random.randint(0, 2, len(data))
+        data['f'] = np.random.randint(0, 2, len(data))
+        eEFR: EEFR = EEFR(data)
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.RANDOM_FOREST_IMPORTANCE]
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=0, metrics=methods,
+                                                             cascade_fraction=0.5)
+        self.assertEqual(['b', 'c'], features[:2])
+        self.assertEqual(['b', 'c', 'e', 'f'], sorted(features))
+        with self.assertRaises(ValueError):
+            eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, metrics=methods, cascade_fraction=0)
+
+    def test_ensemble_features_ranking_streaming(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        eEFR: EEFR = EEFR(data)
+        self.assertIsNone(eEFR.get_features_statistics())
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED, Metric.EXTRA_TREES_IMPORTANCE]
+        np.random.seed(42)
+        expected: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=0, metrics=methods)
+        np.random.seed(42)
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=0, metrics=methods,
+                                                             streaming=True)
+        self.assertEqual(expected, features)
+        self.assertEqual(['b', 'c'], eEFR.get_features_statistics().index.tolist())
+
+        rankings: list[list[str]] = list(eEFR.iter_ranking(n_rows=250, n_tries=20, metrics=methods))
+        self.assertGreaterEqual(len(rankings), 1)
+        self.assertEqual('b', rankings[-1][0])
+        with self.assertRaises(ValueError):
+            eEFR.ensemble_features_ranking(metrics=methods, streaming=True, cascade_fraction=0.5)
+
+    def test_ensemble_features_ranking_convergence(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        eEFR: EEFR = EEFR(data)
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED]
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=100, cut_off=0, metrics=methods,
+                                                             convergence_threshold=1, convergence_batch=5)
+        self.assertEqual(['b', 'c'], features)
+        log: pandas.DataFrame = pandas.read_csv(f'{LOGS_PATH}/EEFR.tsv', sep='\t')
+        self.assertTrue(log['Converged'][0])
+        self.assertEqual(10, log['Subsets Used'][0])
+        self.assertEqual(10, len(pandas.read_csv(f'{LOGS_PATH}/metric_gain_ratio.tsv', sep='\t')))
+
+    def test_ensemble_features_ranking_time_budget(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        eEFR: EEFR = EEFR(data)
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.EXTRA_TREES_IMPORTANCE]
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=1000, cut_off=0, metrics=methods,
+                                                             time_budget=2)
+        self.assertEqual(['b', 'c'], features)
+        log: pandas.DataFrame = pandas.read_csv(f'{LOGS_PATH}/time_budget.tsv', sep='\t')
+        self.assertEqual(['Predicted Time', 'Execution Time'], log.columns[-2:].tolist())
+        self.assertLess(pandas.Timedelta(log['Execution Time'][0]).total_seconds(), 10)
+        with self.assertRaises(ValueError):
+            eEFR.ensemble_features_ranking(metrics=methods, time_budget=1, cascade_fraction=0.5)
+        with self.assertRaises(ValueError):
+            eEFR.ensemble_features_ranking(metrics=methods, time_budget=1, streaming=True)
+        with self.assertRaises(ValueError):
+            eEFR.ensemble_features_ranking(metrics=methods, time_budget=1, parallel_axis=ParallelAxis.FEATURES)
+
+    def test_get_available_memory(self):
+        meminfo: str = 'MemTotal:       16000000 kB\nMemFree:          100000 kB\nMemAvailable:    8000000 kB\n'
+        with mock.patch('builtins.open', mock.mock_open(read_data=meminfo)):
+            self.assertEqual(8000000 * 1024, _get_available_memory())
+        with mock.patch('builtins.open', side_effect=OSError):
+            self.assertIsNone(_get_available_memory())
+
+    def test_ensemble_features_ranking_mapped_weights(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        eEFR: EEFR = EEFR(data)
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED, Metric.EXTRA_TREES_IMPORTANCE]
+        np.random.seed(42)
+        expected: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=0, metrics=methods)
+        np.random.seed(42)
+        features: list[str] = eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=0, metrics=methods,
+                                                             memory_limit=0)
+        self.assertEqual(expected, features)
+        weights: np.array = np.load(f'{LOGS_PATH}/weights.npy', mmap_mode='r')
+        self.assertEqual((3, 20, 2), weights.shape)
+        self.assertEqual(np.float32, weights.dtype)
+        np.testing.assert_allclose(pandas.read_csv(f'{LOGS_PATH}/metric_chi_squared.tsv', sep='\t').to_numpy(),
+                                   weights[1], rtol=1e-6)
+
+    def test_ensemble_features_ranking_mapped_weights_options(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        eEFR: EEFR = EEFR(data, generate_logs=False)
+        methods: list[Metric] = [Metric.GAIN_RATIO, Metric.CHI_SQUARED]
+        self.assertRaises(ValueError, eEFR.ensemble_features_ranking, n_rows=250, n_tries=20, metrics=methods,
+                          parallel_axis=ParallelAxis.FEATURES, weights_path='weights.npy')
+        self.assertRaises(ValueError, eEFR.ensemble_features_ranking, n_rows=250, n_tries=20, metrics=methods,
+                          cascade_fraction=0.5, memory_limit=0)
+        self.assertRaises(ValueError, eEFR.ensemble_features_ranking, n_rows=250, n_tries=20, metrics=methods,
+                          streaming=True, memory_limit=0)
+        self.assertRaises(ValueError, eEFR.ensemble_features_ranking, n_rows=250, n_tries=20, metrics=methods,
+                          time_budget=10, weights_path='weights.npy')
+        self.assertFalse(os.path.exists('weights.npy'))
+
+    def test_ensemble_features_ranking_mapped_weights_error(self):
+        data: pandas.DataFrame = pandas.DataFrame(np.concatenate([
+            np.array([[0, 1, 1, 0, 1], [12, 1, 4, 23, 0], [7, 4, 2, 66, 1]]).transpose() for _ in range(100)
+        ]), columns=['a', 'b', 'c'])
+        eEFR: EEFR = EEFR(data, generate_logs=False)
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch('tempfile.tempdir', directory), \
+                mock.patch('xefr4py._calculate_mapped_weights_sampling', side_effect=MemoryError):
+            with self.assertRaises(MemoryError):
+                eEFR.ensemble_features_ranking(n_rows=250, n_tries=20, cut_off=0,
+                                               metrics=[Metric.GAIN_RATIO], memory_limit=0)
+            self.assertEqual([], os.listdir(directory))
 
     def test_ensemble_features_ranking_with_blacklist(self):
         data: pandas.DataFrame = pandas.DataFrame(np.concatenate([